@@ -0,0 +1,148 @@
+import json
+import math
+import logging
+import threading
+from array import array
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def _percentile(sorted_values, fraction: float) -> float:
+    """已排序序列的分位数（最近秩法），空序列返回 0"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class MethodStats:
+    """单个 API 方法的统计：HTTP 请求数、调用数、错误数、收发字节数和每次请求的耗时"""
+    __slots__ = ("requests", "calls", "errors", "request_bytes", "response_bytes", "latencies")
+
+    def __init__(self):
+        self.requests = 0
+        self.calls = 0
+        self.errors = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latencies = array("d")  # 每个请求 8 字节
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "calls": self.calls,
+            "errors": self.errors,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "total_seconds": round(sum(latencies), 6),
+            "p50": round(_percentile(latencies, 0.50), 6),
+            "p95": round(_percentile(latencies, 0.95), 6),
+            "p99": round(_percentile(latencies, 0.99), 6),
+            "max": round(latencies[-1], 6) if latencies else 0.0,
+        }
+
+class ApiMetrics:
+    """
+    ZabbixAPI 调用统计（进程内共享，线程安全）。
+
+    每个 HTTP 请求记录一次：单个调用按方法名归类，批量请求按 "方法名[batch]" 归类
+    （方法不一致时为 "batch"）；重试的每次尝试分别计数。
+    add_hook 注册的回调在每个请求结束后收到一个 span 字典，可用于导出到追踪系统。
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats: Dict[str, MethodStats] = {}
+        self.hooks: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_hook(self, hook: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        注册 span 回调，span 字段：
+            method, calls, started（time.time()）, duration（秒）, request_bytes, response_bytes, error
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[Dict[str, Any]], None]) -> None:
+        self.hooks.remove(hook)
+
+    @staticmethod
+    def span_name(payload) -> str:
+        """请求负载对应的统计名称"""
+        if not isinstance(payload, list):
+            return payload.get("method", "unknown")
+        methods = {call.get("method", "unknown") for call in payload}
+        return f"{methods.pop()}[batch]" if len(methods) == 1 else "batch"
+
+    def record(self, payload, started: float, duration: float, request_bytes: int,
+               response_bytes: int, error: Optional[str] = None) -> None:
+        name = self.span_name(payload)
+        calls = len(payload) if isinstance(payload, list) else 1
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = MethodStats()
+            stats.requests += 1
+            stats.calls += calls
+            stats.errors += 1 if error else 0
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+            stats.latencies.append(duration)
+        if self.hooks:
+            span = {
+                "method": name,
+                "calls": calls,
+                "started": started,
+                "duration": duration,
+                "request_bytes": request_bytes,
+                "response_bytes": response_bytes,
+                "error": error,
+            }
+            for hook in list(self.hooks):
+                try:
+                    hook(span)
+                except Exception as e:
+                    logger.warning(f"metrics hook failed: {e}")
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stats = {}
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """按总耗时降序返回 {方法名: 统计}"""
+        with self.lock:
+            summaries = {name: stats.summary() for name, stats in self.stats.items()}
+        return dict(sorted(summaries.items(), key=lambda item: item[1]["total_seconds"], reverse=True))
+
+    def total_requests(self) -> int:
+        with self.lock:
+            return sum(stats.requests for stats in self.stats.values())
+
+    def format_summary(self) -> str:
+        """文本表格形式的统计汇总"""
+        summaries = self.summary()
+        if not summaries:
+            return "API 调用统计：无调用"
+        lines = [
+            f"{'方法':<28}{'请求':>8}{'调用':>8}{'错误':>6}{'发送KB':>10}{'接收KB':>10}"
+            f"{'总耗时s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        ]
+        for name, s in summaries.items():
+            lines.append(
+                f"{name:<28}{s['requests']:>8}{s['calls']:>8}{s['errors']:>6}"
+                f"{s['request_bytes'] / 1024:>10.1f}{s['response_bytes'] / 1024:>10.1f}{s['total_seconds']:>10.2f}"
+                f"{s['p50'] * 1000:>9.1f}{s['p95'] * 1000:>9.1f}{s['p99'] * 1000:>9.1f}"
+            )
+        return "API 调用统计：\n" + "\n".join(lines)
+
+    def log_summary(self) -> None:
+        logger.info(self.format_summary())
+
+    def dump_json(self, path: str) -> None:
+        """将统计汇总写入 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+_metrics = ApiMetrics()
+
+def get_metrics() -> ApiMetrics:
+    """返回进程内共享的调用统计实例"""
+    return _metrics
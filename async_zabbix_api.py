@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from zabbix_api import ZabbixAPI
+
+logger = logging.getLogger(__name__)
+
+class AsyncZabbixAPI:
+    """
+    Zabbix API 的 asyncio 客户端：复用 ZabbixAPI 的共享会话（连接池、token、自动重新登录），
+    在线程池中执行请求，用信号量限制同时在途的调用数量。
+
+    示例:
+        async with AsyncZabbixAPI(concurrency=32) as api:
+            responses = await asyncio.gather(*(api.call_api("item.get", {"hostids": h}) for h in host_ids))
+    """
+    def __init__(self, url=None, user=None, password=None, concurrency=20, timeout=30):
+        """
+        Args:
+            concurrency: 同时在途的最大调用数
+            timeout: 单次 HTTP 请求的超时时间（秒），由 requests 在工作线程内生效，
+                     超时后线程随即释放，不会在后台继续占用线程池
+        """
+        self.zabbix_api = ZabbixAPI(url, user, password, timeout=timeout)
+        self.zabbix_api.shared.ensure_pool_size(concurrency)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="zabbix-api")
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """关闭线程池（共享会话由 zabbix_api.close_shared_sessions 统一关闭）"""
+        self._executor.shutdown(wait=False)
+
+    async def call_api(self, method, params=None):
+        """
+        异步调用 Zabbix API 方法，返回值与 ZabbixAPI.call_api 相同。
+        重试由 ZabbixAPI 按会话的 RetryPolicy 统一处理（只重试只读调用的瞬时故障），这里不再叠加重试
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            # 超时由 HTTP 请求本身（ZabbixAPI.timeout）控制，不用 wait_for：
+            # 被放弃的线程无法取消，会继续执行请求并占用线程池
+            return await loop.run_in_executor(self._executor, self.zabbix_api.call_api, method, params)
+
+    async def call_many(self, calls):
+        """
+        并发执行多个调用
+
+        Args:
+            calls: [(method, params), ...] 列表
+
+        Returns:
+            list: 与 calls 顺序一致的结果，失败的调用对应位置为 ZabbixAPIException 实例
+        """
+        return await asyncio.gather(
+            *(self.call_api(method, params) for method, params in calls),
+            return_exceptions=True
+        )
+
+    def __getattr__(self, name):
+        """动态生成异步API方法（用法与 ZabbixAPI 相同，需 await）"""
+        async def api_method(*args, **kwargs):
+            return await self.call_api(name, *args, **kwargs)
+        return api_method
+
+# 示例用法：
+# async def main():
+#     async with AsyncZabbixAPI(concurrency=32) as api:
+#         response = await api.call_api("host.get", {"output": ["hostid"]})
+#         print(response)
+# asyncio.run(main())
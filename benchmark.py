@@ -0,0 +1,392 @@
+"""
+规模基准测试：用 fake_zabbix_server.py 生成不同规模的合成清单，逐个运行各入口脚本的主流程，
+记录耗时、API 请求数和客户端峰值内存，结果写入 JSON，便于不同版本之间对比发现性能回退。
+
+每个规模启动一个替身服务器子进程，每个用例在独立的子进程中运行（峰值内存只包含客户端本身，
+互不影响）；同一规模的用例共用一个服务器，按给定顺序执行（写操作会修改服务器上的清单）。
+
+示例：
+    python benchmark.py --sizes 1000,10000,100000 --output bench.json
+    python benchmark.py --sizes 1000 --cases export_host,jiankong --latency 0.02 --compare bench.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import requests
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", encoding='utf-8')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 默认执行顺序：只读用例在前，写操作（触发器、维护、创建主机）在后
+CASES = ["export_host", "jiankong", "get_host_disk_day", "update_trigger", "maintenance", "host_create"]
+
+# 对比时检查的指标：(结果字段, 说明)
+COMPARE_METRICS = [("wall_seconds", "耗时"), ("api_requests", "API 请求数"), ("peak_rss_bytes", "峰值内存")]
+
+def peak_rss_bytes() -> Optional[int]:
+    """当前进程的峰值常驻内存（字节），无法获取时返回 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # Linux 单位为 KB，macOS 为字节
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+# --- 用例（在子进程中运行） ---------------------------------------------------
+# 每个用例分为准备输入（不计时）和运行两部分：prepare(hosts, workdir, options) 返回 run 的参数
+
+def _sample_indexes(hosts: int, options: Dict[str, Any]) -> List[int]:
+    """按 options["sample"] 比例均匀选取主机序号（至少 1 台，最多 options["max_sample"] 台）"""
+    count = max(1, min(int(hosts * options["sample"]), options["max_sample"], hosts))
+    step = hosts / count
+    return [int(k * step) for k in range(count)]
+
+def prepare_export_host(hosts, workdir, options):
+    return {"output_path": os.path.join(workdir, "export_host.csv")}
+
+def run_export_host(output_path, options):
+    from export_host import ExportHostData
+    exporter = ExportHostData(page_size=options["page_size"], page_workers=options["page_workers"])
+    return {"rows": exporter.export_streaming(output_path)}
+
+def prepare_jiankong(hosts, workdir, options):
+    return {}
+
+def run_jiankong(options):
+    from host_management import ExportHostManagement
+    from jiankong import build_matrix_from_zabbix
+    manager = ExportHostManagement(page_size=options["page_size"], page_workers=options["page_workers"])
+    return {"rows": len(build_matrix_from_zabbix(manager=manager))}
+
+def prepare_get_host_disk_day(hosts, workdir, options):
+    return {"output_path": os.path.join(workdir, "disk_peak.xlsx")}
+
+def run_get_host_disk_day(output_path, options):
+    from get_host_disk_day import ExportDiskUsed
+    end = datetime.now()
+    start = datetime.fromtimestamp(end.timestamp() - (options["disk_days"] - 1) * 86400)
+    ok = ExportDiskUsed().get_daily_disk_peak(start.strftime("%Y%m%d"), end.strftime("%Y%m%d"), output_path)
+    return {"success": bool(ok)}
+
+def prepare_update_trigger(hosts, workdir, options):
+    import pandas as pd
+    from fake_zabbix_server import host_ip
+    path = os.path.join(workdir, "update_trigger.xlsx")
+    pd.DataFrame({"APP_ID": "", "IP地址": [host_ip(n) for n in _sample_indexes(hosts, options)]}).to_excel(path, index=False)
+    return {"excel_path": path}
+
+def run_update_trigger(excel_path, options):
+    import update_trigger
+    update_trigger.EXCEL_FILE_PATH = excel_path
+    update_trigger.UpdateTrigger().process_excel_triggers_bulk("UNDO", ">0", False)
+    return {}
+
+def prepare_maintenance(hosts, workdir, options):
+    from fake_zabbix_server import host_ip
+    path = os.path.join(workdir, "maintenance.csv")
+    windows = ["01:00-03:00", "02:00-04:00", "22:00-02:00"]
+    date = datetime.now().strftime("%Y/%m/%d")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["IP地址", "维护时间"])
+        for k, n in enumerate(_sample_indexes(hosts, options)):
+            writer.writerow([host_ip(n), f"{date} {windows[k % len(windows)]}"])
+    return {"csv_path": path}
+
+def run_maintenance(csv_path, options):
+    from maintenance import Maintenance
+    plan = Maintenance().read_and_process_csv_planned(csv_path)
+    return {"maintenances": plan["maintenances"] if plan else 0}
+
+def prepare_host_create(hosts, workdir, options):
+    import pandas as pd
+    from fake_zabbix_server import host_ip
+    indexes = _sample_indexes(hosts, options)
+    # 一半为新主机，一半为已存在的主机（走 upsert 比对路径）
+    ips = [f"192.{168 + (k >> 16)}.{(k >> 8) & 255}.{k & 255}" for k in range(len(indexes) // 2 or 1)]
+    ips += [host_ip(n) for n in indexes[len(ips):]]
+    path = os.path.join(workdir, "host_create.xlsx")
+    pd.DataFrame({
+        "IP地址": ips,
+        "Proxy代理主机": "Proxy_JY_RD001",
+        "系统类型": ["snmp" if k % 2 else "agent" for k in range(len(ips))],
+        "品牌": "Bench",
+        "型号": "",
+    }).to_excel(path, index=False)
+    return {"excel_path": path}
+
+def run_host_create(excel_path, options):
+    from host_create import create_hosts_bulk
+    results = create_hosts_bulk(
+        excel_path, "Poly话机", "Template_Envision_SNMPGeneral", "Envision_Temp_ICMPPing_Baseline", upsert=True
+    )
+    return {"succeeded": sum(1 for r in results if r.get("status") == "success"), "rows": len(results)}
+
+CASE_FUNCTIONS: Dict[str, Tuple[Callable, Callable]] = {
+    "export_host": (prepare_export_host, run_export_host),
+    "jiankong": (prepare_jiankong, run_jiankong),
+    "get_host_disk_day": (prepare_get_host_disk_day, run_get_host_disk_day),
+    "update_trigger": (prepare_update_trigger, run_update_trigger),
+    "maintenance": (prepare_maintenance, run_maintenance),
+    "host_create": (prepare_host_create, run_host_create),
+}
+
+def run_case(name: str, hosts: int, workdir: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """在当前进程中运行一个用例，返回测量结果"""
+    from api_metrics import get_metrics
+    from json_codec import get_codec
+    prepare, run = CASE_FUNCTIONS[name]
+    kwargs = prepare(hosts, workdir, options)
+    metrics = get_metrics()
+    metrics.reset()
+    started = time.perf_counter()
+    details = run(options=options, **kwargs)
+    wall = time.perf_counter() - started
+    summary = metrics.summary()
+    return {
+        "wall_seconds": round(wall, 4),
+        "api_requests": sum(s["requests"] for s in summary.values()),
+        "api_calls": sum(s["calls"] for s in summary.values()),
+        "api_errors": sum(s["errors"] for s in summary.values()),
+        "api_seconds": round(sum(s["total_seconds"] for s in summary.values()), 4),
+        "response_bytes": sum(s["response_bytes"] for s in summary.values()),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "json_codec": get_codec().name,
+        "methods": {method: s["requests"] for method, s in summary.items()},
+        "details": details,
+    }
+
+# --- 调度（父进程） -----------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(hosts: int, args, log_file) -> Tuple[subprocess.Popen, str]:
+    """启动 simulate 模式的替身服务器子进程，等待可以响应请求后返回 (进程, URL)"""
+    port = _free_port()
+    command = [
+        sys.executable, os.path.join(HERE, "fake_zabbix_server.py"), "simulate",
+        "--port", str(port), "--hosts", str(hosts), "--proxies", str(args.proxies), "--groups", str(args.groups),
+        "--app-ids", str(args.app_ids), "--triggers-per-host", str(args.triggers_per_host),
+        "--items-per-host", str(args.items_per_host), "--disks-per-host", str(args.disks_per_host),
+        "--history-interval", str(args.history_interval), "--latency", str(args.latency),
+        "--jitter", str(args.jitter), "--seed", str(args.seed), "--gzip", str(args.server_gzip),
+    ]
+    process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}/"
+    deadline = time.monotonic() + args.server_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"替身服务器启动失败（退出码 {process.returncode}），见 {log_file.name}")
+        try:
+            requests.post(url + "api_jsonrpc.php", json={"jsonrpc": "2.0", "method": "apiinfo.version", "params": {}, "id": 1}, timeout=5)
+            return process, url
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"替身服务器 {args.server_timeout}s 内未就绪")
+
+def run_case_subprocess(name: str, hosts: int, url: str, workdir: str, options: Dict[str, Any],
+                        log_file) -> Dict[str, Any]:
+    """在独立子进程中运行用例（使用全新的本地配置缓存），返回测量结果；失败时返回带 error 的结果"""
+    result_path = os.path.join(workdir, f"{name}.result.json")
+    env = dict(
+        os.environ,
+        ZABBIX_URL=url,
+        ZABBIX_CACHE_PATH=os.path.join(workdir, f"{name}.cache.sqlite"),
+        PYTHONIOENCODING="utf-8",
+        ZABBIX_JSON_CODEC=options["json_codec"],
+        ZABBIX_COMPRESS_MIN_BYTES=str(options["compress_min_bytes"]),
+    )
+    command = [
+        sys.executable, os.path.abspath(__file__), "--run-case", name, "--hosts", str(hosts),
+        "--workdir", workdir, "--result", result_path, "--options", json.dumps(options),
+    ]
+    started = time.perf_counter()
+    completed = subprocess.run(command, env=env, cwd=HERE, stdout=log_file, stderr=subprocess.STDOUT)
+    process_seconds = round(time.perf_counter() - started, 4)
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        return {"error": f"exit code {completed.returncode}", "process_seconds": process_seconds}
+    with open(result_path, encoding="utf-8") as f:
+        result = json.load(f)
+    result["process_seconds"] = process_seconds
+    return result
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    options = {
+        "page_size": args.page_size, "page_workers": args.page_workers, "sample": args.sample,
+        "max_sample": args.max_sample, "disk_days": args.disk_days,
+        "json_codec": args.json_codec, "compress_min_bytes": args.compress_min_bytes,
+    }
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "inventory": {
+                "proxies": args.proxies, "groups": args.groups, "app_ids": args.app_ids,
+                "triggers_per_host": args.triggers_per_host, "items_per_host": args.items_per_host,
+                "disks_per_host": args.disks_per_host, "history_interval": args.history_interval, "seed": args.seed,
+            },
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "server_gzip": args.server_gzip,
+            "options": options,
+        },
+        "results": [],
+    }
+    workroot = args.workdir or tempfile.mkdtemp(prefix="zabbix-bench-")
+    log_path = os.path.join(workroot, "benchmark.log")
+    os.makedirs(workroot, exist_ok=True)
+    logging.info(f"工作目录: {workroot}（子进程日志: {log_path}）")
+
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        for hosts in args.sizes:
+            logging.info(f"生成 {hosts} 台主机的合成清单并启动替身服务器...")
+            started = time.perf_counter()
+            server, url = start_server(hosts, args, log_file)
+            logging.info(f"替身服务器已就绪（{time.perf_counter() - started:.1f}s）: {url}")
+            try:
+                for name in args.cases:
+                    for repeat in range(args.repeat):
+                        workdir = os.path.join(workroot, f"{hosts}", f"{name}-{repeat}")
+                        os.makedirs(workdir, exist_ok=True)
+                        result = run_case_subprocess(name, hosts, url, workdir, options, log_file)
+                        result.update({"case": name, "hosts": hosts, "repeat": repeat})
+                        report["results"].append(result)
+                        if "error" in result:
+                            logging.error(f"[{hosts}] {name} 失败: {result['error']}，见 {log_path}")
+                        else:
+                            logging.info(
+                                f"[{hosts}] {name}: {result['wall_seconds']:.2f}s, "
+                                f"{result['api_requests']} 个请求, 峰值内存 {_format_bytes(result['peak_rss_bytes'])}"
+                            )
+            finally:
+                server.terminate()
+                server.wait()
+    return report
+
+def _format_bytes(value: Optional[int]) -> str:
+    return "未知" if value is None else f"{value / 1024 ** 2:.0f} MB"
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    按 (规模, 用例) 对比两份报告（多次重复取最小值），返回超过阈值的回退说明列表。
+    threshold 为允许的相对增长（0.2 表示增长超过 20% 视为回退）
+    """
+    def best(report):
+        values = {}
+        for result in report["results"]:
+            if "error" in result:
+                continue
+            key = (result["hosts"], result["case"])
+            for field, _ in COMPARE_METRICS:
+                if result.get(field) is not None:
+                    values.setdefault(key, {})
+                    values[key][field] = min(values[key].get(field, result[field]), result[field])
+        return values
+
+    old, new = best(baseline), best(current)
+    regressions = []
+    for key in sorted(set(old) & set(new)):
+        for field, label in COMPARE_METRICS:
+            before, after = old[key].get(field), new[key].get(field)
+            if before and after is not None and after > before * (1 + threshold):
+                regressions.append(
+                    f"[{key[0]}] {key[1]} {label}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)"
+                )
+    for result in current["results"]:
+        if "error" in result:
+            regressions.append(f"[{result['hosts']}] {result['case']} 运行失败: {result['error']}")
+    return regressions
+
+def _parse_list(value: str, convert=str) -> List:
+    return [convert(part.strip()) for part in value.split(",") if part.strip()]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zabbix 脚本规模基准测试（本地替身服务器）")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="主机规模，逗号分隔（默认：1000,10000,100000）")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"用例，逗号分隔（默认：{','.join(CASES)}）")
+    parser.add_argument("--output", default="benchmark.json", help="结果 JSON 文件（默认：benchmark.json）")
+    parser.add_argument("--compare", help="与该基准结果对比，出现回退时以退出码 1 结束")
+    parser.add_argument("--threshold", type=float, default=0.2, help="对比时允许的相对增长（默认：0.2）")
+    parser.add_argument("--repeat", type=int, default=1, help="每个用例重复次数（默认：1）")
+    parser.add_argument("--workdir", help="保存输入、输出和日志的目录（默认：临时目录）")
+    parser.add_argument("--latency", type=float, default=0.0, help="服务器每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="服务器每个请求附加的随机延迟上限（秒）")
+    parser.add_argument("--proxies", type=int, default=5, help="代理数（默认：5）")
+    parser.add_argument("--groups", type=int, default=10, help="主机组数（默认：10）")
+    parser.add_argument("--app-ids", type=int, default=200, help="不同 APP_ID 标签值的数量（默认：200）")
+    parser.add_argument("--triggers-per-host", type=int, default=4, help="每台主机的触发器数（默认：4）")
+    parser.add_argument("--items-per-host", type=int, default=2, help="每台主机的普通监控项数（默认：2）")
+    parser.add_argument("--disks-per-host", type=int, default=2, help="每台主机的磁盘挂载点数（默认：2）")
+    parser.add_argument("--history-interval", type=int, default=3600, help="历史数据间隔（秒，默认：3600）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（默认：0）")
+    parser.add_argument("--page-size", type=int, default=500, help="分页获取主机时每页主机数（默认：500）")
+    parser.add_argument("--page-workers", type=int, default=1, help="同时获取的主机页数（默认：1）")
+    parser.add_argument("--sample", type=float, default=0.01, help="输入表（触发器/维护/创建主机）占主机数的比例（默认：0.01）")
+    parser.add_argument("--max-sample", type=int, default=1000, help="输入表最多行数（默认：1000）")
+    parser.add_argument("--disk-days", type=int, default=1, help="磁盘峰值报告的天数（1 天使用历史数据，多天使用趋势数据）")
+    parser.add_argument("--json-codec", default="", help="客户端 JSON 编解码器（orjson/ujson/json，默认自动选择）")
+    parser.add_argument("--compress-min-bytes", type=int, default=0, help="客户端压缩不小于该字节数的请求体（默认：0 不压缩）")
+    parser.add_argument("--server-gzip", type=int, default=0, help="服务器压缩不小于该字节数的响应（默认：0 不压缩）")
+    parser.add_argument("--server-timeout", type=float, default=600, help="等待替身服务器就绪的最长时间（秒）")
+    # 子进程内部使用
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--hosts", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        result = run_case(args.run_case, args.hosts, args.workdir, json.loads(args.options))
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        sys.exit(0)
+
+    args.sizes = _parse_list(args.sizes, int)
+    args.cases = _parse_list(args.cases)
+    unknown = [name for name in args.cases if name not in CASE_FUNCTIONS]
+    if unknown:
+        parser.error(f"未知用例: {', '.join(unknown)}")
+
+    report = run_benchmarks(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logging.info(f"基准结果已写入: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_reports(json.load(f), report, args.threshold)
+        for line in regressions:
+            logging.warning(f"回退: {line}")
+        if regressions:
+            sys.exit(1)
+        logging.info("与基准相比没有超过阈值的回退")
@@ -0,0 +1,263 @@
+import re
+import operator
+from functools import lru_cache
+from typing import Any, Callable, List, Tuple
+import numpy as np
+
+class ConditionError(ValueError):
+    """条件表达式语法错误"""
+
+# 比较运算符（"=" 与 "==" 等价）
+COMPARISON_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+KEYWORDS = {"and", "or", "not", "between", "contains", "regex"}
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<paren>[()])
+      | (?P<op>>=|<=|==|!=|>|<|=)
+      | "(?P<dquote>(?:[^"\\]|\\.)*)"
+      | '(?P<squote>(?:[^'\\]|\\.)*)'
+      | (?P<word>[^\s()]+)
+    )
+""", re.VERBOSE)
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    """拆分为 (类型, 值) 列表，类型为 paren/op/str/kw/word"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise ConditionError(f"无法解析的条件: {text[position:]!r}")
+        position = match.end()
+        if match.group("paren"):
+            tokens.append(("paren", match.group("paren")))
+        elif match.group("op"):
+            tokens.append(("op", match.group("op")))
+        elif match.group("dquote") is not None:
+            tokens.append(("str", re.sub(r"\\(.)", r"\1", match.group("dquote"))))
+        elif match.group("squote") is not None:
+            tokens.append(("str", re.sub(r"\\(.)", r"\1", match.group("squote"))))
+        else:
+            word = match.group("word")
+            tokens.append(("kw", word.lower()) if word.lower() in KEYWORDS else ("word", word))
+    return tokens
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return float("nan")
+
+def _to_float_array(values: np.ndarray) -> np.ndarray:
+    """转换为浮点数组，无法转换的元素为 NaN（与 NaN 的任何比较结果均为 False）"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        return np.fromiter((_to_float(v) for v in values), dtype=np.float64, count=len(values))
+
+# 带操作数的关键字：出现这些关键字或比较运算符的条件按表达式处理，语法错误时报错
+OPERAND_KEYWORDS = {"between", "contains", "regex"}
+
+def _looks_like_text(tokens: List[Tuple[str, str]]) -> bool:
+    """不含比较运算符和带操作数关键字的条件（只有 and/or/not、括号和普通文本）视为普通文本"""
+    return not any(kind == "op" or (kind == "kw" and value in OPERAND_KEYWORDS) for kind, value in tokens)
+
+class _Node:
+    """表达式节点：scalar 对单个值求值，vector 对数组求值并返回布尔数组"""
+    def __init__(self, scalar: Callable[[Any], bool], vector: Callable[[np.ndarray, np.ndarray], np.ndarray]):
+        self.scalar = scalar
+        self.vector = vector
+
+def _comparison(op: str, operand: str) -> _Node:
+    compare = COMPARISON_OPERATORS[op]
+    try:
+        threshold = float(operand)
+    except ValueError:
+        raise ConditionError(f"比较运算符 {op} 后应为数字: {operand!r}")
+
+    def scalar(value):
+        number = _to_float(value)
+        return number == number and bool(compare(number, threshold))
+
+    return _Node(scalar, lambda numbers, strings: compare(numbers, threshold) & ~np.isnan(numbers))
+
+def _between(low: str, high: str) -> _Node:
+    try:
+        low_value, high_value = sorted((float(low), float(high)))
+    except ValueError:
+        raise ConditionError(f"between 的上下限应为数字: {low!r}, {high!r}")
+
+    def scalar(value):
+        number = _to_float(value)
+        return low_value <= number <= high_value
+
+    return _Node(scalar, lambda numbers, strings: (numbers >= low_value) & (numbers <= high_value))
+
+def _contains(text: str) -> _Node:
+    return _Node(
+        lambda value: text in str(value),
+        lambda numbers, strings: np.char.find(strings, text) >= 0
+    )
+
+def _regex(pattern: str) -> _Node:
+    try:
+        compiled = re.compile(pattern)
+    except re.error as e:
+        raise ConditionError(f"正则表达式无效: {pattern!r} ({e})")
+    search = np.frompyfunc(lambda s: compiled.search(s) is not None, 1, 1)
+    return _Node(
+        lambda value: compiled.search(str(value)) is not None,
+        lambda numbers, strings: search(strings).astype(bool)
+    )
+
+class _Parser:
+    """
+    递归下降解析器，语法：
+        expr    := term ("or" term)*
+        term    := factor ("and" factor)*
+        factor  := "not" factor | "(" expr ")" | atom
+        atom    := OP NUMBER | "between" NUMBER "and" NUMBER | "contains" TEXT | "regex" TEXT
+    """
+    def __init__(self, tokens: List[Tuple[str, str]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[str, str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ("end", "")
+
+    def take(self, kind: str = None, value: str = None) -> str:
+        token = self.peek()
+        if token[0] == "end" or (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind or "表达式"
+            raise ConditionError(f"条件语法错误：期望 {expected}，实际为 {token[1] or '结尾'!r}")
+        self.position += 1
+        return token[1]
+
+    def take_text(self) -> str:
+        kind, value = self.peek()
+        if kind not in ("str", "word"):
+            raise ConditionError(f"条件语法错误：期望文本，实际为 {value or '结尾'!r}")
+        self.position += 1
+        return value
+
+    def parse(self) -> _Node:
+        node = self.expr()
+        if self.peek()[0] != "end":
+            raise ConditionError(f"条件语法错误：多余的内容 {self.peek()[1]!r}")
+        return node
+
+    def expr(self) -> _Node:
+        node = self.term()
+        while self.peek() == ("kw", "or"):
+            self.position += 1
+            left, right = node, self.term()
+            node = _Node(
+                lambda value, l=left, r=right: l.scalar(value) or r.scalar(value),
+                lambda numbers, strings, l=left, r=right: l.vector(numbers, strings) | r.vector(numbers, strings)
+            )
+        return node
+
+    def term(self) -> _Node:
+        node = self.factor()
+        while self.peek() == ("kw", "and"):
+            self.position += 1
+            left, right = node, self.factor()
+            node = _Node(
+                lambda value, l=left, r=right: l.scalar(value) and r.scalar(value),
+                lambda numbers, strings, l=left, r=right: l.vector(numbers, strings) & r.vector(numbers, strings)
+            )
+        return node
+
+    def factor(self) -> _Node:
+        kind, value = self.peek()
+        if (kind, value) == ("kw", "not"):
+            self.position += 1
+            inner = self.factor()
+            return _Node(lambda v: not inner.scalar(v), lambda numbers, strings: ~inner.vector(numbers, strings))
+        if (kind, value) == ("paren", "("):
+            self.position += 1
+            node = self.expr()
+            self.take("paren", ")")
+            return node
+        if kind == "op":
+            self.position += 1
+            return _comparison(value, self.take_text())
+        if (kind, value) == ("kw", "between"):
+            self.position += 1
+            low = self.take_text()
+            self.take("kw", "and")
+            return _between(low, self.take_text())
+        if (kind, value) == ("kw", "contains"):
+            self.position += 1
+            return _contains(self.take_text())
+        if (kind, value) == ("kw", "regex"):
+            self.position += 1
+            return _regex(self.take_text())
+        raise ConditionError(f"条件语法错误：无法识别 {value or '结尾'!r}")
+
+class Condition:
+    """
+    编译后的条件谓词。
+
+    示例:
+        cond = compile_condition("between 10 and 20 or contains ERROR")
+        cond("15")                              # True
+        cond.evaluate(np.array(["5", "ERROR"])) # array([False,  True])
+    """
+    def __init__(self, text: str, node: _Node):
+        self.text = text
+        self._node = node
+
+    def __call__(self, value: Any) -> bool:
+        return bool(self._node.scalar(value))
+
+    def evaluate(self, values) -> np.ndarray:
+        """对一组值整体求值，返回同长度的布尔数组"""
+        values = np.asarray(values, dtype=object)
+        if values.size == 0:
+            return np.zeros(0, dtype=bool)
+        strings = values.astype(str)
+        numbers = _to_float_array(values)
+        with np.errstate(invalid="ignore"):
+            return np.asarray(self._node.vector(numbers, strings), dtype=bool)
+
+    def __repr__(self) -> str:
+        return f"Condition({self.text!r})"
+
+@lru_cache(maxsize=256)
+def compile_condition(text: str) -> Condition:
+    """
+    将条件字符串编译为 Condition（同一条件只解析一次）。
+
+    支持的写法：
+        >80、>=80、<10、=5、==5、!=0          数值比较
+        between 10 and 20                      闭区间
+        contains ERROR / contains "a b"        包含文本
+        regex "^disk.*full$"                   正则匹配
+        AND / OR / NOT / 括号                   组合条件
+    不以运算符或关键字开头的条件按旧规则视为“包含该文本”；以 NOT/AND/OR 或括号开头、
+    但不含运算符和 between/contains/regex 且无法解析的条件（如 "NOT RUNNING"、"(null)"）同样视为包含。
+    其它无法解析的条件（如 ">80%"、"between 10 and"）抛出 ConditionError。
+    """
+    tokens = _tokenize(text)
+    if not tokens:
+        raise ConditionError("条件不能为空")
+    if tokens[0][0] not in ("op", "paren", "kw"):
+        return Condition(text, _contains(text))
+    try:
+        return Condition(text, _Parser(tokens).parse())
+    except ConditionError:
+        if _looks_like_text(tokens):
+            return Condition(text, _contains(text))
+        raise
@@ -1,10 +1,13 @@
+import os
+
 # ZABBIX_URL = "http://mm.envisioncn.com/zabbix"
 # ZABBIX_USER = "Admin"
 # ZABBIX_PASSWORD = "Wh2i@_%3uTo4njaP"
 
-ZABBIX_URL = "https://sysmonitor.envisioncn.com/"
-ZABBIX_USER = "r_jie.zhang22"
-ZABBIX_PASSWORD = "Ws&egY@7X_3F"
+# 可通过环境变量覆盖（例如指向 fake_zabbix_server.py 启动的本地替身服务器）
+ZABBIX_URL = os.environ.get("ZABBIX_URL", "https://sysmonitor.envisioncn.com/")
+ZABBIX_USER = os.environ.get("ZABBIX_USER", "r_jie.zhang22")
+ZABBIX_PASSWORD = os.environ.get("ZABBIX_PASSWORD", "Ws&egY@7X_3F")
 
 #  [AD]
 #  ldap_server = 10.86.8.45
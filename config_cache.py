@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import argparse
+from typing import Dict, List, Optional, Any
+from config import ZABBIX_URL
+from zabbix_api import ZabbixAPI
+
+# 缓存文件路径，可通过环境变量 ZABBIX_CACHE_PATH 覆盖
+CACHE_PATH = os.environ.get(
+    "ZABBIX_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".zabbix_config_cache.sqlite")
+)
+
+# 缓存的配置对象类型：查询方法、输出字段、作为缓存键的字段以及默认 TTL（秒）
+CACHE_KINDS = {
+    "host": {"method": "host.get", "output": ["hostid", "host", "name"], "key": "host", "ttl": 600},
+    "proxy": {"method": "proxy.get", "output": ["proxyid", "host", "proxy_address"], "key": "host", "ttl": 3600},
+    "template": {"method": "template.get", "output": ["templateid", "host", "name"], "key": "host", "ttl": 3600},
+    "hostgroup": {"method": "hostgroup.get", "output": ["groupid", "name"], "key": "name", "ttl": 3600},
+}
+
+class ConfigCache:
+    """
+    Zabbix 配置对象（主机、代理、模板、主机组）的本地 SQLite 缓存。
+
+    - lookup: 按名称查询，命中且未过期时不访问 API
+    - invalidate: 创建/更新对象后显式失效
+    - refresh: 全量拉取某类对象并与缓存比对，只写入变化的部分，返回变更明细
+    """
+    def __init__(self, path: str = CACHE_PATH, ttl: Optional[Dict[str, int]] = None, url: str = ZABBIX_URL):
+        self.path = path
+        self.url = url.rstrip("/")
+        self.ttl = {kind: spec["ttl"] for kind, spec in CACHE_KINDS.items()}
+        self.ttl.update(ttl or {})
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " url TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL,"
+            " value TEXT NOT NULL, digest TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (url, kind, key))"
+        )
+        # 每类对象最近一次全量刷新的时间：在 TTL 内时缓存中的该类对象是完整列表（见 get_all）
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS refreshes ("
+            " url TEXT NOT NULL, kind TEXT NOT NULL, refreshed_at REAL NOT NULL,"
+            " PRIMARY KEY (url, kind))"
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        return hashlib.sha1(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存对象，不存在或已过期时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, fetched_at FROM objects WHERE url = ? AND kind = ? AND key = ?",
+                (self.url, kind, key)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl[kind]:
+            return None
+        return json.loads(row[0])
+
+    def put(self, kind: str, key: str, value: Dict[str, Any]) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO objects (url, kind, key, value, digest, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.url, kind, key, json.dumps(value, ensure_ascii=False), self._digest(value), time.time())
+            )
+            self.conn.commit()
+
+    def get_all(self, kind: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        返回某类对象的完整列表：仅当 TTL 内做过全量刷新（refresh）且之后没有失效过时可用，否则返回 None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT refreshed_at FROM refreshes WHERE url = ? AND kind = ?", (self.url, kind)
+            ).fetchone()
+            if row is None or time.time() - row[0] > self.ttl[kind]:
+                return None
+            rows = self.conn.execute(
+                "SELECT value FROM objects WHERE url = ? AND kind = ?", (self.url, kind)
+            ).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    def invalidate(self, kind: str, key: Optional[str] = None) -> None:
+        """失效某个对象；key 为空时失效该类型的全部对象（两种情况都会使 get_all 的完整列表失效）"""
+        with self.lock:
+            self.conn.execute("DELETE FROM refreshes WHERE url = ? AND kind = ?", (self.url, kind))
+            if key is None:
+                self.conn.execute("DELETE FROM objects WHERE url = ? AND kind = ?", (self.url, kind))
+            else:
+                self.conn.execute(
+                    "DELETE FROM objects WHERE url = ? AND kind = ? AND key = ?", (self.url, kind, key)
+                )
+            self.conn.commit()
+
+    def lookup(self, zabbix_api: ZabbixAPI, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        按名称查询配置对象：优先读缓存，未命中时调用 API 并写入缓存
+
+        Returns:
+            API 返回的原始对象（字段见 CACHE_KINDS），不存在时返回 None
+        """
+        cached = self.get(kind, key)
+        if cached is not None:
+            return cached
+        spec = CACHE_KINDS[kind]
+        response = zabbix_api.call_api(spec["method"], {
+            "filter": {spec["key"]: key},
+            "output": spec["output"]
+        })
+        result = response.get("result", [])
+        if not result:
+            return None
+        self.put(kind, key, result[0])
+        return result[0]
+
+    def refresh(self, zabbix_api: ZabbixAPI, kind: str, incremental: bool = True) -> Dict[str, List[str]]:
+        """
+        全量拉取某类对象并刷新缓存
+
+        Args:
+            incremental: 为 True 时只写入新增/变化的对象并删除已不存在的对象，
+                         未变化的对象只更新时间戳；为 False 时清空后重建
+
+        Returns:
+            dict: {"added": [...], "changed": [...], "removed": [...]}，元素为缓存键
+        """
+        spec = CACHE_KINDS[kind]
+        response = zabbix_api.call_api(spec["method"], {"output": spec["output"]})
+        fresh = {obj[spec["key"]]: obj for obj in response.get("result", [])}
+        now = time.time()
+
+        with self.lock:
+            stored = dict(self.conn.execute(
+                "SELECT key, digest FROM objects WHERE url = ? AND kind = ?", (self.url, kind)
+            ).fetchall())
+            changes = {
+                "added": [key for key in fresh if key not in stored],
+                "changed": [key for key, obj in fresh.items() if key in stored and stored[key] != self._digest(obj)],
+                "removed": [key for key in stored if key not in fresh],
+            }
+            if incremental:
+                to_write = changes["added"] + changes["changed"]
+                self.conn.executemany(
+                    "DELETE FROM objects WHERE url = ? AND kind = ? AND key = ?",
+                    [(self.url, kind, key) for key in changes["removed"]]
+                )
+                self.conn.execute(
+                    "UPDATE objects SET fetched_at = ? WHERE url = ? AND kind = ?", (now, self.url, kind)
+                )
+            else:
+                to_write = list(fresh)
+                self.conn.execute("DELETE FROM objects WHERE url = ? AND kind = ?", (self.url, kind))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO objects (url, kind, key, value, digest, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.url, kind, key, json.dumps(fresh[key], ensure_ascii=False), self._digest(fresh[key]), now)
+                    for key in to_write
+                ]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO refreshes (url, kind, refreshed_at) VALUES (?, ?, ?)", (self.url, kind, now)
+            )
+            self.conn.commit()
+
+        logging.info(
+            f"缓存 [{kind}] 刷新完成: 新增 {len(changes['added'])}, "
+            f"变化 {len(changes['changed'])}, 删除 {len(changes['removed'])}"
+        )
+        return changes
+
+_config_cache = None
+_config_cache_lock = threading.Lock()
+
+def get_config_cache() -> ConfigCache:
+    """返回进程内共享的配置缓存实例"""
+    global _config_cache
+    with _config_cache_lock:
+        if _config_cache is None:
+            _config_cache = ConfigCache()
+        return _config_cache
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="刷新 Zabbix 配置对象本地缓存")
+    parser.add_argument("--kind", choices=list(CACHE_KINDS), action="append",
+                        help="要刷新的对象类型，可重复指定（默认：全部）")
+    parser.add_argument("--full", action="store_true", help="清空后重建，而不是增量刷新")
+    args = parser.parse_args()
+
+    cache = get_config_cache()
+    zabbix_api = ZabbixAPI()
+    for kind in args.kind or list(CACHE_KINDS):
+        cache.refresh(zabbix_api, kind, incremental=not args.full)
@@ -1,55 +1,179 @@
+import os
+import sys
+import csv
 import logging
 import argparse
 import pandas as pd
-from typing import List, Dict
+from typing import List, Iterator, Optional, Any
 from host_management import ExportHostManagement
+from zabbix_api import ZabbixAPIException
+from host_record import HostRecord, DISPLAY_COLUMNS
+from api_metrics import get_metrics
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", encoding='utf-8')
 
+# 导出列顺序
+EXPORT_COLUMNS = DISPLAY_COLUMNS
+
+def explode_triggers(record: HostRecord) -> Iterator[List[Any]]:
+    """将一条主机记录按触发器拆分为多行（生成器），每行为按 EXPORT_COLUMNS 排列的显示值"""
+    return record.display_rows()
+
+class _CsvRowWriter:
+    """逐行写入 CSV（utf-8-sig，Excel 可直接打开中文）"""
+    def __init__(self, output_path: str, columns: List[str]):
+        self.file = open(output_path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, row: List[Any]) -> None:
+        self.writer.writerow(row)
+
+    def close(self) -> None:
+        self.file.close()
+
+class _XlsxRowWriter:
+    """
+    逐行写入 xlsx：优先使用 xlsxwriter 的 constant_memory 模式，
+    未安装时退回 openpyxl 的 write_only 模式，两者内存占用都与行数无关
+    """
+    def __init__(self, output_path: str, columns: List[str]):
+        try:
+            import xlsxwriter
+            self.workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+            self.worksheet = self.workbook.add_worksheet()
+            self.row_index = 0
+            self.append = self._append_xlsxwriter
+            self.close = self.workbook.close
+        except ImportError:
+            from openpyxl import Workbook
+            self.output_path = output_path
+            self.workbook = Workbook(write_only=True)
+            self.worksheet = self.workbook.create_sheet()
+            self.append = self.worksheet.append
+            self.close = self._close_openpyxl
+        self.append(columns)
+
+    def _append_xlsxwriter(self, row: List[Any]) -> None:
+        self.worksheet.write_row(self.row_index, 0, row)
+        self.row_index += 1
+
+    def _close_openpyxl(self) -> None:
+        self.workbook.save(self.output_path)
+
+    def write(self, row: List[Any]) -> None:
+        self.append(row)
+
+class _ParquetRowWriter:
+    """按批写入 Parquet（需要 pyarrow），每批作为一个 row group"""
+    def __init__(self, output_path: str, columns: List[str], batch_size: int = 10000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(column, pa.string()) for column in columns])
+        self.writer = pq.ParquetWriter(output_path, self.schema)
+        self.batch_size = batch_size
+        self.batch = []
+
+    def write(self, row: List[Any]) -> None:
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.batch:
+            arrays = [self.pa.array([str(row[i]) for row in self.batch]) for i in range(len(self.columns))]
+            self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+            self.batch = []
+
+    def close(self) -> None:
+        self._flush()
+        self.writer.close()
+
+def open_row_writer(output_path: str, columns: List[str]):
+    """根据文件扩展名（.xlsx / .csv / .parquet）返回逐行写入器"""
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == ".csv":
+        return _CsvRowWriter(output_path, columns)
+    if extension == ".parquet":
+        return _ParquetRowWriter(output_path, columns)
+    return _XlsxRowWriter(output_path, columns)
+
+def _cell(value: Any) -> Any:
+    """列表等非标量值按 pandas 导出时的格式转为字符串"""
+    return str(value) if isinstance(value, (list, tuple, dict)) else value
+
+def write_record(writer, record: HostRecord) -> int:
+    """将一条主机记录按触发器拆分后逐行写入 writer，返回写入的行数"""
+    row_count = 0
+    for row in explode_triggers(record):
+        writer.write([_cell(value) for value in row])
+        row_count += 1
+    return row_count
+
 class ExportHostData:
-    def __init__(self):
-        self.manager = ExportHostManagement()
+    def __init__(self, page_size: int = 500, page_workers: int = 1):
+        self.manager = ExportHostManagement(page_size=page_size, page_workers=page_workers)
 
-    def export_to_excel(self, data: List[Dict], output_path: str) -> None:
+    def export_to_excel(self, data: List[HostRecord], output_path: str) -> None:
         """导出数据到Excel，每个触发器单独一行，其它信息保持不变"""
         if not data:
             logging.warning("没有符合条件的主机信息")
             return
 
-        # 确保列顺序一致
-        columns = [
-            "主机ID", "主机名称", "可见名称", "是否启用",
-            "IP地址", "接口类型", "主机组", "关联模板",
-            "代理名称", "触发器描述", "标签列表", "APP_ID"
-        ]
-
-        # 处理每个主机数据，将“触发器描述”字段拆分成多行
-        processed_data = []
-        for record in data:
-            triggers = record.get("触发器描述")
-            # 如果触发器描述存在且为列表或以逗号分隔的字符串，则拆分
-            if triggers:
-                if isinstance(triggers, list):
-                    trigger_list = triggers
-                elif isinstance(triggers, str) and ',' in triggers:
-                    trigger_list = [item.strip() for item in triggers.split(',') if item.strip()]
-                else:
-                    trigger_list = [triggers]
-                # 对于每个触发器，复制一份记录，仅更改触发器描述
-                for trig in trigger_list:
-                    new_record = record.copy()
-                    new_record["触发器描述"] = trig
-                    processed_data.append(new_record)
-            else:
-                processed_data.append(record)
+        # 处理每个主机数据，每个触发器单独一行
+        processed_data = [row for record in data for row in explode_triggers(record)]
 
         try:
-            df = pd.DataFrame(processed_data, columns=columns)
+            df = pd.DataFrame(processed_data, columns=EXPORT_COLUMNS)
             df.to_excel(output_path, index=False)
             logging.info(f"成功导出 {len(processed_data)} 条数据到: {output_path}")
         except Exception as e:
             logging.error(f"导出Excel失败: {str(e)}")
 
+    def export_streaming(
+        self,
+        output_path: str,
+        proxy_name: Optional[str] = None,
+        tag_name: Optional[str] = None,
+        tag_value: Optional[str] = None,
+        page_size: Optional[int] = None
+    ) -> int:
+        """
+        流式导出：分页获取主机、逐条拆分触发器、逐行写入文件（.xlsx / .csv / .parquet），
+        内存占用只与单页主机数有关，与主机总数和触发器总数无关
+
+        Returns:
+            int: 写入的数据行数
+
+        Raises:
+            ZabbixAPIException: 主机查询中途失败（输出文件不完整）
+        """
+        row_count = 0
+        try:
+            writer = open_row_writer(output_path, EXPORT_COLUMNS)
+        except ImportError as e:
+            logging.error(f"导出失败，缺少依赖: {str(e)}")
+            return 0
+        try:
+            records = self.manager.iter_host_info(
+                proxy_name=proxy_name, tag_name=tag_name, tag_value=tag_value, page_size=page_size
+            )
+            for record in records:
+                row_count += write_record(writer, record)
+        except Exception as e:
+            logging.error(f"流式导出失败，输出文件不完整（已写入 {row_count} 行）: {output_path}: {str(e)}")
+            raise
+        finally:
+            writer.close()
+
+        if row_count:
+            logging.info(f"成功导出 {row_count} 条数据到: {output_path}")
+        else:
+            logging.warning("没有符合条件的主机信息")
+        return row_count
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Zabbix主机数据导出工具")
     parser.add_argument("--output", default=r"C:\software\应用系统监控管理-Zabbix-06.xlsx",
@@ -57,13 +181,35 @@ if __name__ == "__main__":
     parser.add_argument("--proxy", help="按代理名称过滤（示例：Proxy_JY_RD001）")
     parser.add_argument("--tag-name", help="标签名称（需配合--tag-value使用）")
     parser.add_argument("--tag-value", help="标签值（需配合--tag-name使用）")
+    parser.add_argument("--streaming", action="store_true",
+                        help="流式导出（分页获取、逐行写入，支持 .xlsx/.csv/.parquet，适合大规模主机）")
+    parser.add_argument("--page-size", type=int, default=500, help="分页获取主机时每页主机数（默认：500）")
+    parser.add_argument("--workers", type=int, default=1, help="同时获取的主机页数（默认：1）")
+    parser.add_argument("--metrics-json", help="将 API 调用统计写入该 JSON 文件")
 
     args = parser.parse_args()
 
-    exporter = ExportHostData()
-    host_data = exporter.manager.get_host_info(
-        proxy_name=args.proxy,
-        tag_name=args.tag_name,
-        tag_value=args.tag_value
-    )
-    exporter.export_to_excel(host_data, args.output)
+    exporter = ExportHostData(page_size=args.page_size, page_workers=args.workers)
+    exit_code = 0
+    if args.streaming:
+        try:
+            exporter.export_streaming(
+                args.output,
+                proxy_name=args.proxy,
+                tag_name=args.tag_name,
+                tag_value=args.tag_value
+            )
+        except ZabbixAPIException:
+            exit_code = 1
+    else:
+        host_data = exporter.manager.get_host_info(
+            proxy_name=args.proxy,
+            tag_name=args.tag_name,
+            tag_value=args.tag_value
+        )
+        exporter.export_to_excel(host_data, args.output)
+
+    print(get_metrics().format_summary())
+    if args.metrics_json:
+        get_metrics().dump_json(args.metrics_json)
+    sys.exit(exit_code)
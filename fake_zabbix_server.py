@@ -0,0 +1,793 @@
+"""
+本地 Zabbix JSON-RPC 替身服务器，用于离线测试和性能基准（不需要连接生产 Zabbix）。
+
+三种模式：
+    simulate  按合成清单（Inventory）在内存中实现项目用到的 API 方法
+    record    作为代理转发到真实 Zabbix，并把每个调用及其响应记录到 JSONL 夹具文件
+    replay    按夹具文件回放记录的响应
+
+示例：
+    python fake_zabbix_server.py simulate --hosts 10000 --port 8080 --latency 0.05
+    python fake_zabbix_server.py record --upstream https://zabbix.example.com/ --fixtures traffic.jsonl
+    python fake_zabbix_server.py replay --fixtures traffic.jsonl --port 8080
+
+脚本通过环境变量指向替身服务器（见 config.py）：
+    ZABBIX_URL=http://127.0.0.1:8080/ python export_host.py --streaming --output hosts.csv
+"""
+import json
+import gzip
+import zlib
+import time
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, List, Optional
+from json_codec import get_codec, decode_body
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", encoding='utf-8')
+logger = logging.getLogger(__name__)
+
+class RpcError(Exception):
+    """JSON-RPC 错误，对应响应中的 error 对象"""
+    def __init__(self, code: int, message: str, data: str = ""):
+        super().__init__(f"{message} {data}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"code": self.code, "message": self.message, "data": self.data}
+
+def _invalid_params(data: str) -> RpcError:
+    return RpcError(-32602, "Invalid params.", data)
+
+# 合成清单使用的模板、触发器描述和磁盘挂载点
+TEMPLATE_NAMES = [
+    "Envision_Temp_ICMPPing_Baseline", "Template_Envision_SNMPGeneral", "Envision_Temp_ZBX_Linux_Baseline",
+    "Envision_Temp_ZBX_Windows_Baseline", "Envision_Temp_ZBX_Windows_Baseline_active",
+]
+TRIGGER_DESCRIPTIONS = [
+    "Ping 主机不可达", "磁盘使用率超过 90%", "共享磁盘不可达", "关键进程停止",
+    "服务中断", "端口 8080 不可用", "监听端口异常", "CPU 使用率过高", "UNDO 测试触发器",
+]
+DISK_MOUNTS = ["/", "/data", "C:", "D:"]
+GROUP_NAMES = ["Linux服务器", "Windows服务器", "网络设备", "Poly话机", "存储设备"]
+
+def host_ip(index: int) -> str:
+    """合成清单中第 index 台主机的 IP 地址（同时也是主机名）"""
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+def _as_list(value) -> List:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _ids(value) -> Optional[set]:
+    """hostids/itemids 等参数转为字符串集合，未传时返回 None"""
+    return None if value is None else {str(v) for v in _as_list(value)}
+
+def _project(obj: Dict[str, Any], output) -> Dict[str, Any]:
+    """按 output 参数（"extend" 或字段列表）裁剪对象"""
+    if output is None or output == "extend":
+        return {key: value for key, value in obj.items() if not key.startswith("_")}
+    return {key: obj[key] for key in _as_list(output) if key in obj}
+
+def _matcher(params: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    按 filter（精确匹配，值可为列表）和 search（子串匹配，startSearch 时匹配前缀）生成过滤函数，
+    过滤条件只解析一次，大清单上逐个对象调用时不再重复构造集合
+    """
+    filters = [(key, {str(v) for v in _as_list(expected)}) for key, expected in (params.get("filter") or {}).items()]
+    searches = [(key, [str(t) for t in _as_list(text)]) for key, text in (params.get("search") or {}).items()]
+    start = params.get("startSearch")
+
+    def match(obj: Dict[str, Any]) -> bool:
+        for key, expected in filters:
+            if str(obj.get(key)) not in expected:
+                return False
+        for key, texts in searches:
+            value = str(obj.get(key, ""))
+            if not any(value.startswith(t) if start else t in value for t in texts):
+                return False
+        return True
+    return match
+
+def _sort_limit(rows: List[Dict[str, Any]], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    sortfield = params.get("sortfield")
+    if sortfield:
+        fields = _as_list(sortfield)
+        descending = str(_as_list(params.get("sortorder") or "ASC")[0]).upper() == "DESC"
+
+        def key(row):
+            return tuple(int(row[f]) if str(row.get(f, "")).isdigit() else str(row.get(f, "")) for f in fields)
+        rows = sorted(rows, key=key, reverse=descending)
+    limit = params.get("limit")
+    if limit:
+        rows = rows[:int(limit)]
+    return rows
+
+class Inventory:
+    """
+    合成的 Zabbix 配置与监控数据：代理、主机组、模板、主机（接口、标签）、监控项和触发器。
+    历史数据和趋势数据不落地，按 (itemid, clock) 确定性地生成，任意时间范围的查询结果稳定可复现。
+    """
+    def __init__(self):
+        self.proxies: Dict[str, Dict[str, Any]] = {}
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self.hosts: Dict[str, Dict[str, Any]] = {}
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.triggers: Dict[str, Dict[str, Any]] = {}
+        self.maintenances: Dict[str, Dict[str, Any]] = {}
+        self.items_by_host: Dict[str, List[str]] = defaultdict(list)
+        self.triggers_by_host: Dict[str, List[str]] = defaultdict(list)
+        self.history_interval = 300
+        self._next_id = 100000
+
+    def next_id(self) -> str:
+        self._next_id += 1
+        return str(self._next_id)
+
+    @classmethod
+    def generate(cls, hosts: int = 1000, proxies: int = 5, groups: int = 10, triggers_per_host: int = 4,
+                 items_per_host: int = 2, disks_per_host: int = 2, app_ids: int = 200,
+                 history_interval: int = 300, seed: int = 0) -> "Inventory":
+        """
+        生成合成清单
+
+        Args:
+            hosts: 主机数（主机名即 IP 地址，与本项目的约定一致）
+            triggers_per_host: 每台主机的触发器数
+            items_per_host: 除磁盘监控项之外每台主机的普通监控项数
+            disks_per_host: 每台主机的磁盘挂载点数（每个挂载点 pused/total 两个监控项）
+            app_ids: 不同 APP_ID 标签值的数量
+            history_interval: 历史数据采集间隔（秒）
+        """
+        rng = random.Random(seed)
+        inventory = cls()
+        inventory.history_interval = history_interval
+        for n in range(proxies):
+            proxy_id = str(1001 + n)
+            inventory.proxies[proxy_id] = {
+                "proxyid": proxy_id, "host": f"Proxy_JY_RD{n + 1:03d}", "proxy_address": f"10.255.0.{n + 1}"
+            }
+        for n in range(groups):
+            group_id = str(2001 + n)
+            name = GROUP_NAMES[n] if n < len(GROUP_NAMES) else f"主机组{n + 1:02d}"
+            inventory.groups[group_id] = {"groupid": group_id, "name": name}
+        for n, name in enumerate(TEMPLATE_NAMES):
+            template_id = str(3001 + n)
+            inventory.templates[template_id] = {"templateid": template_id, "host": name, "name": name}
+
+        proxy_ids = ["0"] + list(inventory.proxies)
+        group_ids = list(inventory.groups)
+        # SNMP 主机关联 SNMP 模板，Agent 主机关联一个系统基线模板，都关联 ICMP 模板
+        icmp_id, snmp_id, *os_ids = list(inventory.templates)
+        for n in range(hosts):
+            host_id = str(10001 + n)
+            ip = host_ip(n)
+            snmp = rng.random() < 0.2
+            inventory.hosts[host_id] = {
+                "hostid": host_id,
+                "host": ip,
+                "name": f"host-{n:06d}",
+                "status": "1" if rng.random() < 0.05 else "0",
+                "proxy_hostid": rng.choice(proxy_ids),
+                "_interfaces": [{
+                    "interfaceid": str(50001 + n), "type": "2" if snmp else "1", "main": "1", "useip": "1",
+                    "ip": ip, "dns": "", "port": "161" if snmp else "10050"
+                }],
+                "_groups": [rng.choice(group_ids)],
+                "_templates": [icmp_id, snmp_id if snmp else rng.choice(os_ids)],
+                "_tags": [
+                    {"tag": "APP_ID", "value": f"APP{rng.randrange(app_ids):04d}"},
+                    {"tag": "env", "value": rng.choice(["prod", "test"])},
+                ],
+            }
+            item_ids = []
+            for mount in rng.sample(DISK_MOUNTS, min(disks_per_host, len(DISK_MOUNTS))):
+                item_ids.append(inventory._add_item(host_id, f"vfs.fs.size[{mount},pused]", "0", rng))
+                item_ids.append(inventory._add_item(host_id, f"vfs.fs.size[{mount},total]", "3", rng))
+            for k in range(items_per_host):
+                item_ids.append(inventory._add_item(host_id, f"custom.metric[{k}]", "0", rng))
+            for k in range(triggers_per_host):
+                trigger_id = inventory.next_id()
+                inventory.triggers[trigger_id] = {
+                    "triggerid": trigger_id,
+                    "description": rng.choice(TRIGGER_DESCRIPTIONS),
+                    "status": "1" if rng.random() < 0.1 else "0",
+                    "priority": str(rng.randrange(6)),
+                    "_hostid": host_id,
+                    "_itemid": item_ids[k % len(item_ids)] if item_ids else None,
+                }
+                inventory.triggers_by_host[host_id].append(trigger_id)
+        return inventory
+
+    def _add_item(self, host_id: str, key: str, value_type: str, rng: random.Random) -> str:
+        item_id = self.next_id()
+        self.items[item_id] = {
+            "itemid": item_id, "hostid": host_id, "key_": key, "value_type": value_type,
+            "lastvalue": self.value_at(item_id, value_type, int(time.time())),
+            "lastclock": "0" if rng.random() < 0.02 else str(int(time.time()) // 60 * 60),
+        }
+        self.items_by_host[host_id].append(item_id)
+        return item_id
+
+    @staticmethod
+    def value_at(item_id: str, value_type: str, clock: int) -> str:
+        """(itemid, clock) 对应的确定性取值：浮点为 0-100 的百分比，整数为字节数"""
+        digest = hashlib.blake2b(f"{item_id}:{clock}".encode(), digest_size=4).digest()
+        number = int.from_bytes(digest, "big")
+        if str(value_type) == "3":
+            return str(100 * 1024 ** 3 + number % (400 * 1024 ** 3))
+        return f"{(number % 10000) / 100:.4f}"
+
+class SimulatedBackend:
+    """按 Inventory 实现项目用到的 Zabbix API 方法（写操作会修改清单，线程安全）"""
+    def __init__(self, inventory: Inventory, user: Optional[str] = None, password: Optional[str] = None):
+        self.inventory = inventory
+        self.user = user
+        self.password = password
+        self.tokens = set()
+        self.lock = threading.RLock()
+
+    def expire_sessions(self) -> None:
+        """使所有 token 失效（模拟会话过期，客户端应自动重新登录）"""
+        with self.lock:
+            self.tokens.clear()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """处理一个 JSON-RPC 请求对象，返回响应对象"""
+        method = request.get("method", "")
+        params = request.get("params") if request.get("params") is not None else {}
+        try:
+            if method not in ("user.login", "apiinfo.version") and request.get("auth") not in self.tokens:
+                raise RpcError(-32602, "Invalid params.", "Session terminated, re-login, please.")
+            handler = getattr(self, "m_" + method.replace(".", "_"), None)
+            if handler is None:
+                raise RpcError(-32601, "Method not found.", f'Incorrect API "{method}".')
+            with self.lock:
+                result = handler(params)
+            return {"jsonrpc": "2.0", "result": result, "id": request.get("id")}
+        except RpcError as e:
+            return {"jsonrpc": "2.0", "error": e.to_dict(), "id": request.get("id")}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"jsonrpc": "2.0", "error": _invalid_params(str(e)).to_dict(), "id": request.get("id")}
+
+    # --- 认证 ---------------------------------------------------------------
+    def m_user_login(self, params):
+        user = params.get("user", params.get("username"))
+        if self.user is not None and (user != self.user or params.get("password") != self.password):
+            raise RpcError(-32500, "Application error.", "Incorrect user name or password or account is temporarily blocked.")
+        token = hashlib.sha1(f"{user}:{time.time()}:{random.random()}".encode()).hexdigest()
+        self.tokens.add(token)
+        return token
+
+    def m_apiinfo_version(self, params):
+        return "5.0.0"
+
+    # --- 配置对象 -----------------------------------------------------------
+    def _simple_get(self, objects, id_field, params, id_param):
+        wanted = _ids(params.get(id_param))
+        match = _matcher(params)
+        rows = [
+            obj for obj in objects.values()
+            if (wanted is None or obj[id_field] in wanted) and match(obj)
+        ]
+        return [_project(obj, params.get("output")) for obj in _sort_limit(rows, params)]
+
+    def m_proxy_get(self, params):
+        return self._simple_get(self.inventory.proxies, "proxyid", params, "proxyids")
+
+    def m_hostgroup_get(self, params):
+        return self._simple_get(self.inventory.groups, "groupid", params, "groupids")
+
+    def m_template_get(self, params):
+        return self._simple_get(self.inventory.templates, "templateid", params, "templateids")
+
+    def m_host_get(self, params):
+        inventory = self.inventory
+        hostids = _ids(params.get("hostids"))
+        proxyids = _ids(params.get("proxyids"))
+        groupids = _ids(params.get("groupids"))
+        templateids = _ids(params.get("templateids"))
+        host_filter = dict(params.get("filter") or {})
+        # 本项目按模板名称过滤（filter.parentTemplates），同时接受模板 ID
+        parent_templates = host_filter.pop("parentTemplates", None)
+        if parent_templates is not None:
+            names = {str(v) for v in _as_list(parent_templates)}
+            templateids = (templateids or set()) | {
+                t["templateid"] for t in inventory.templates.values() if t["host"] in names or t["templateid"] in names
+            }
+        match = _matcher(dict(params, filter=host_filter))
+
+        candidates = (inventory.hosts[h] for h in hostids if h in inventory.hosts) if hostids is not None \
+            else inventory.hosts.values()
+        rows = [
+            host for host in candidates
+            if (proxyids is None or host["proxy_hostid"] in proxyids)
+            and (groupids is None or groupids.intersection(host["_groups"]))
+            and (templateids is None or templateids.intersection(host["_templates"]))
+            and match(host)
+        ]
+        result = []
+        for host in _sort_limit(rows, params):
+            obj = _project(host, params.get("output"))
+            if "selectInterfaces" in params:
+                obj["interfaces"] = [_project(i, params["selectInterfaces"]) for i in host["_interfaces"]]
+            if "selectGroups" in params:
+                obj["groups"] = [_project(inventory.groups[g], params["selectGroups"]) for g in host["_groups"]]
+            if "selectParentTemplates" in params:
+                obj["parentTemplates"] = [
+                    _project(inventory.templates[t], params["selectParentTemplates"]) for t in host["_templates"]
+                ]
+            if "selectTriggers" in params:
+                obj["triggers"] = [
+                    _project(inventory.triggers[t], params["selectTriggers"])
+                    for t in inventory.triggers_by_host.get(host["hostid"], [])
+                ]
+            if "selectTags" in params:
+                obj["tags"] = [_project(t, params["selectTags"]) for t in host["_tags"]]
+            result.append(obj)
+        return result
+
+    def m_host_create(self, params):
+        inventory = self.inventory
+        host_ids = []
+        names = {h["host"] for h in inventory.hosts.values()}
+        for spec in _as_list(params):
+            name = spec["host"]
+            if name in names:
+                raise _invalid_params(f'Host with the same name "{name}" already exists.')
+            names.add(name)
+        for spec in _as_list(params):
+            host_id = inventory.next_id()
+            inventory.hosts[host_id] = {
+                "hostid": host_id,
+                "host": spec["host"],
+                "name": spec.get("name") or spec["host"],
+                "status": str(spec.get("status", 0)),
+                "proxy_hostid": str(spec.get("proxy_hostid") or "0"),
+                "_interfaces": [
+                    {key: str(value) for key, value in dict(i, interfaceid=inventory.next_id()).items() if key != "details"}
+                    for i in spec.get("interfaces", [])
+                ],
+                "_groups": [str(g["groupid"]) for g in spec.get("groups", [])],
+                "_templates": [str(t["templateid"]) for t in spec.get("templates", [])],
+                "_tags": spec.get("tags", []),
+            }
+            host_ids.append(host_id)
+        return {"hostids": host_ids}
+
+    def _target_hosts(self, params) -> List[Dict[str, Any]]:
+        hosts = []
+        for ref in _as_list(params.get("hosts")):
+            host = self.inventory.hosts.get(str(ref["hostid"]))
+            if host is None:
+                raise _invalid_params("No permissions to referred object or it does not exist!")
+            hosts.append(host)
+        return hosts
+
+    def m_host_massadd(self, params):
+        hosts = self._target_hosts(params)
+        for host in hosts:
+            for group in _as_list(params.get("groups")):
+                if str(group["groupid"]) not in host["_groups"]:
+                    host["_groups"].append(str(group["groupid"]))
+            for template in _as_list(params.get("templates")):
+                if str(template["templateid"]) not in host["_templates"]:
+                    host["_templates"].append(str(template["templateid"]))
+        return {"hostids": [host["hostid"] for host in hosts]}
+
+    def m_host_massupdate(self, params):
+        hosts = self._target_hosts(params)
+        for host in hosts:
+            if "proxy_hostid" in params:
+                host["proxy_hostid"] = str(params["proxy_hostid"] or "0")
+            if "status" in params:
+                host["status"] = str(params["status"])
+            if "interfaces" in params:
+                host["_interfaces"] = [
+                    {key: str(value) for key, value in dict(i, interfaceid=self.inventory.next_id()).items() if key != "details"}
+                    for i in params["interfaces"]
+                ]
+        return {"hostids": [host["hostid"] for host in hosts]}
+
+    def m_hostinterface_create(self, params):
+        interface_ids = []
+        for spec in _as_list(params):
+            host = self._target_hosts({"hosts": [{"hostid": spec["hostid"]}]})[0]
+            interface = {key: str(value) for key, value in spec.items() if key not in ("details", "hostid")}
+            interface["interfaceid"] = self.inventory.next_id()
+            host["_interfaces"].append(interface)
+            interface_ids.append(interface["interfaceid"])
+        return {"interfaceids": interface_ids}
+
+    def m_hostinterface_update(self, params):
+        by_id = {i["interfaceid"]: i for host in self.inventory.hosts.values() for i in host["_interfaces"]}
+        specs = _as_list(params)
+        for spec in specs:
+            if str(spec.get("interfaceid")) not in by_id:
+                raise _invalid_params("No permissions to referred object or it does not exist!")
+        for spec in specs:
+            by_id[str(spec["interfaceid"])].update(
+                {key: str(value) for key, value in spec.items() if key not in ("details", "interfaceid")}
+            )
+        return {"interfaceids": [str(spec["interfaceid"]) for spec in specs]}
+
+    # --- 监控项、触发器、历史数据 -------------------------------------------
+    def m_item_get(self, params):
+        inventory = self.inventory
+        hostids = _ids(params.get("hostids"))
+        itemids = _ids(params.get("itemids"))
+        triggerids = _ids(params.get("triggerids"))
+        if triggerids is not None:
+            linked = {inventory.triggers[t]["_itemid"] for t in triggerids if t in inventory.triggers}
+            itemids = linked if itemids is None else itemids & linked
+        if itemids is not None:
+            candidates = [inventory.items[i] for i in itemids if i in inventory.items]
+        elif hostids is not None:
+            candidates = [inventory.items[i] for h in hostids for i in inventory.items_by_host.get(h, [])]
+        else:
+            candidates = list(inventory.items.values())
+        match = _matcher(params)
+        rows = [
+            item for item in candidates
+            if (hostids is None or item["hostid"] in hostids) and match(item)
+        ]
+        return [_project(item, params.get("output")) for item in _sort_limit(rows, params)]
+
+    def m_trigger_get(self, params):
+        inventory = self.inventory
+        hostids = _ids(params.get("hostids"))
+        triggerids = _ids(params.get("triggerids"))
+        if triggerids is not None:
+            candidates = [inventory.triggers[t] for t in triggerids if t in inventory.triggers]
+        elif hostids is not None:
+            candidates = [inventory.triggers[t] for h in hostids for t in inventory.triggers_by_host.get(h, [])]
+        else:
+            candidates = list(inventory.triggers.values())
+        match = _matcher(params)
+        rows = [
+            trigger for trigger in candidates
+            if (hostids is None or trigger["_hostid"] in hostids) and match(trigger)
+        ]
+        result = []
+        for trigger in _sort_limit(rows, params):
+            obj = _project(trigger, params.get("output"))
+            if "selectItems" in params:
+                item = inventory.items.get(trigger["_itemid"])
+                obj["items"] = [_project(item, params["selectItems"])] if item else []
+            if "selectHosts" in params:
+                obj["hosts"] = [_project(inventory.hosts[trigger["_hostid"]], params["selectHosts"])]
+            result.append(obj)
+        return result
+
+    def m_trigger_update(self, params):
+        updated = []
+        for spec in _as_list(params):
+            trigger = self.inventory.triggers.get(str(spec["triggerid"]))
+            if trigger is None:
+                raise _invalid_params("No permissions to referred object or it does not exist!")
+            if "status" in spec:
+                trigger["status"] = str(spec["status"])
+            updated.append(trigger["triggerid"])
+        return {"triggerids": updated}
+
+    def _series(self, params, step):
+        """按 (监控项, 时间点) 生成数据点，step 为时间点间隔"""
+        inventory = self.inventory
+        itemids = [i for i in _as_list(params.get("itemids")) if str(i) in inventory.items]
+        time_from = int(params.get("time_from", 0))
+        time_till = int(params.get("time_till", time.time()))
+        if time_till - time_from > 366 * 86400:
+            raise _invalid_params("Time range too large for the simulated server.")
+        first = -(-time_from // step) * step
+        for item_id in itemids:
+            item = inventory.items[str(item_id)]
+            for clock in range(first, time_till + 1, step):
+                yield item, clock
+
+    def m_history_get(self, params):
+        value_type = str(params.get("history", "3"))
+        rows = [
+            {"itemid": item["itemid"], "clock": str(clock), "value": Inventory.value_at(item["itemid"], value_type, clock), "ns": "0"}
+            for item, clock in self._series(params, self.inventory.history_interval)
+            if item["value_type"] == value_type
+        ]
+        return [_project(row, params.get("output")) for row in _sort_limit(rows, params)]
+
+    def m_trend_get(self, params):
+        rows = []
+        for item, clock in self._series(params, 3600):
+            value = Inventory.value_at(item["itemid"], item["value_type"], clock)
+            rows.append({
+                "itemid": item["itemid"], "clock": str(clock), "num": "12",
+                "value_min": value, "value_avg": value, "value_max": value
+            })
+        return [_project(row, params.get("output")) for row in _sort_limit(rows, params)]
+
+    # --- 维护 ---------------------------------------------------------------
+    def m_maintenance_get(self, params):
+        inventory = self.inventory
+        wanted = _ids(params.get("maintenanceids"))
+        match = _matcher(params)
+        rows = [
+            m for m in inventory.maintenances.values()
+            if (wanted is None or m["maintenanceid"] in wanted) and match(m)
+        ]
+        result = []
+        for maintenance in _sort_limit(rows, params):
+            obj = _project(maintenance, params.get("output"))
+            if "selectHosts" in params:
+                obj["hosts"] = [_project(inventory.hosts[h], params["selectHosts"]) for h in maintenance["_hostids"]
+                                if h in inventory.hosts]
+            if "selectTimeperiods" in params:
+                obj["timeperiods"] = [_project(p, params["selectTimeperiods"]) for p in maintenance["_timeperiods"]]
+            result.append(obj)
+        return result
+
+    def _maintenance_fields(self, maintenance, spec):
+        for key in ("name", "active_since", "active_till", "maintenance_type", "description"):
+            if key in spec:
+                maintenance[key] = str(spec[key])
+        if "hostids" in spec:
+            maintenance["_hostids"] = [str(h) for h in spec["hostids"]]
+        if "hosts" in spec:
+            maintenance["_hostids"] = [str(h["hostid"]) for h in spec["hosts"]]
+        if "timeperiods" in spec:
+            maintenance["_timeperiods"] = [
+                {key: str(value) for key, value in period.items()} for period in spec["timeperiods"]
+            ]
+
+    def m_maintenance_create(self, params):
+        names = {m["name"] for m in self.inventory.maintenances.values()}
+        ids = []
+        for spec in _as_list(params):
+            if spec["name"] in names:
+                raise _invalid_params(f'Maintenance "{spec["name"]}" already exists.')
+            names.add(spec["name"])
+        for spec in _as_list(params):
+            maintenance_id = self.inventory.next_id()
+            maintenance = {"maintenanceid": maintenance_id, "maintenance_type": "0", "description": "",
+                           "_hostids": [], "_timeperiods": []}
+            self._maintenance_fields(maintenance, spec)
+            self.inventory.maintenances[maintenance_id] = maintenance
+            ids.append(maintenance_id)
+        return {"maintenanceids": ids}
+
+    def m_maintenance_update(self, params):
+        ids = []
+        for spec in _as_list(params):
+            maintenance = self.inventory.maintenances.get(str(spec["maintenanceid"]))
+            if maintenance is None:
+                raise _invalid_params("No permissions to referred object or it does not exist!")
+            self._maintenance_fields(maintenance, spec)
+            ids.append(maintenance["maintenanceid"])
+        return {"maintenanceids": ids}
+
+    def m_maintenance_delete(self, params):
+        ids = [str(i) for i in _as_list(params)]
+        for maintenance_id in ids:
+            self.inventory.maintenances.pop(maintenance_id, None)
+        return {"maintenanceids": ids}
+
+def _fixture_key(method: str, params: Any) -> str:
+    return json.dumps([method, params], sort_keys=True, ensure_ascii=False)
+
+class RecordingBackend:
+    """
+    录制模式：把请求原样转发到真实 Zabbix，并把 (method, params, 响应) 追加写入 JSONL 夹具。
+    夹具中不保存 auth，user.login 的参数会被脱敏。
+    """
+    def __init__(self, upstream_url: str, fixture_path: str, timeout: int = 60):
+        import requests
+        self.url = upstream_url.rstrip("/") + "/api_jsonrpc.php"
+        self.http = requests.Session()
+        self.timeout = timeout
+        self.fixture = open(fixture_path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def handle_raw(self, body: Any) -> Any:
+        response = self.http.post(self.url, json=body, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        requests_ = body if isinstance(body, list) else [body]
+        responses = {item.get("id"): item for item in (data if isinstance(data, list) else [data])}
+        with self.lock:
+            for request in requests_:
+                reply = responses.get(request.get("id"), {})
+                params = request.get("params")
+                if request.get("method") == "user.login":
+                    params = {}
+                record = {"method": request.get("method"), "params": params}
+                record.update({key: reply[key] for key in ("result", "error") if key in reply})
+                self.fixture.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.fixture.flush()
+        return data
+
+class ReplayBackend:
+    """
+    回放模式：按 (method, params) 查找夹具中的响应。同一调用录制了多次时按录制顺序依次返回，
+    用完后重复最后一次；user.login 总是成功，未录制的调用返回 Invalid params 错误。
+    """
+    def __init__(self, fixture_path: str):
+        self.responses: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.positions: Dict[str, int] = defaultdict(int)
+        self.lock = threading.Lock()
+        with open(fixture_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    reply = {key: record[key] for key in ("result", "error") if key in record}
+                    self.responses[_fixture_key(record["method"], record.get("params"))].append(reply)
+        logger.info(f"已加载 {sum(len(v) for v in self.responses.values())} 条录制响应")
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method", "")
+        if method == "user.login":
+            return {"jsonrpc": "2.0", "result": "replay-token", "id": request.get("id")}
+        key = _fixture_key(method, request.get("params"))
+        with self.lock:
+            replies = self.responses.get(key)
+            if not replies:
+                error = _invalid_params(f"No recorded response for {method}")
+                return {"jsonrpc": "2.0", "error": error.to_dict(), "id": request.get("id")}
+            position = self.positions[key]
+            self.positions[key] = min(position + 1, len(replies) - 1)
+            reply = replies[position]
+        return dict(reply, jsonrpc="2.0", id=request.get("id"))
+
+class FakeZabbixServer:
+    """
+    在后台线程运行的 JSON-RPC HTTP 服务器（路径 /api_jsonrpc.php，支持批量请求）。
+
+    Args:
+        backend: SimulatedBackend / ReplayBackend（提供 handle）或 RecordingBackend（提供 handle_raw）
+        latency: 每个 HTTP 请求附加的固定延迟（秒）
+        jitter: 在 latency 基础上附加的 [0, jitter] 随机延迟（秒）
+        method_latency: {方法名: 每次调用额外的延迟（秒）}，批量请求按其中每个调用累加
+        gzip_min_bytes: 大于 0 时，客户端声明接受 gzip 且响应不小于该字节数时压缩响应
+        decompress_requests: 是否按 Content-Encoding 解压请求体（False 模拟未配置请求解压的前端）
+
+    示例:
+        with FakeZabbixServer(SimulatedBackend(Inventory.generate(hosts=1000)), latency=0.02) as server:
+            os.environ["ZABBIX_URL"] = server.url
+    """
+    def __init__(self, backend, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, method_latency: Optional[Dict[str, float]] = None,
+                 gzip_min_bytes: int = 0, decompress_requests: bool = True):
+        self.backend = backend
+        self.gzip_min_bytes = gzip_min_bytes
+        self.decompress_requests = decompress_requests
+        self.latency = latency
+        self.jitter = jitter
+        self.method_latency = method_latency or {}
+        self.request_count = 0
+        self.call_count = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _delay(self, calls: List[Dict[str, Any]]) -> float:
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        return delay + sum(self.method_latency.get(call.get("method"), 0.0) for call in calls)
+
+    def dispatch(self, body) -> Any:
+        calls = body if isinstance(body, list) else [body]
+        self.request_count += 1
+        self.call_count += len(calls)
+        delay = self._delay(calls)
+        if delay > 0:
+            time.sleep(delay)
+        if hasattr(self.backend, "handle_raw"):
+            return self.backend.handle_raw(body)
+        if isinstance(body, list):
+            return [self.backend.handle(call) for call in body]
+        return self.backend.handle(body)
+
+    def _handler_class(self):
+        server = self
+        codec = get_codec()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头和响应体分两次写出，不关闭 Nagle 时长连接上每个响应会多等一个延迟 ACK（约 40ms）
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_POST(self):
+                try:
+                    raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                    if server.decompress_requests:
+                        raw = decode_body(raw, self.headers.get("Content-Encoding"))
+                    status, reply = 200, server.dispatch(codec.loads(raw))
+                except (ValueError, OSError, zlib.error):
+                    status, reply = 200, {"jsonrpc": "2.0", "error": RpcError(-32700, "Parse error.", "Invalid JSON.").to_dict(), "id": None}
+                except Exception as e:
+                    logger.error(f"请求处理失败: {e}")
+                    status, reply = 502, None
+                data = codec.dumps(reply) if reply is not None else b""
+                compress = server.gzip_min_bytes and len(data) >= server.gzip_min_bytes \
+                    and "gzip" in self.headers.get("Accept-Encoding", "")
+                if compress:
+                    data = gzip.compress(data, compresslevel=1)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if compress:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self) -> "FakeZabbixServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-zabbix", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 Zabbix JSON-RPC 替身服务器")
+    parser.add_argument("mode", choices=["simulate", "record", "replay"], help="运行模式")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认：127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8080, help="监听端口（默认：8080）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="每个请求附加的随机延迟上限（秒）")
+    parser.add_argument("--gzip", type=int, default=0, help="压缩不小于该字节数的响应（客户端需声明接受 gzip，默认：0 不压缩）")
+    parser.add_argument("--hosts", type=int, default=1000, help="simulate：主机数（默认：1000）")
+    parser.add_argument("--proxies", type=int, default=5, help="simulate：代理数（默认：5）")
+    parser.add_argument("--groups", type=int, default=10, help="simulate：主机组数（默认：10）")
+    parser.add_argument("--app-ids", type=int, default=200, help="simulate：不同 APP_ID 标签值的数量（默认：200）")
+    parser.add_argument("--disks-per-host", type=int, default=2, help="simulate：每台主机的磁盘挂载点数")
+    parser.add_argument("--triggers-per-host", type=int, default=4, help="simulate：每台主机的触发器数")
+    parser.add_argument("--items-per-host", type=int, default=2, help="simulate：每台主机的普通监控项数")
+    parser.add_argument("--history-interval", type=int, default=300, help="simulate：历史数据间隔（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="simulate：随机种子")
+    parser.add_argument("--upstream", help="record：真实 Zabbix 地址")
+    parser.add_argument("--fixtures", help="record/replay：夹具文件（JSONL）")
+    args = parser.parse_args()
+
+    if args.mode == "simulate":
+        backend = SimulatedBackend(Inventory.generate(
+            hosts=args.hosts, proxies=args.proxies, groups=args.groups, triggers_per_host=args.triggers_per_host,
+            items_per_host=args.items_per_host, disks_per_host=args.disks_per_host, app_ids=args.app_ids,
+            history_interval=args.history_interval, seed=args.seed
+        ))
+    elif not args.fixtures:
+        parser.error(f"{args.mode} 模式需要 --fixtures")
+    elif args.mode == "record":
+        if not args.upstream:
+            parser.error("record 模式需要 --upstream")
+        backend = RecordingBackend(args.upstream, args.fixtures)
+    else:
+        backend = ReplayBackend(args.fixtures)
+
+    server = FakeZabbixServer(backend, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                              gzip_min_bytes=args.gzip)
+    logger.info(f"{args.mode} 模式已启动: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
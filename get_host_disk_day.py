@@ -1,10 +1,9 @@
 import pandas as pd
-import re
 from datetime import datetime
 import logging
-from tqdm import tqdm
 from zabbix_api import ZabbixAPI, ZabbixAPIException
 from host_management import ExportHostManagement
+from api_metrics import get_metrics
 
 # 设置全局日志格式和级别（INFO 及以上）
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,7 +21,7 @@ class ExportDiskUsed:
             logging.error(f"Zabbix API 登录失败: {str(e)}")
             raise
 
-    def get_daily_disk_peak(self, start_date_str, end_date_str, output_file):
+    def get_daily_disk_peak(self, start_date_str, end_date_str, output_file, use_trends=None):
         """
         获取每日磁盘使用峰值报告
 
@@ -30,6 +29,8 @@ class ExportDiskUsed:
             start_date_str: 开始日期 (格式: YYYYMMDD)
             end_date_str: 结束日期 (格式: YYYYMMDD)
             output_file: 输出 Excel 文件路径
+            use_trends: 是否从 trend.get 的 value_max 计算每日峰值；默认多天范围使用趋势数据，
+                        单天范围使用历史数据
         """
         try:
             start_date = datetime.strptime(start_date_str, "%Y%m%d")
@@ -39,6 +40,8 @@ class ExportDiskUsed:
         except ValueError as e:
             logging.error(f"日期格式错误: {e}")
             return False
+        if use_trends is None:
+            use_trends = start_date_str != end_date_str
 
         templates = [
             "Envision_Temp_ZBX_Windows_Baseline",
@@ -49,121 +52,126 @@ class ExportDiskUsed:
         # 通过模板查找所有主机
         host_map = self.get_all_hosts_by_templates(templates)
         logging.info(f"根据模板获取到 {len(host_map)} 台主机，开始获取磁盘监控项...")
+        if not host_map:
+            logging.warning("未找到符合条件的监控数据")
+            return False
 
-        # 遍历每个主机，通过 hostid 获取监控项数据
-        for host_id, host_info in tqdm(host_map.items(), desc="获取监控项"):
-            try:
-                params = {
-                    "hostids": host_id,
-                    "search": {"key_": "vfs.fs.size"},
-                    "output": ["itemid", "key_", "name"]
-                }
-                items_response = self.zabbix_api.call_api("item.get", params)
-                items = items_response.get("result", [])
-                for item in items:
-                    key_val = item.get('key_')
-                    match = re.match(r'vfs\.fs\.size\[(.*?),(pused|total)\]', key_val)
-                    if match:
-                        mount_point, metric = match.groups()
-                        if metric == "pused":
-                            host_info['items'][mount_point] = item['itemid']
-                        elif metric == "total":
-                            host_info['total'][mount_point] = item['itemid']
-            except Exception as e:
-                logging.error(f"获取主机 {host_info['ip']} 监控项失败: {e}")
-
-        results = []
-        total_items = sum(len(h['items']) for h in host_map.values())
-        logging.info(f"开始获取历史数据，共 {total_items} 项监控项...")
+        try:
+            items = self.get_disk_items(list(host_map.keys()))
+            pused_items = items[items["metric"] == "pused"]
+            logging.info(f"开始获取{'趋势' if use_trends else '历史'}数据，共 {len(pused_items)} 项监控项...")
+            # 一次分组计算所有监控项的每日最大使用率
+            if use_trends:
+                daily_max = self._daily_max(self.get_trend_max(pused_items["itemid"].tolist(), start_ts, end_ts))
+            else:
+                daily_max = self.get_history_daily_max(pused_items, start_ts, end_ts)
+        except ZabbixAPIException as e:
+            logging.error(f"获取磁盘监控数据失败: {e}")
+            return False
 
-        with tqdm(total=total_items, desc="处理进度") as pbar:
-            for host_id, host_info in host_map.items():
-                for mount_point, item_id in host_info['items'].items():
-                    pbar.update(1)
-                    pbar.set_postfix_str(f"当前主机: {host_info['ip']}")
-                    try:
-                        # 获取监控项历史数据（磁盘使用率）
-                        params_history = {
-                            "itemids": item_id,
-                            "time_from": start_ts,
-                            "time_till": end_ts,
-                            "output": ['clock', 'value'],
-                            "history": 0,
-                            "sortfield": 'clock',
-                            "sortorder": 'ASC'
-                        }
-                        history_response = self.zabbix_api.call_api("history.get", params_history)
-                        history = history_response.get("result", [])
-                        
-                        total_size = None
-                        # 如果存在对应的磁盘总大小监控项，获取最新记录（假定历史类型为 3）
-                        if mount_point in host_info['total']:
-                            params_total = {
-                                "itemids": host_info['total'][mount_point],
-                                "time_from": start_ts,
-                                "time_till": end_ts,
-                                "output": ['clock', 'value'],
-                                "history": 3,
-                                "sortfield": 'clock',
-                                "sortorder": 'DESC',
-                                "limit": 1
-                            }
-                            total_history_response = self.zabbix_api.call_api("history.get", params_total)
-                            total_history = total_history_response.get("result", [])
-                            if total_history:
-                                total_size = round(float(total_history[0]['value']) / (1024 ** 3), 2)
-                    except Exception as e:
-                        logging.error(f"获取 {mount_point} 历史数据失败: {e}")
-                        continue
-                    
-                    if not history:
-                        continue
-                    
-                    # 处理历史数据，计算每日最大使用率
-                    df = pd.DataFrame(history)
-                    df['clock'] = pd.to_numeric(df['clock'])
-                    df['value'] = pd.to_numeric(df['value'])
-                    df['date'] = pd.to_datetime(df['clock'], unit='s').dt.strftime('%Y%m%d')
-                    daily_max = df.groupby('date')['value'].max().reset_index()
-                    
-                    for _, row in daily_max.iterrows():
-                        results.append({
-                            "IP地址": host_info['ip'],
-                            "日期": row['date'],
-                            "目录名称": mount_point,
-                            "磁盘使用率峰值(%)": round(row['value'], 2),
-                            "目录磁盘大小(GB)": total_size if total_size is not None else "N/A"
-                        })
-        
-        if results:
-            try:
-                df_result = pd.DataFrame(results).sort_values(by=['IP地址', '日期', '目录名称'])
-                df_result.drop_duplicates(inplace=True)
-                df_result.to_excel(output_file, index=False)
-                logging.info(f"报告生成成功，共 {len(df_result)} 条记录，保存至: {output_file}")
-                return True
-            except Exception as e:
-                logging.error(f"生成报告失败: {e}")
-                return False
-        else:
+        if daily_max.empty:
             logging.warning("未找到符合条件的监控数据")
             return False
 
+        # 磁盘总大小取 total 监控项的最新值（GB），按 (主机, 挂载点) 关联到使用率监控项
+        totals = items[items["metric"] == "total"][["hostid", "mount_point", "lastvalue"]].copy()
+        totals["total_size"] = (pd.to_numeric(totals["lastvalue"], errors="coerce") / (1024 ** 3)).round(2)
+        report = (
+            daily_max
+            .merge(pused_items[["itemid", "hostid", "mount_point"]], on="itemid")
+            .merge(totals[["hostid", "mount_point", "total_size"]], on=["hostid", "mount_point"], how="left")
+        )
+        report["ip"] = report["hostid"].map({host_id: info["ip"] for host_id, info in host_map.items()})
+
+        try:
+            df_result = pd.DataFrame({
+                "IP地址": report["ip"],
+                "日期": report["date"],
+                "目录名称": report["mount_point"],
+                "磁盘使用率峰值(%)": report["value"].round(2),
+                "目录磁盘大小(GB)": report["total_size"].astype(object).where(report["total_size"].notna(), "N/A")
+            }).sort_values(by=['IP地址', '日期', '目录名称'])
+            df_result.drop_duplicates(inplace=True)
+            df_result.to_excel(output_file, index=False)
+            logging.info(f"报告生成成功，共 {len(df_result)} 条记录，保存至: {output_file}")
+            return True
+        except Exception as e:
+            logging.error(f"生成报告失败: {e}")
+            return False
+
+    def get_disk_items(self, host_ids: list) -> pd.DataFrame:
+        """
+        一次 item.get 获取所有主机的 vfs.fs.size 监控项（含 total 的最新值），
+        返回包含 itemid、hostid、value_type、lastvalue、mount_point、metric 列的 DataFrame
+        """
+        response = self.zabbix_api.call_api("item.get", {
+            "hostids": host_ids,
+            "search": {"key_": "vfs.fs.size"},
+            "output": ["itemid", "hostid", "key_", "value_type", "lastvalue"]
+        })
+        items = pd.DataFrame(
+            response.get("result", []),
+            columns=["itemid", "hostid", "key_", "value_type", "lastvalue"]
+        )
+        parsed = items["key_"].str.extract(r'vfs\.fs\.size\[(.*?),(pused|total)\]')
+        items["mount_point"], items["metric"] = parsed[0], parsed[1]
+        return items.dropna(subset=["metric"])
+
+    def get_trend_max(self, item_ids: list, start_ts: int, end_ts: int, chunk_size: int = 500) -> pd.DataFrame:
+        """从 trend.get 获取每小时最大值，返回 itemid、clock、value 列的 DataFrame"""
+        frames = []
+        for start in range(0, len(item_ids), chunk_size):
+            response = self.zabbix_api.call_api("trend.get", {
+                "itemids": item_ids[start:start + chunk_size],
+                "time_from": start_ts,
+                "time_till": end_ts,
+                "output": ["itemid", "clock", "value_max"]
+            })
+            frames.append(pd.DataFrame(response.get("result", []), columns=["itemid", "clock", "value_max"]))
+        trends = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["itemid", "clock", "value_max"])
+        return pd.DataFrame({
+            "itemid": trends["itemid"],
+            "clock": pd.to_numeric(trends["clock"]),
+            "value": pd.to_numeric(trends["value_max"])
+        })
+
+    def get_history_daily_max(self, items: pd.DataFrame, start_ts: int, end_ts: int) -> pd.DataFrame:
+        """
+        按值类型分组，通过分片历史迭代器获取数据，逐片聚合每日最大值，
+        内存占用与时间范围长度无关；返回 itemid、date、value 列的 DataFrame
+        """
+        partials = []
+        for value_type, group in items.groupby("value_type"):
+            for item_ids, clocks, values in self.zabbix_api.iter_history(
+                group["itemid"].tolist(), start_ts, end_ts,
+                history=int(value_type), slice_seconds=6 * 3600, page_limit=100000, as_arrays=True
+            ):
+                partials.append(self._daily_max(pd.DataFrame({
+                    "itemid": item_ids.astype(str),
+                    "clock": clocks,
+                    "value": values.astype(float)
+                })))
+        if not partials:
+            return pd.DataFrame(columns=["itemid", "date", "value"])
+        return pd.concat(partials, ignore_index=True).groupby(['itemid', 'date'], as_index=False)['value'].max()
+
+    @staticmethod
+    def _daily_max(values: pd.DataFrame) -> pd.DataFrame:
+        """将 itemid、clock、value 明细按 (itemid, 日期) 聚合为最大值"""
+        values = values.assign(date=pd.to_datetime(values['clock'], unit='s').dt.strftime('%Y%m%d'))
+        return values.groupby(['itemid', 'date'], as_index=False)['value'].max()
+
     def get_all_hosts_by_templates(self, templates: list) -> dict:
         """
         通过模板名称获取所有主机信息，返回一个字典，
-        键为 hostid，值为包含 IP 地址、items 和 total 字段的字典
+        键为 hostid，值为包含 IP 地址字段的字典
         """
         host_map = {}
         try:
             ehm = ExportHostManagement()
             hosts = ehm.get_host_map_by_templates(templates)
             for host_id, host_info in hosts.items():
-                host_map[host_id] = {
-                    'ip': host_info.get("IP地址", "N/A"),
-                    'items': {},
-                    'total': {}
-                }
+                host_map[host_id] = {'ip': host_info.ip}
         except Exception as e:
             logging.error(f"获取模板主机失败: {e}")
         return host_map
@@ -179,3 +187,4 @@ if __name__ == "__main__":
         print("操作成功完成" if success else "操作未完成，请检查日志")
     except Exception as e:
         logging.error(f"程序初始化失败: {e}")
+    print(get_metrics().format_summary())
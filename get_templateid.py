@@ -1,26 +1,23 @@
 import json
 import traceback
 from zabbix_api import ZabbixAPI
+from config_cache import get_config_cache
 
 class Templateid:
     def __init__(self):
-        self.zabbix_api = ZabbixAPI()
+        self.zabbix_api = ZabbixAPI(lazy_login=True)
+        self.cache = get_config_cache()
 
     def get_template_info(self, template_name):
         """
-        根据模板名称查询模板信息
+        根据模板名称查询模板信息（优先读取本地缓存）
         """
         try:
-            response = self.zabbix_api.call_api('template.get', {
-                "filter": {"host": template_name},
-                "output": ["templateid", "name"]
-            })
-
-            templates = response.get("result", [])
-            if templates:
+            template = self.cache.lookup(self.zabbix_api, "template", template_name)
+            if template:
                 template_info = {
-                    "template_id": templates[0]["templateid"],
-                    "name": templates[0]["name"]
+                    "template_id": template["templateid"],
+                    "name": template["name"]
                 }
                 return json.dumps(template_info, indent=2)
             else:
@@ -1,10 +1,15 @@
 import json
+import logging
 import pandas as pd
 import requests
-from zabbix_api import ZabbixAPI
+from zabbix_api import ZabbixAPI, ZabbixAPIException
 from hostgroup import Hostgroup
 from template import Template
 from proxy import Proxy
+from config_cache import get_config_cache
+from api_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
 
 # 接口类型常量
 INTERFACE_AGENT = 1
@@ -30,10 +35,25 @@ class HostManagement:
     def __init__(self):
         """初始化 Zabbix API 连接"""
         self.zabbix_api = ZabbixAPI()
-        self.auth = self.zabbix_api.login()  # 确保 auth 被存储
+        self.auth = self.zabbix_api.auth_token  # 复用共享会话的 token，无需再次登录
 
     def create_host(self, hostname, ip, group_ids, template_ids, host_type, proxy_id=None):
         """创建 Zabbix 主机"""
+        params = self.build_host_params(hostname, ip, group_ids, template_ids, host_type, proxy_id)
+        response = self.zabbix_api.call_api("host.create", params)
+        get_config_cache().invalidate("host", ip)  # 主机已变更，失效本地缓存
+        return response
+
+    def create_hosts(self, hosts_params):
+        """一次 host.create 调用创建多个主机，返回的 hostids 与 hosts_params 顺序一致"""
+        response = self.zabbix_api.call_api("host.create", hosts_params)
+        cache = get_config_cache()
+        for params in hosts_params:
+            cache.invalidate("host", params["host"])  # 主机已变更，失效本地缓存
+        return response
+
+    def build_host_params(self, hostname, ip, group_ids, template_ids, host_type, proxy_id=None):
+        """构造 host.create 参数"""
         interface = {
             "type": INTERFACE_AGENT if host_type == "agent" else INTERFACE_SNMP,
             "main": 1,
@@ -60,7 +80,20 @@ class HostManagement:
         if proxy_id:
             params["proxy_hostid"] = proxy_id  # 绑定代理 ID
 
-        return self.zabbix_api.call_api("host.create", params)
+        return params
+
+    def get_hosts_by_names(self, hostnames):
+        """一次 host.get 按主机名称（即 IP）查询已存在的主机及其接口、主机组、模板和代理"""
+        if not hostnames:
+            return []
+        params = {
+            "output": ["hostid", "host", "name", "proxy_hostid"],
+            "filter": {"host": list(hostnames)},
+            "selectInterfaces": ["interfaceid", "type", "main", "ip", "port"],
+            "selectGroups": ["groupid"],
+            "selectParentTemplates": ["templateid"]
+        }
+        return self.zabbix_api.call_api("host.get", params).get("result", [])
 
     def get_host_info(self, host_ids):
         """获取主机信息"""
@@ -79,11 +112,41 @@ def read_host_info_from_excel(file_path):
         missing = [col for col in required_cols if col not in df.columns]
         if missing:
             raise ValueError(f"缺少必要列: {', '.join(missing)}")
-        return df.where(pd.notnull(df), None)  # 转换 NaN 为 None
+        return df.astype(object).where(pd.notnull(df), None)  # 转换 NaN 为 None
     except Exception as e:
         raise RuntimeError(f"读取 Excel 失败: {e}")
 
 
+def resolve_config_ids(group_name, snmp_template, agent_template):
+    """解析主机组 ID 和两个模板 ID，返回 (group_id, snmp_tid, agent_tid)"""
+    hostgroup = Hostgroup()
+    group_info = json.loads(hostgroup.get_hostgroup_info(group_name))
+    group_id = group_info["group_id"]
+
+    template = Template()
+    snmp_info = json.loads(template.get_template_info(snmp_template))
+    snmp_tid = snmp_info["template_id"]
+    agent_info = json.loads(template.get_template_info(agent_template))
+    agent_tid = agent_info["template_id"]
+    return group_id, snmp_tid, agent_tid
+
+
+def parse_host_row(row):
+    """解析并校验 Excel 中的一行，返回 (host_ip, sys_type, proxy_name, visible_name)"""
+    host_ip = row.get(CONFIG["excel_columns"]["host_ip"], "未知主机")
+    sys_type_raw = row[CONFIG["excel_columns"]["system_type"]]
+    sys_type = sys_type_raw.strip().lower() if sys_type_raw else None
+    if sys_type not in ["snmp", "agent"]:
+        raise ValueError(f"无效监控类型: {sys_type_raw}")
+
+    proxy_name = row.get(CONFIG["excel_columns"]["proxy_name"], None)
+
+    brand = row.get(CONFIG["excel_columns"]["brand"], "Unknown") or "Unknown"
+    model = row.get(CONFIG["excel_columns"]["model"], "") or ""
+    visible_name = f"{host_ip}_{brand}_{model}" if model else f"{host_ip}_{brand}"
+    return host_ip, sys_type, proxy_name, visible_name
+
+
 def create_hosts(file_path, group_name, snmp_template, agent_template):
     """批量创建主机"""
     try:
@@ -92,17 +155,7 @@ def create_hosts(file_path, group_name, snmp_template, agent_template):
         return [{"status": "error", "message": f"API 登录失败: {e}"}]
 
     try:
-        # 获取主机组 ID
-        hostgroup = Hostgroup()
-        group_info = json.loads(hostgroup.get_hostgroup_info(group_name))
-        group_id = group_info["group_id"]
-
-        # 获取模板 ID
-        template = Template()
-        snmp_info = json.loads(template.get_template_info(snmp_template))
-        snmp_tid = snmp_info["template_id"]
-        agent_info = json.loads(template.get_template_info(agent_template))
-        agent_tid = agent_info["template_id"]
+        group_id, snmp_tid, agent_tid = resolve_config_ids(group_name, snmp_template, agent_template)
     except Exception as e:
         return [{"status": "error", "message": f"配置验证失败: {e}"}]
 
@@ -111,30 +164,21 @@ def create_hosts(file_path, group_name, snmp_template, agent_template):
     except Exception as e:
         return [{"status": "error", "message": str(e)}]
 
+    proxy = Proxy()
     results = []
     for index, row in df.iterrows():
         host_ip = row.get(CONFIG["excel_columns"]["host_ip"], "未知主机")
         try:
-            sys_type_raw = row[CONFIG["excel_columns"]["system_type"]]
-            sys_type = sys_type_raw.strip().lower() if sys_type_raw else None
-            if sys_type not in ["snmp", "agent"]:
-                raise ValueError(f"无效监控类型: {sys_type_raw}")
-
+            host_ip, sys_type, proxy_name, visible_name = parse_host_row(row)
             template_id = snmp_tid if sys_type == "snmp" else agent_tid
 
-            proxy_name = row.get(CONFIG["excel_columns"]["proxy_name"], None)
             proxy_id = None
             if proxy_name:
-                proxy = Proxy()
-                proxy_info = json.loads(proxy.get_proxy_info(proxy_name))
+                proxy_info = proxy.get_proxy_info(proxy_name)
                 if "proxy_id" not in proxy_info:
                     raise ValueError(f"代理 {proxy_name} 不存在")
                 proxy_id = proxy_info["proxy_id"]
 
-            brand = row.get(CONFIG["excel_columns"]["brand"], "Unknown") or "Unknown"
-            model = row.get(CONFIG["excel_columns"]["model"], "") or ""
-            visible_name = f"{host_ip}_{brand}_{model}" if model else f"{host_ip}_{brand}"
-
             resp = host_management.create_host(
                 hostname=visible_name,
                 ip=host_ip,
@@ -155,12 +199,203 @@ def create_hosts(file_path, group_name, snmp_template, agent_template):
     return results
 
 
+def plan_interface_change(host, interface):
+    """
+    比对已有主机的接口与期望接口，返回 (方法, 参数)，无需变更时返回 None。
+
+    只修改一个接口的 ip/port/type（hostinterface.update），主机的其它接口保持不变：
+    优先修改同类型的主接口，没有时修改第一个主接口（类型变更）；主机没有接口时新建（hostinterface.create）。
+    不使用 host.massupdate 的 interfaces，它会替换主机的全部接口，接口上关联了监控项时还会失败。
+    """
+    interfaces = host.get("interfaces", [])
+    main_interfaces = [i for i in interfaces if str(i.get("main")) == "1"]
+    current = next((i for i in main_interfaces if str(i.get("type")) == str(interface["type"])), None)
+    if current is not None and current.get("ip") == interface["ip"] and str(current.get("port")) == str(interface["port"]):
+        return None
+    current = current or next(iter(main_interfaces), None)
+    if current is None:
+        return "hostinterface.create", dict(interface, hostid=host["hostid"])
+    update = {"interfaceid": current["interfaceid"], "ip": interface["ip"], "port": interface["port"]}
+    if str(current.get("type")) != str(interface["type"]):
+        update["type"] = interface["type"]
+        if "details" in interface:
+            update["details"] = interface["details"]  # 改为 SNMP 接口时必须提供 SNMP 参数
+    return "hostinterface.update", update
+
+
+def sync_existing_hosts(host_management, pending, results):
+    """
+    幂等更新：一次 host.get 查出表中已存在的主机，与期望配置比对后，
+    只对有差异的主机调用 host.massadd（补充主机组/模板）、host.massupdate（代理）
+    和 hostinterface.update / hostinterface.create（接口，见 plan_interface_change）。
+
+    Args:
+        pending: [(行下标, host_ip, host.create 参数)]
+        results: 以行下标为键的结果字典，已存在主机的处理结果写入其中
+
+    Returns:
+        list: 尚不存在、仍需创建的 pending 子集
+    """
+    existing = {
+        host["host"]: host
+        for host in host_management.get_hosts_by_names([host_ip for _, host_ip, _ in pending])
+    }
+    to_create = []
+    massadd_groups = {}    # (新增主机组, 新增模板) -> [(行下标, host_ip, hostid)]
+    proxy_groups = {}      # proxy_hostid -> [(行下标, host_ip, hostid)]
+    interface_updates = [] # [((行下标, host_ip, hostid), 方法, 参数)]
+    changes = {}           # 行下标 -> [变更说明]
+
+    for index, host_ip, params in pending:
+        host = existing.get(host_ip)
+        if host is None:
+            to_create.append((index, host_ip, params))
+            continue
+        entry = (index, host_ip, host["hostid"])
+        changes[index] = []
+
+        add_groups = {g["groupid"] for g in params["groups"]} - {g["groupid"] for g in host.get("groups", [])}
+        add_templates = {t["templateid"] for t in params["templates"]} - {t["templateid"] for t in host.get("parentTemplates", [])}
+        if add_groups or add_templates:
+            massadd_groups.setdefault((tuple(sorted(add_groups)), tuple(sorted(add_templates))), []).append(entry)
+            changes[index].append("主机组/模板")
+
+        proxy_id = str(params.get("proxy_hostid") or "0")
+        if str(host.get("proxy_hostid") or "0") != proxy_id:
+            proxy_groups.setdefault(proxy_id, []).append(entry)
+            changes[index].append("代理")
+
+        interface_change = plan_interface_change(host, params["interfaces"][0])
+        if interface_change is not None:
+            interface_updates.append((entry, *interface_change))
+            changes[index].append("接口")
+
+    def apply(method, entries, update_params):
+        try:
+            host_management.zabbix_api.call_api(method, {"hosts": [{"hostid": hostid} for _, _, hostid in entries], **update_params})
+        except Exception as e:
+            for index, host_ip, _ in entries:
+                results[index] = {"status": "error", "host": host_ip, "message": f"第 {index+2} 行更新失败: {str(e)}"}
+
+    for (add_groups, add_templates), entries in massadd_groups.items():
+        update_params = {}
+        if add_groups:
+            update_params["groups"] = [{"groupid": gid} for gid in add_groups]
+        if add_templates:
+            update_params["templates"] = [{"templateid": tid} for tid in add_templates]
+        apply("host.massadd", entries, update_params)
+    for proxy_id, entries in proxy_groups.items():
+        apply("host.massupdate", entries, {"proxy_hostid": proxy_id})
+    for (index, host_ip, hostid), method, interface_params in interface_updates:
+        try:
+            host_management.zabbix_api.call_api(method, interface_params)
+        except Exception as e:
+            results[index] = {"status": "error", "host": host_ip, "message": f"第 {index+2} 行更新失败: {str(e)}"}
+
+    cache = get_config_cache()
+    for index, host_ip, params in pending:
+        if index not in changes or index in results:
+            continue
+        hostid = existing[host_ip]["hostid"]
+        if changes[index]:
+            cache.invalidate("host", host_ip)  # 主机已变更，失效本地缓存
+            message = f"已存在，已更新: {', '.join(changes[index])}"
+        else:
+            message = "已存在，无需变更"
+        results[index] = {"status": "success", "host": host_ip, "hostid": hostid, "message": message}
+
+    return to_create
+
+
+def create_hosts_bulk(file_path, group_name, snmp_template, agent_template, chunk_size=100, upsert=False):
+    """
+    批量创建主机（批量模式）：先校验整张表并用一次 proxy.get 解析全部代理，
+    再按 chunk_size 个主机一组调用 host.create；某组失败时退回逐个创建，定位具体出错的主机。
+    upsert 为 True 时先比对已存在的主机（见 sync_existing_hosts），只创建缺失的主机、只更新有差异的主机，
+    重复执行同一张表的开销与差异量成正比。
+    结果格式与 create_hosts 相同，按 Excel 行顺序返回。
+    """
+    try:
+        host_management = HostManagement()
+    except Exception as e:
+        return [{"status": "error", "message": f"API 登录失败: {e}"}]
+
+    try:
+        group_id, snmp_tid, agent_tid = resolve_config_ids(group_name, snmp_template, agent_template)
+    except Exception as e:
+        return [{"status": "error", "message": f"配置验证失败: {e}"}]
+
+    try:
+        df = read_host_info_from_excel(file_path)
+    except Exception as e:
+        return [{"status": "error", "message": str(e)}]
+
+    rows = df.to_dict(orient="records")
+    proxy_column = CONFIG["excel_columns"]["proxy_name"]
+    try:
+        proxy_ids = Proxy().get_proxy_ids(row.get(proxy_column) for row in rows)
+    except ZabbixAPIException as e:
+        return [{"status": "error", "message": f"加载代理列表失败: {e}"}]
+
+    # 1. 预先校验整张表，构造所有 host.create 参数
+    results = {}
+    pending = []  # [(行下标, host_ip, params)]
+    for index, row in enumerate(rows):
+        host_ip = row.get(CONFIG["excel_columns"]["host_ip"], "未知主机")
+        try:
+            host_ip, sys_type, proxy_name, visible_name = parse_host_row(row)
+            proxy_id = None
+            if proxy_name:
+                if proxy_name not in proxy_ids:
+                    raise ValueError(f"代理 {proxy_name} 不存在")
+                proxy_id = proxy_ids[proxy_name]
+            params = host_management.build_host_params(
+                hostname=visible_name,
+                ip=host_ip,
+                group_ids=[group_id],
+                template_ids=[snmp_tid if sys_type == "snmp" else agent_tid],
+                host_type=sys_type,
+                proxy_id=proxy_id
+            )
+            pending.append((index, host_ip, params))
+        except Exception as e:
+            results[index] = {"status": "error", "host": host_ip, "message": f"第 {index+2} 行处理失败: {str(e)}"}
+
+    # 2. 幂等模式下先处理已存在的主机
+    if upsert:
+        try:
+            pending = sync_existing_hosts(host_management, pending, results)
+        except Exception as e:
+            return [{"status": "error", "message": f"查询已有主机失败: {e}"}]
+
+    # 3. 按组提交，失败的组退回逐个创建
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start:start + chunk_size]
+        try:
+            resp = host_management.create_hosts([params for _, _, params in chunk])
+            for (index, host_ip, _), hostid in zip(chunk, resp["result"]["hostids"]):
+                results[index] = {"status": "success", "host": host_ip, "hostid": hostid}
+            continue
+        except Exception as e:
+            logger.warning(f"批量创建第 {start + 1}-{start + len(chunk)} 个主机失败，改为逐个创建: {e}")
+
+        for index, host_ip, params in chunk:
+            try:
+                resp = host_management.create_hosts([params])
+                results[index] = {"status": "success", "host": host_ip, "hostid": resp["result"]["hostids"][0]}
+            except Exception as e:
+                results[index] = {"status": "error", "host": host_ip, "message": f"第 {index+2} 行处理失败: {str(e)}"}
+
+    return [results[index] for index in sorted(results)]
+
+
 if __name__ == "__main__":
-    results = create_hosts(
+    results = create_hosts_bulk(
         file_path="C:\\software\\host_info-20240325.xlsx",
         group_name="Poly话机",
         snmp_template="Template_Envision_SNMPGeneral",
-        agent_template="Envision_Temp_ICMPPing_Baseline"
+        agent_template="Envision_Temp_ICMPPing_Baseline",
+        upsert=True
     )
 
     print("\n创建结果:")
@@ -168,4 +403,6 @@ if __name__ == "__main__":
         status_icon = "✅" if res.get("status") == "success" else "❌"
         host = res.get('host', '未知主机')
         message = res.get('message', '创建成功')
-        print(f"{status_icon} {host}: {message}")
\ No newline at end of file
+        print(f"{status_icon} {host}: {message}")
+
+    print(get_metrics().format_summary())
@@ -0,0 +1,89 @@
+import logging
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
+from host_management import ExportHostManagement
+from host_record import HostRecord
+
+class HostIndex:
+    """
+    主机清单内存索引：一次性加载 ExportHostManagement 的主机信息，
+    按 APP_ID、IP、主机名称、标签 (tag, value) 和代理 ID 建立字典索引，查询为 O(1)。
+    记录为 ExportHostManagement.get_host_info 返回的 HostRecord。
+    """
+    def __init__(self, manager: Optional[ExportHostManagement] = None):
+        self.manager = manager or ExportHostManagement()
+        self.hosts: List[HostRecord] = []
+        self.by_app_id: Dict[str, List[int]] = {}
+        self.by_ip: Dict[str, List[int]] = {}
+        self.by_host_name: Dict[str, List[int]] = {}
+        self.by_tag: Dict[Tuple[str, str], List[int]] = {}
+        self.by_proxy_id: Dict[str, List[int]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """（重新）加载主机清单并重建索引"""
+        self.hosts = self.manager.get_host_info()
+
+        by_app_id, by_ip, by_host_name = defaultdict(list), defaultdict(list), defaultdict(list)
+        by_tag, by_proxy_id = defaultdict(list), defaultdict(list)
+        for position, host in enumerate(self.hosts):
+            by_app_id[host.app_id].append(position)
+            by_ip[host.ip].append(position)
+            by_host_name[host.host].append(position)
+            for tag in host.tags:
+                by_tag[tag].append(position)
+            by_proxy_id[host.proxy_hostid or "0"].append(position)
+
+        self.by_app_id, self.by_ip, self.by_host_name = dict(by_app_id), dict(by_ip), dict(by_host_name)
+        self.by_tag, self.by_proxy_id = dict(by_tag), dict(by_proxy_id)
+        logging.info(f"主机索引已加载，共 {len(self.hosts)} 台主机")
+
+    def find(
+        self,
+        app_id: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        host_name: Optional[str] = None,
+        tag: Optional[Tuple[str, str]] = None,
+        proxy_id: Optional[str] = None
+    ) -> List[HostRecord]:
+        """
+        按条件查询主机，多个条件取交集，为空的条件不参与过滤；
+        不传任何条件时返回全部主机
+        """
+        criteria = [
+            (self.by_app_id, app_id),
+            (self.by_ip, ip_address),
+            (self.by_host_name, host_name),
+            (self.by_tag, tuple(tag) if tag else None),
+            (self.by_proxy_id, proxy_id),
+        ]
+        positions = None
+        for index, key in criteria:
+            if not key:
+                continue
+            matched = index.get(key, [])
+            if positions is None:
+                positions = matched
+            else:
+                matched_set = set(matched)
+                positions = [p for p in positions if p in matched_set]
+            if not positions:
+                return []
+        if positions is None:
+            return list(self.hosts)
+        return [self.hosts[p] for p in positions]
+
+    def get_by_app_id(self, app_id: str) -> List[HostRecord]:
+        return self.find(app_id=app_id)
+
+    def get_by_ip(self, ip_address: str) -> List[HostRecord]:
+        return self.find(ip_address=ip_address)
+
+    def get_by_host_name(self, host_name: str) -> List[HostRecord]:
+        return self.find(host_name=host_name)
+
+    def get_by_tag(self, tag_name: str, tag_value: str) -> List[HostRecord]:
+        return self.find(tag=(tag_name, tag_value))
+
+    def get_by_proxy_id(self, proxy_id: str) -> List[HostRecord]:
+        return self.find(proxy_id=proxy_id)
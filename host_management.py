@@ -1,8 +1,10 @@
 import logging
-import json
-from typing import List, Dict, Optional, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Iterator
 from zabbix_api import ZabbixAPI, ZabbixAPIException
 from proxy import Proxy
+from host_record import HostRecord, TriggerInfo
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,7 +13,14 @@ logging.basicConfig(
 )
 
 class ExportHostManagement:
-    def __init__(self):
+    def __init__(self, page_size: int = 500, page_workers: int = 1):
+        """
+        Args:
+            page_size: 分页获取主机时每页的主机数
+            page_workers: 同时获取的页数（>1 时并发请求）
+        """
+        self.page_size = page_size
+        self.page_workers = page_workers
         try:
             self.zabbix_api = ZabbixAPI()
             logging.info("Zabbix API 登录成功")
@@ -19,101 +28,184 @@ class ExportHostManagement:
             logging.error(f"Zabbix API 登录失败: {str(e)}")
             raise
         self.proxy = Proxy()
-        self.proxy_cache = {}
 
-    def get_host_info(
-        self, 
-        proxy_name: Optional[str] = None,
-        tag_name: Optional[str] = None,
-        tag_value: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
-        params = {
+    def _host_info_params(self) -> Dict[str, Any]:
+        return {
             "output": ["hostid", "host", "name", "status", "proxy_hostid"],
             "selectInterfaces": ["ip", "type"],
             "selectGroups": ["name"],
             "selectParentTemplates": ["name"],
-            "selectTriggers": ["description", "status"],
+            "selectTriggers": ["triggerid", "description", "status"],
             "selectTags": ["tag", "value"],
         }
 
-        if proxy_name:
-            try:
-                proxy_info = json.loads(self.proxy.get_proxy_info(proxy_name))
-                proxy_id = proxy_info.get("proxy_id")
-                if not proxy_id:
-                    logging.error(f"代理 '{proxy_name}' 不存在")
-                    return []
-                params["proxyids"] = [proxy_id]
-            except (json.JSONDecodeError, KeyError) as e:
-                logging.error(f"代理信息解析失败: {str(e)}")
-                return []
+    def _query_host_ids(self, params: Dict[str, Any]) -> List[str]:
+        """按 params 中的过滤条件只取 hostid（不含 select* 展开），按 hostid 升序返回"""
+        id_params = {key: value for key, value in params.items() if not key.startswith("select")}
+        id_params.update({"output": ["hostid"], "sortfield": "hostid"})
+        response = self.zabbix_api.call_api("host.get", id_params)
+        return sorted((host["hostid"] for host in response.get("result", [])), key=int)
+
+    def iter_host_pages(
+        self,
+        params: Dict[str, Any],
+        page_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        host_ids: Optional[List[str]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        分页执行 host.get 的生成器，按 hostid 升序逐页产出原始结果。
+
+        Zabbix API 不支持 hostid 范围过滤，因此键集分页分两步：先用 params 中的过滤条件
+        只取 hostid（数据量很小，调用方已取得时可通过 host_ids 传入），排序后按 page_size 切分，
+        再以 hostids 逐页获取 select* 详细信息。
+        workers > 1 时最多 workers 页同时在途，结果仍按顺序产出，内存中最多保留 workers 页。
+
+        Raises:
+            ZabbixAPIException: 任一页查询失败
+        """
+        page_size = page_size or self.page_size
+        workers = workers or self.page_workers
+        if host_ids is None:
+            host_ids = self._query_host_ids(params)
+        pages = [host_ids[start:start + page_size] for start in range(0, len(host_ids), page_size)]
+
+        def fetch(page_ids: List[str]) -> List[Dict[str, Any]]:
+            page_params = dict(params, hostids=page_ids, sortfield="hostid")
+            return self.zabbix_api.call_api("host.get", page_params).get("result", [])
+
+        if workers <= 1:
+            for page_ids in pages:
+                yield fetch(page_ids)
+            return
+
+        self.zabbix_api.shared.ensure_pool_size(workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="host-page") as executor:
+            in_flight = deque()
+            for page_ids in pages:
+                in_flight.append(executor.submit(fetch, page_ids))
+                if len(in_flight) >= workers:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def iter_host_records(
+        self,
+        params: Dict[str, Any],
+        tag_name: Optional[str] = None,
+        tag_value: Optional[str] = None,
+        page_size: Optional[int] = None
+    ) -> Iterator[HostRecord]:
+        """
+        分页获取主机并转换为 HostRecord 的生成器。
+        代理名称由 Proxy 目录解析（整个进程只加载一次全部代理）。
 
+        Raises:
+            ZabbixAPIException: 查询失败
+        """
+        for page in self.iter_host_pages(params, page_size=page_size):
+            yield from self._transform_hosts(page, tag_name=tag_name, tag_value=tag_value)
+
+    def get_raw_hosts(self) -> List[Dict[str, Any]]:
+        """获取未经处理的 host.get 结果（字段与 get_host_info 查询一致）"""
         try:
-            response = self.zabbix_api.call_api("host.get", params)
-            return self._process_hosts(
-                raw_hosts=response.get("result", []), 
-                tag_name=tag_name,
-                tag_value=tag_value
-            )
+            return [host for page in self.iter_host_pages(self._host_info_params()) for host in page]
         except ZabbixAPIException as e:
             logging.error(f"主机查询失败: {str(e)}")
             return []
 
-    def _process_hosts(
+    def get_host_info(
         self, 
-        raw_hosts: List[Dict[str, Any]],
-        tag_name: Optional[str],
-        tag_value: Optional[str]
-    ) -> List[Dict[str, Any]]:
-        processed_hosts = []
-        for host in raw_hosts:
-            if not self._filter_by_tag(host, tag_name, tag_value):
-                continue
-
-            interface = host.get("interfaces", [{}])[0]
-            ip_address = interface.get("ip", "N/A")
-            interface_type = "Agent" if interface.get("type") == "1" else "SNMP" if interface.get("type") == "2" else "N/A"
+        proxy_name: Optional[str] = None,
+        tag_name: Optional[str] = None,
+        tag_value: Optional[str] = None
+    ) -> List[HostRecord]:
+        params = self._host_info_params()
+        if not self._apply_proxy_filter(params, proxy_name):
+            return []
 
-            triggers = host.get("triggers", [])
-            trigger_descriptions = json.dumps(
-                {t.get("description", "N/A"): "启用" if t.get("status") == "0" else "禁用" for t in triggers},
-                ensure_ascii=False
-            )
+        try:
+            return list(self.iter_host_records(params, tag_name=tag_name, tag_value=tag_value))
+        except ZabbixAPIException as e:
+            logging.error(f"主机查询失败: {str(e)}")
+            return []
 
-            groups = [g["name"] for g in host.get("groups", [])]
-            templates = [t["name"] for t in host.get("parentTemplates", [])]
-            tags = [f"{t['tag']}:{t['value']}" for t in host.get("tags", [])]
+    def iter_host_info(
+        self,
+        proxy_name: Optional[str] = None,
+        tag_name: Optional[str] = None,
+        tag_value: Optional[str] = None,
+        page_size: Optional[int] = None
+    ) -> Iterator[HostRecord]:
+        """
+        分页获取主机信息的生成器，记录格式与 get_host_info 一致，
+        任一时刻内存中只保留在途的几页主机（见 iter_host_pages）。
 
-            app_id = next((t.get("value", "") for t in host.get("tags", []) if t.get("tag") == "APP_ID"), "")
+        Raises:
+            ZabbixAPIException: 任一页查询失败（已产出的记录不完整，调用方不能当作完整结果使用）
+        """
+        params = self._host_info_params()
+        if not self._apply_proxy_filter(params, proxy_name):
+            return
+        try:
+            yield from self.iter_host_records(params, tag_name=tag_name, tag_value=tag_value, page_size=page_size)
+        except ZabbixAPIException as e:
+            logging.error(f"主机查询失败: {str(e)}")
+            raise
 
+    def _apply_proxy_filter(self, params: Dict[str, Any], proxy_name: Optional[str]) -> bool:
+        """按代理名称过滤时写入 proxyids，代理不存在或代理列表加载失败时返回 False（与旧版一致，不返回主机）"""
+        if not proxy_name:
+            return True
+        try:
+            proxy_id = self.proxy.get_proxy_info(proxy_name).get("proxy_id")
+        except ZabbixAPIException as e:
+            logging.error(f"代理 '{proxy_name}' 查询失败，无法按代理过滤: {str(e)}")
+            return False
+        if not proxy_id:
+            logging.error(f"代理 '{proxy_name}' 不存在")
+            return False
+        params["proxyids"] = [proxy_id]
+        return True
+
+    def _transform_hosts(
+        self,
+        raw_hosts: List[Dict[str, Any]],
+        tag_name: Optional[str] = None,
+        tag_value: Optional[str] = None
+    ) -> List[HostRecord]:
+        """将 host.get 结果一次性转换为 HostRecord 列表（按标签过滤），代理名称从 Proxy 目录读取"""
+        records = []
+        for host in raw_hosts:
+            if not self._filter_by_tag(host, tag_name, tag_value):
+                continue
+            interface = (host.get("interfaces") or [{}])[0]
             proxy_hostid = host.get("proxy_hostid")
-            proxy_name_value = self._get_proxy_name(proxy_hostid)
-
-            processed_hosts.append({
-                "主机ID": host.get("hostid", "N/A"),
-                "主机名称": host.get("host", "N/A").strip(),
-                "可见名称": host.get("name", "N/A").strip(),
-                "是否启用": "启用" if host.get("status") == "0" else "禁用",
-                "IP地址": ip_address,
-                "接口类型": interface_type,
-                "主机组": groups,
-                "关联模板": templates,
-                "代理名称": [proxy_name_value] if proxy_name_value != "N/A" else [],
-                "触发器描述": trigger_descriptions,
-                "标签列表": tags,
-                "APP_ID": app_id
-            })
-        return processed_hosts
-
-    def _get_proxy_name(self, proxy_hostid: Optional[str]) -> str:
-        if not proxy_hostid:
-            return "N/A"
-        if proxy_hostid in self.proxy_cache:
-            proxy_info = self.proxy_cache[proxy_hostid]
-        else:
-            proxy_info = self.proxy.get_proxy_info_by_id(proxy_hostid)
-            self.proxy_cache[proxy_hostid] = proxy_info
-        return proxy_info.get("host", "N/A") if proxy_info else "N/A"
+            records.append(HostRecord(
+                hostid=host.get("hostid", "N/A"),
+                host=host.get("host", "N/A").strip(),
+                name=host.get("name", "N/A").strip(),
+                status=host.get("status"),
+                ip=interface.get("ip", "N/A"),
+                interface_type=interface.get("type"),
+                groups=tuple(g["name"] for g in host.get("groups", [])),
+                templates=tuple(t["name"] for t in host.get("parentTemplates", [])),
+                proxy_hostid=proxy_hostid,
+                proxy_name=self._proxy_name(proxy_hostid),
+                triggers=tuple(
+                    TriggerInfo(t.get("triggerid"), t.get("description", "N/A"), t.get("status"))
+                    for t in host.get("triggers", [])
+                ),
+                tags=tuple((t.get("tag"), t.get("value", "")) for t in host.get("tags", []))
+            ))
+        return records
+
+    def _proxy_name(self, proxy_hostid: Optional[str]) -> Optional[str]:
+        """代理名称；代理列表加载失败时（Proxy 已记录错误）降级为无代理名称（与旧版一致），不中断导出"""
+        try:
+            return self.proxy.get_proxy_name(proxy_hostid)
+        except ZabbixAPIException:
+            return None
 
     def _filter_by_tag(
         self,
@@ -128,74 +220,18 @@ class ExportHostManagement:
             for tag in host.get("tags", [])
         )
 
-    def get_host_map_by_templates(self, template_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    def get_host_map_by_templates(self, template_names: List[str]) -> Dict[str, HostRecord]:
         """
         根据模板名称获取主机信息，返回一个字典，
-        key 为主机ID，value 为主机详细信息（字段格式与 get_host_info 保持一致）
+        key 为主机ID，value 为主机记录（与 get_host_info 相同的 HostRecord）
         """
-        params = {
-            "output": ["hostid", "host", "name", "status", "proxy_hostid"],
-            "selectInterfaces": ["ip", "type"],
-            "selectGroups": ["name"],
-            "selectParentTemplates": ["name"],
-            "selectTriggers": ["triggerid", "description"],
-            "selectTags": ["tag", "value"],
-            "filter": {"parentTemplates": template_names},
-        }
+        params = self._host_info_params()
+        params["filter"] = {"parentTemplates": template_names}
 
         try:
-            response = self.zabbix_api.call_api("host.get", params)
-            hosts = response.get("result", [])
-            
-            host_map = {}
-            for host in hosts:
-                host_map[host["hostid"]] = self._process_single_host(host)
+            host_map = {record.hostid: record for record in self.iter_host_records(params)}
             logging.info(f"根据模板获取到 {len(host_map)} 个主机")
             return host_map
         except ZabbixAPIException as e:
             logging.error(f"获取模板关联主机失败: {str(e)}")
             return {}
-
-    def _process_single_host(self, host: Dict[str, Any]) -> Dict[str, Any]:
-        interface = host.get("interfaces", [{}])[0]
-        ip_address = interface.get("ip", "N/A")
-        groups = [g["name"] for g in host.get("groups", [])]
-        templates = [t["name"] for t in host.get("parentTemplates", [])]
-        tags = [f"{t['tag']}:{t['value']}" for t in host.get("tags", [])]
-        triggers = host.get("triggers", [])
-        trigger_descriptions = json.dumps(
-            {t.get("triggerid", "N/A"): t.get("description", "N/A") for t in triggers},
-            ensure_ascii=False
-        )
-        # 提取 APP_ID 值
-        app_id = ""
-        for t in host.get("tags", []):
-            if t.get("tag") == "APP_ID":
-                app_id = t.get("value", "")
-                break
-
-        proxy_hostid = host.get("proxy_hostid")
-        if proxy_hostid:
-            if proxy_hostid in self.proxy_cache:
-                proxy_info = self.proxy_cache[proxy_hostid]
-            else:
-                proxy_info = self.proxy.get_proxy_info_by_id(proxy_hostid)
-                self.proxy_cache[proxy_hostid] = proxy_info
-            proxy_name_value = proxy_info.get("host", "N/A") if proxy_info else "N/A"
-        else:
-            proxy_name_value = "N/A"
-
-        return {
-            "主机ID": host.get("hostid", "N/A"),
-            "主机名称": host.get("host", "N/A"),
-            "可见名称": host.get("name", "N/A"),
-            "是否启用": "启用" if host.get("status") == "0" else "禁用",
-            "IP地址": ip_address,
-            "接口类型": "Agent" if interface.get("type") == "1" else "SNMP" if interface.get("type") == "2" else "N/A",
-            "主机组": groups,
-            "关联模板": templates,
-            "代理名称": [proxy_name_value] if proxy_name_value != "N/A" else [],
-            "触发器描述": trigger_descriptions,
-            "标签列表": tags,
-            "APP_ID": app_id
-        }
@@ -0,0 +1,118 @@
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# 导出列顺序（显示名称只在导出时使用）
+DISPLAY_COLUMNS = [
+    "主机ID", "主机名称", "可见名称", "是否启用",
+    "IP地址", "接口类型", "主机组", "关联模板",
+    "代理名称", "触发器描述", "标签列表", "APP_ID"
+]
+
+INTERFACE_TYPE_LABELS = {"1": "Agent", "2": "SNMP"}
+
+def status_label(status: Optional[str]) -> str:
+    """Zabbix 状态码（0 启用 / 1 禁用）转显示文本"""
+    return "启用" if status == "0" else "禁用"
+
+class TriggerInfo(NamedTuple):
+    """主机上的触发器（status 为 Zabbix 原始状态码，未查询时为 None）"""
+    triggerid: Optional[str]
+    description: str
+    status: Optional[str] = None
+
+    def label(self) -> str:
+        """导出时的显示文本：“描述: 启用/禁用”，未查询状态时只显示描述"""
+        if self.status is None:
+            return self.description
+        return f"{self.description}: {status_label(self.status)}"
+
+class HostRecord:
+    """
+    紧凑的主机记录：字段保存 host.get 的原始值（状态码、接口类型码），
+    列表字段为元组，触发器为 TriggerInfo 元组，标签为 (tag, value) 元组；
+    中文列名和显示文本只在 display_rows / to_display 中生成。
+    """
+    __slots__ = (
+        "hostid", "host", "name", "status", "ip", "interface_type",
+        "groups", "templates", "proxy_hostid", "proxy_name", "triggers", "tags"
+    )
+
+    def __init__(
+        self,
+        hostid: str,
+        host: str,
+        name: str,
+        status: str,
+        ip: str,
+        interface_type: Optional[str],
+        groups: Tuple[str, ...],
+        templates: Tuple[str, ...],
+        proxy_hostid: Optional[str],
+        proxy_name: Optional[str],
+        triggers: Tuple[TriggerInfo, ...],
+        tags: Tuple[Tuple[str, str], ...]
+    ):
+        self.hostid = hostid
+        self.host = host
+        self.name = name
+        self.status = status
+        self.ip = ip
+        self.interface_type = interface_type
+        self.groups = groups
+        self.templates = templates
+        self.proxy_hostid = proxy_hostid
+        self.proxy_name = proxy_name
+        self.triggers = triggers
+        self.tags = tags
+
+    @property
+    def enabled(self) -> bool:
+        return self.status == "0"
+
+    @property
+    def app_id(self) -> str:
+        return next((value for tag, value in self.tags if tag == "APP_ID"), "")
+
+    def tag_value(self, tag_name: str) -> Optional[str]:
+        return next((value for tag, value in self.tags if tag == tag_name), None)
+
+    def has_tag(self, tag_name: str, tag_value: str) -> bool:
+        return (tag_name, tag_value) in self.tags
+
+    def _display_values(self) -> List[Any]:
+        """除“触发器描述”外各列的显示值，顺序与 DISPLAY_COLUMNS 一致（触发器列占位为 None）"""
+        return [
+            self.hostid,
+            self.host,
+            self.name,
+            status_label(self.status),
+            self.ip,
+            INTERFACE_TYPE_LABELS.get(self.interface_type, "N/A"),
+            list(self.groups),
+            list(self.templates),
+            [self.proxy_name] if self.proxy_name else [],
+            None,
+            [f"{tag}:{value}" for tag, value in self.tags],
+            self.app_id,
+        ]
+
+    def display_rows(self) -> Iterator[List[Any]]:
+        """按触发器拆分的导出行（每个触发器一行，无触发器时输出一行且触发器列为空）"""
+        values = self._display_values()
+        trigger_column = DISPLAY_COLUMNS.index("触发器描述")
+        if not self.triggers:
+            values[trigger_column] = ""
+            yield values
+            return
+        for trigger in self.triggers:
+            row = list(values)
+            row[trigger_column] = trigger.label()
+            yield row
+
+    def to_display(self) -> Dict[str, Any]:
+        """以中文列名为键的字典（触发器描述为显示文本列表），用于展示或旧格式兼容"""
+        display = dict(zip(DISPLAY_COLUMNS, self._display_values()))
+        display["触发器描述"] = [trigger.label() for trigger in self.triggers]
+        return display
+
+    def __repr__(self) -> str:
+        return f"HostRecord(hostid={self.hostid!r}, host={self.host!r}, ip={self.ip!r})"
@@ -1,21 +1,19 @@
 import json
 from zabbix_api import ZabbixAPI
+from config_cache import get_config_cache
 
 class Hostgroup:
     def __init__(self):
-        self.zabbix_api = ZabbixAPI()
+        self.zabbix_api = ZabbixAPI(lazy_login=True)
+        self.cache = get_config_cache()
 
     def get_hostgroup_info(self, group_name):
-        """获取主机组信息（返回支持中文的 JSON 字符串）"""
-        params = {
-            "filter": {"name": group_name},
-            "output": ["groupid", "name"]
-        }
-        response = self.zabbix_api.call_api("hostgroup.get", params)
-        if response.get("result"):
+        """获取主机组信息（返回支持中文的 JSON 字符串，优先读取本地缓存）"""
+        group = self.cache.lookup(self.zabbix_api, "hostgroup", group_name)
+        if group:
             group_info = {
-                "group_id": response["result"][0]["groupid"],
-                "name": response["result"][0]["name"]
+                "group_id": group["groupid"],
+                "name": group["name"]
             }
             return json.dumps(group_info, indent=4, ensure_ascii=False)
         else:
@@ -32,23 +30,16 @@ class Hostgroup:
         hostname = params.get("hostname")
         group_name = params.get("group")
 
-        # 1. 获取主机组 ID
-        group_resp = self.zabbix_api.call_api("hostgroup.get", {
-            "filter": {"name": [group_name]},
-            "output": ["groupid"]
-        })
-        groupid = group_resp["result"][0]["groupid"]  # :contentReference[oaicite:3]{index=3}
+        # 1. 获取主机组 ID（优先读取本地缓存）
+        groupid = self.cache.lookup(self.zabbix_api, "hostgroup", group_name)["groupid"]  # :contentReference[oaicite:3]{index=3}
 
-        # 2. 获取主机 ID（通过主机名）
-        host_resp = self.zabbix_api.call_api("host.get", {
-            "filter": {"host": [hostname]},
-            "output": ["hostid"]
-        })
-        hostid = host_resp["result"][0]["hostid"]  # :contentReference[oaicite:4]{index=4}
+        # 2. 获取主机 ID（通过主机名，优先读取本地缓存）
+        hostid = self.cache.lookup(self.zabbix_api, "host", hostname)["hostid"]  # :contentReference[oaicite:4]{index=4}
 
         # 3. 调用 host.massadd，将主机添加到主机组中
         add_resp = self.zabbix_api.call_api("host.massadd", {
             "hosts": [{"hostid": hostid}],
             "groups": [{"groupid": groupid}]
         })
+        self.cache.invalidate("host", hostname)  # 主机配置已变更，失效本地缓存
         return add_resp  # :contentReference[oaicite:5]{index=5}
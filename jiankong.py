@@ -1,80 +1,130 @@
+import argparse
+import logging
+from typing import Iterable, Optional
 import pandas as pd
+from host_record import HostRecord
 
-# 定义输入和输出文件路径
-input_file = r"C:\software\监控数据.xlsx"
-output_file = r"C:\software\处理后监控数据.xlsx"
-
-# 读取 Excel 数据
-df = pd.read_excel(input_file)
-
-# 用于按 (IP地址, APP_ID) 分组，存储各监控项信息
-groups = {}
-
-for index, row in df.iterrows():
-    ip = str(row['IP地址']).strip()
-    app_id = str(row['APP_ID']).strip()
-    proxy = str(row['代理名称']).strip()
-    trigger = str(row['触发器描述']).strip()
-    
-    key = (ip, app_id)
-    if key not in groups:
-        groups[key] = {
-            'ping': None,      # 主机不可达监控，只保存一次IP
-            'disk': None,      # 主机磁盘最大使用率监控，只保存一次IP
-            'shared': [],      # 主机挂载的共享盘不可达监控（可能多行）
-            'process': [],     # 关键进程状态监控（可能多行）
-            'port': []         # 关键端口状态监控（可能多行）
-        }
-    
-    # 主机不可达监控：包含 "Ping"
-    if "Ping" in trigger and groups[key]['ping'] is None:
-        groups[key]['ping'] = ip
-        
-    # 主机磁盘最大使用率监控：包含 "磁盘"
-    if "磁盘" in trigger and groups[key]['disk'] is None:
-        groups[key]['disk'] = ip
-        
-    # 主机挂载的共享盘不可达监控：包含 "共享磁盘"
-    if "共享磁盘" in trigger:
-        groups[key]['shared'].append(f"{ip} | {trigger}")
-        
-    # 关键进程状态监控：包含 "进程" 或 "服务中断"
-    if "进程" in trigger or "服务中断" in trigger:
-        groups[key]['process'].append(f"{ip} | {trigger}")
-        
-    # 关键端口状态监控（仅支持TCP）：包含 "端口" 或 "监听"
-    if "端口" in trigger or "监听" in trigger:
-        groups[key]['port'].append(f"{proxy} | {ip} | {trigger}")
-
-# 构造输出行
-output_rows = []
-
-# 对于每个 (IP, APP_ID) 组合，确定多行输出的行数
-for (ip, app_id), info in groups.items():
-    # 多行输出的行数取决于共享盘、进程、端口中数量的最大值，至少1行
-    n_rows = max(1, len(info['shared']), len(info['process']), len(info['port']))
-    
-    for i in range(n_rows):
-        row_data = {
-            'IP地址': ip,
-            'APP_ID': app_id,
-            # 只有第一行填写单值监控数据，其它行为空
-            '主机不可达监控': info['ping'] if i == 0 else "",
-            '主机磁盘最大使用率监控': info['disk'] if i == 0 else "",
-            # 对于可能多行的项，若索引超出列表则留空
-            '主机挂载的共享盘不可达监控': info['shared'][i] if i < len(info['shared']) else "",
-            '关键进程状态监控': info['process'][i] if i < len(info['process']) else "",
-            '关键端口状态监控': info['port'][i] if i < len(info['port']) else ""
-        }
-        output_rows.append(row_data)
-
-# 构造 DataFrame，指定列的顺序
-output_df = pd.DataFrame(output_rows, columns=[
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", encoding='utf-8')
+
+# 定义默认输入和输出文件路径
+INPUT_FILE = r"C:\software\监控数据.xlsx"
+OUTPUT_FILE = r"C:\software\处理后监控数据.xlsx"
+
+# 输入列（与 export_host 导出的列名一致）
+INPUT_COLUMNS = ["IP地址", "APP_ID", "代理名称", "触发器描述"]
+
+# 输出列顺序
+MATRIX_COLUMNS = [
     'IP地址', 'APP_ID', '主机不可达监控', '主机磁盘最大使用率监控',
     '主机挂载的共享盘不可达监控', '关键进程状态监控', '关键端口状态监控'
-])
+]
+
+# 单值监控项：每个 (IP, APP_ID) 只在第一行填写一次 IP
+#   主机不可达监控：包含 "Ping"；主机磁盘最大使用率监控：包含 "磁盘"
+SINGLE_RULES = {
+    '主机不可达监控': "Ping",
+    '主机磁盘最大使用率监控': "磁盘",
+}
+
+# 多值监控项（正则分支），每个匹配的触发器占一行
+#   共享盘：包含 "共享磁盘"；进程：包含 "进程" 或 "服务中断"；端口（仅支持TCP）：包含 "端口" 或 "监听"
+MULTI_RULES = {
+    '主机挂载的共享盘不可达监控': "共享磁盘",
+    '关键进程状态监控': "进程|服务中断",
+    '关键端口状态监控': "端口|监听",
+}
+
+def trigger_frame_from_records(records: Iterable[HostRecord]) -> pd.DataFrame:
+    """
+    将主机记录展开为每个触发器一行的 DataFrame（列见 INPUT_COLUMNS），
+    触发器文本与 export_host 导出的“触发器描述”列一致，无触发器的主机保留一行空触发器
+    """
+    rows = []
+    for record in records:
+        app_id, proxy = record.app_id, record.proxy_name or ""
+        if not record.triggers:
+            rows.append((record.ip, app_id, proxy, ""))
+        rows.extend((record.ip, app_id, proxy, trigger.label()) for trigger in record.triggers)
+    return pd.DataFrame(rows, columns=INPUT_COLUMNS)
+
+def build_monitoring_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    按 (IP地址, APP_ID) 分组生成监控矩阵：
+    单值监控项只在每组第一行填写 IP，多值监控项每个匹配的触发器一行，
+    每组行数为多值监控项数量的最大值（至少 1 行），组按首次出现的顺序输出。
+
+    分类对整列做一次字符串匹配，分组和行对齐用 groupby / merge 完成，不逐行遍历。
+    """
+    if df.empty:
+        # 空表或只有表头：列的 dtype 为浮点，后续 .str 匹配会失败，直接输出只有表头的矩阵
+        return pd.DataFrame(columns=MATRIX_COLUMNS)
+
+    # 与旧脚本的 str(row[...]).strip() 一致：空单元格转为 "nan"
+    frame = pd.DataFrame({
+        column: df[column].map(str).str.strip() for column in INPUT_COLUMNS
+    })
+    frame["group"] = frame.groupby(["IP地址", "APP_ID"], sort=False).ngroup()
+
+    # 每组第一行（rank 0），单值监控项取组内第一个匹配触发器的 IP
+    matrix = frame.drop_duplicates("group")[["group", "IP地址", "APP_ID"]].assign(rank=0)
+    for column, pattern in SINGLE_RULES.items():
+        hits = frame[frame["触发器描述"].str.contains(pattern, regex=False)].drop_duplicates("group")
+        matrix = matrix.merge(
+            hits[["group", "IP地址"]].rename(columns={"IP地址": column}), on="group", how="left"
+        )
+
+    # 多值监控项：组内第 n 个匹配项放在第 n 行
+    entries = []
+    for column, pattern in MULTI_RULES.items():
+        hits = frame[frame["触发器描述"].str.contains(pattern, regex=True)]
+        if column == '关键端口状态监控':
+            values = hits["代理名称"] + " | " + hits["IP地址"] + " | " + hits["触发器描述"]
+        else:
+            values = hits["IP地址"] + " | " + hits["触发器描述"]
+        entries.append(pd.DataFrame({
+            "group": hits["group"],
+            "rank": hits.groupby("group").cumcount(),
+            column: values
+        }))
+
+    # 所有 (组, 行号) 组合：第一行加上各多值监控项出现过的行号
+    keys = pd.concat(
+        [matrix[["group", "rank"]]] + [entry[["group", "rank"]] for entry in entries]
+    ).drop_duplicates()
+    result = keys.merge(matrix[["group", "IP地址", "APP_ID"]], on="group", how="left")
+    result = result.merge(matrix.drop(columns=["IP地址", "APP_ID"]), on=["group", "rank"], how="left")
+    for entry in entries:
+        result = result.merge(entry, on=["group", "rank"], how="left")
+
+    result = result.sort_values(["group", "rank"], kind="stable")
+    return result[MATRIX_COLUMNS].fillna("").reset_index(drop=True)
+
+def build_matrix_from_zabbix(
+    proxy_name: Optional[str] = None,
+    tag_name: Optional[str] = None,
+    tag_value: Optional[str] = None,
+    manager=None
+) -> pd.DataFrame:
+    """直接从 Zabbix 获取主机（ExportHostManagement.iter_host_info）生成监控矩阵，不经过 Excel"""
+    if manager is None:
+        from host_management import ExportHostManagement
+        manager = ExportHostManagement()
+    records = manager.iter_host_info(proxy_name=proxy_name, tag_name=tag_name, tag_value=tag_value)
+    return build_monitoring_matrix(trigger_frame_from_records(records))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按 (IP地址, APP_ID) 生成监控矩阵")
+    parser.add_argument("--input", default=INPUT_FILE, help=f"输入文件（export_host 导出的 Excel，默认：{INPUT_FILE}）")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"输出文件（默认：{OUTPUT_FILE}）")
+    parser.add_argument("--from-zabbix", action="store_true", help="直接从 Zabbix 获取主机，忽略 --input")
+    args = parser.parse_args()
+
+    if args.from_zabbix:
+        output_df = build_matrix_from_zabbix()
+    else:
+        output_df = build_monitoring_matrix(pd.read_excel(args.input))
 
-# 写出到 Excel 文件
-output_df.to_excel(output_file, index=False)
+    # 写出到 Excel 文件
+    output_df.to_excel(args.output, index=False)
 
-print(f"处理完成，生成文件：{output_file}")
+    print(f"处理完成，生成文件：{args.output}")
@@ -0,0 +1,126 @@
+import os
+import gzip
+import json
+import zlib
+import logging
+from operator import itemgetter
+
+logger = logging.getLogger(__name__)
+
+# 可选的快速 JSON 库，按优先级排列；都未安装时使用标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# 通过环境变量指定编解码器（orjson / ujson / json），未指定时自动选择可用的最快实现
+JSON_CODEC = os.environ.get("ZABBIX_JSON_CODEC")
+
+# 请求体达到该字节数时用 gzip 压缩（Content-Encoding: gzip），0 表示不压缩。
+# Zabbix 前端（PHP）本身不解压请求体，需要 Web 服务器（如 nginx/Apache）配置了请求解压才能开启
+COMPRESS_MIN_BYTES = int(os.environ.get("ZABBIX_COMPRESS_MIN_BYTES", "0"))
+
+# 声明可以接受压缩的响应（requests 按 Content-Encoding 自动解压）
+ACCEPT_ENCODING = "gzip, deflate"
+
+class JsonCodec:
+    """JSON 编解码器：dumps 返回 UTF-8 字节串，loads 接受字节串或字符串，解析失败时抛出 ValueError"""
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return f"JsonCodec({self.name})"
+
+# 各实现的共同约定：紧凑分隔符、非 ASCII 字符直接按 UTF-8 编码（orjson 只支持这种方式）、不转义 "/"。
+# 对 JSON 原生类型（字符串、整数、布尔、None 及其列表/字典）输出的字节完全相同；
+# 浮点数的文本形式可能不同（如 1e16 与 1e+16，解析结果相同），NaN/Infinity 不是合法 JSON（orjson 输出 null），
+# NumPy 标量和数组只有 orjson 与标准库支持（标准库按 tolist() 转换）
+def _numpy_default(obj):
+    if hasattr(obj, "tolist") and type(obj).__module__ == "numpy":
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_numpy_default).encode("utf-8")
+
+def _orjson_dumps(obj):
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # orjson 不支持的类型（如超过 64 位的整数）交给标准库处理，行为与原来一致
+        return _stdlib_dumps(obj)
+
+def _ujson_dumps(obj):
+    return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+
+def _build_codecs():
+    codecs = {}
+    if orjson is not None:
+        codecs["orjson"] = JsonCodec("orjson", _orjson_dumps, orjson.loads)
+    if ujson is not None:
+        codecs["ujson"] = JsonCodec("ujson", _ujson_dumps, ujson.loads)
+    codecs["json"] = JsonCodec("json", _stdlib_dumps, json.loads)
+    return codecs
+
+CODECS = _build_codecs()
+
+def get_codec(name=None):
+    """
+    返回 JSON 编解码器：优先 orjson，其次 ujson，最后标准库 json；
+    name（或环境变量 ZABBIX_JSON_CODEC）指定的实现未安装时记录警告并自动选择
+    """
+    name = name or JSON_CODEC
+    if name:
+        codec = CODECS.get(name)
+        if codec is not None:
+            return codec
+        logger.warning(f"JSON codec '{name}' is not available, using {next(iter(CODECS))}")
+    return next(iter(CODECS.values()))
+
+def encode_body(payload, codec, compress_min_bytes=COMPRESS_MIN_BYTES):
+    """
+    序列化请求负载，返回 (请求体, 额外的请求头)；
+    compress_min_bytes 大于 0 且请求体不小于该值时用 gzip 压缩
+    """
+    body = codec.dumps(payload)
+    if compress_min_bytes and len(body) >= compress_min_bytes:
+        return gzip.compress(body, compresslevel=1), {"Content-Encoding": "gzip"}
+    return body, {}
+
+def decode_body(data, content_encoding=None):
+    """
+    按 Content-Encoding 解压字节串（requests 已自动解压响应，这里用于服务端解压请求体）；
+    未压缩时原样返回
+    """
+    encoding = (content_encoding or "").strip().lower()
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            return zlib.decompress(data, -zlib.MAX_WBITS)  # 不带 zlib 头的原始 deflate 流
+    return data
+
+def history_rows_to_arrays(rows, history):
+    """
+    将 history.get 结果转换为 (itemids, clocks, values) NumPy 数组：
+    数值类型（0 浮点、3 整数）直接逐项转换写入定长数组，不经过中间 list；其它类型为 object 数组
+    """
+    import numpy as np
+    count = len(rows)
+    itemids = np.fromiter(map(int, map(itemgetter("itemid"), rows)), dtype=np.int64, count=count)
+    clocks = np.fromiter(map(int, map(itemgetter("clock"), rows)), dtype=np.int64, count=count)
+    if int(history) == 0:
+        values = np.fromiter(map(float, map(itemgetter("value"), rows)), dtype=np.float64, count=count)
+    elif int(history) == 3:
+        values = np.fromiter(map(int, map(itemgetter("value"), rows)), dtype=np.uint64, count=count)
+    else:
+        values = np.array([row["value"] for row in rows], dtype=object)
+    return itemids, clocks, values
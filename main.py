@@ -0,0 +1,103 @@
+import os
+import sys
+import logging
+import argparse
+from typing import Iterable, Iterator, Optional
+import pandas as pd
+from host_management import ExportHostManagement
+from host_record import HostRecord
+from export_host import EXPORT_COLUMNS, open_row_writer, write_record
+from jiankong import trigger_frame_from_records, build_monitoring_matrix
+from api_metrics import get_metrics
+from zabbix_api import ZabbixAPIException
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", encoding='utf-8')
+
+DEFAULT_OUTPUT = r"C:\software\处理后监控数据.xlsx"
+
+def tee_inventory(records: Iterable[HostRecord], writer) -> Iterator[HostRecord]:
+    """将主机记录逐行写入主机清单（与 export_host 导出格式一致），同时原样向下游产出"""
+    for record in records:
+        write_record(writer, record)
+        yield record
+
+def write_frame(df: pd.DataFrame, output_path: str) -> None:
+    """按扩展名写出 DataFrame（.csv 使用 utf-8-sig，其它按 Excel 写出）"""
+    if os.path.splitext(output_path)[1].lower() == ".csv":
+        df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    else:
+        df.to_excel(output_path, index=False)
+
+def run_audit(
+    output_path: str,
+    inventory_path: Optional[str] = None,
+    proxy_name: Optional[str] = None,
+    tag_name: Optional[str] = None,
+    tag_value: Optional[str] = None,
+    page_size: int = 500,
+    page_workers: int = 1
+) -> pd.DataFrame:
+    """
+    主机导出 -> 监控矩阵的内存流水线：分页获取主机，直接展开为触发器表并生成监控矩阵，
+    只写出最终的监控矩阵（inventory_path 不为空时在同一次遍历中另外流式写出主机清单），
+    不再经过中间 Excel 文件的写出和读回。
+
+    Returns:
+        pd.DataFrame: 监控矩阵
+
+    Raises:
+        ZabbixAPIException: 主机获取失败（此时不写出监控矩阵）
+    """
+    manager = ExportHostManagement(page_size=page_size, page_workers=page_workers)
+    records = manager.iter_host_info(proxy_name=proxy_name, tag_name=tag_name, tag_value=tag_value)
+
+    writer = open_row_writer(inventory_path, EXPORT_COLUMNS) if inventory_path else None
+    try:
+        if writer is not None:
+            records = tee_inventory(records, writer)
+        triggers = trigger_frame_from_records(records)
+    except ZabbixAPIException:
+        # 主机获取中途失败：不写出不完整的监控矩阵
+        logging.error("主机获取失败，未生成监控矩阵" + (f"，主机清单不完整: {inventory_path}" if inventory_path else ""))
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+    if inventory_path:
+        logging.info(f"主机清单已写出到: {inventory_path}")
+
+    matrix = build_monitoring_matrix(triggers)
+    write_frame(matrix, output_path)
+    logging.info(f"处理完成，{len(triggers)} 条触发器生成 {len(matrix)} 行监控矩阵: {output_path}")
+    return matrix
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zabbix 主机导出与监控矩阵生成（单次内存流水线）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"监控矩阵输出文件（.xlsx/.csv，默认：{DEFAULT_OUTPUT}）")
+    parser.add_argument("--inventory", help="同时写出主机清单（.xlsx/.csv/.parquet，可选）")
+    parser.add_argument("--proxy", help="按代理名称过滤（示例：Proxy_JY_RD001）")
+    parser.add_argument("--tag-name", help="标签名称（需配合--tag-value使用）")
+    parser.add_argument("--tag-value", help="标签值（需配合--tag-name使用）")
+    parser.add_argument("--page-size", type=int, default=500, help="分页获取主机时每页主机数（默认：500）")
+    parser.add_argument("--workers", type=int, default=1, help="同时获取的主机页数（默认：1）")
+    parser.add_argument("--metrics-json", help="将 API 调用统计写入该 JSON 文件")
+    args = parser.parse_args()
+
+    exit_code = 0
+    try:
+        run_audit(
+            args.output,
+            inventory_path=args.inventory,
+            proxy_name=args.proxy,
+            tag_name=args.tag_name,
+            tag_value=args.tag_value,
+            page_size=args.page_size,
+            page_workers=args.workers
+        )
+    except ZabbixAPIException:
+        exit_code = 1
+
+    print(get_metrics().format_summary())
+    if args.metrics_json:
+        get_metrics().dump_json(args.metrics_json)
+    sys.exit(exit_code)
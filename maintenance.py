@@ -2,6 +2,9 @@ import csv  # 导入csv模块，用于处理CSV文件读取
 from datetime import datetime, timedelta  # 从datetime模块导入datetime和timedelta类，用于时间操作
 from pytz import timezone  # 导入pytz模块，用于时区处理
 from zabbix_api import ZabbixAPI  # 导入zabbix_api模块，用于与Zabbix进行API交互
+from config_cache import get_config_cache  # 导入本地配置缓存，避免重复查询主机
+from maintenance_planner import plan_maintenances  # 导入维护窗口合并规划
+from api_metrics import get_metrics  # 导入 API 调用统计，结束时打印汇总
 
 # 自定义维护名称前缀，可以根据需要修改
 MAINTENANCE_NAME_PREFIX = "补丁维护"  # 维护模式的名称前缀，用于区分不同的维护任务
@@ -9,7 +12,8 @@ MAINTENANCE_NAME_PREFIX = "补丁维护"  # 维护模式的名称前缀，用于
 class Maintenance:
     def __init__(self):
         """初始化 Zabbix API 连接"""
-        self.zabbix_api = ZabbixAPI()  # 创建ZabbixAPI实例，用于后续与Zabbix API的交互
+        self.zabbix_api = ZabbixAPI(lazy_login=True)  # 创建ZabbixAPI实例，首次调用API时才登录
+        self.cache = get_config_cache()  # 主机名称 -> 主机ID 的本地缓存
 
     def get_host_id_by_ip(self, ip_address):
         """
@@ -18,21 +22,13 @@ class Maintenance:
         :return: 主机 ID 或 None（如果未找到主机）
         """
         try:
-            # 使用 ZabbixAPI 的 call_api 方法调用 'host.get'，根据 IP 地址过滤主机
-            response = self.zabbix_api.call_api('host.get', {
-                'filter': {'host': ip_address},  # 根据主机名称过滤主机
-                'output': ['hostid', 'host'],  # 输出主机的ID和名称
-                'selectInterfaces': 'ip'  # 选择接口的IP地址，作为查询条件
-            })
-
-            # 打印返回的响应，帮助调试
-            print(f"API response: {response}")
+            # 主机名称即 IP 地址：优先读取本地缓存，未命中时调用 'host.get' 按主机名称过滤
+            host = self.cache.lookup(self.zabbix_api, 'host', ip_address)
 
-            # 遍历返回的主机信息，检查主机名称是否与IP地址匹配
-            for host in response.get('result', []):
-                if host.get('host') == ip_address:  # 如果返回的主机名称与给定IP地址匹配
-                    print(f"Found host with IP {ip_address}: {host['hostid']}")  # 打印找到的主机ID
-                    return host['hostid']  # 返回主机ID
+            # 检查主机名称是否与IP地址匹配
+            if host and host.get('host') == ip_address:  # 如果返回的主机名称与给定IP地址匹配
+                print(f"Found host with IP {ip_address}: {host['hostid']}")  # 打印找到的主机ID
+                return host['hostid']  # 返回主机ID
 
             print(f"No host found with IP address {ip_address}")  # 如果没有找到对应的主机
             return None  # 返回None，表示未找到主机
@@ -67,34 +63,101 @@ class Maintenance:
         :return: 维护模式 ID 或 None（如果创建失败）
         """
         try:
-            tz = timezone('Asia/Shanghai')  # 设置时区为上海
-            # 将开始时间和结束时间转换为 Unix 时间戳
-            start_time_unix = int(tz.localize(start_time).timestamp())
-            end_time_unix = int(tz.localize(end_time).timestamp())
-
             # 如果同名维护已经存在，则跳过创建
             if self.maintenance_exists(maintenance_name):
                 print(f"Maintenance '{maintenance_name}' already exists. Skipping creation.")  # 打印信息
                 return  # 如果维护已存在，跳过创建
 
             # 使用 ZabbixAPI 的 call_api 方法调用 'maintenance.create' 来创建维护模式
-            maintenance_id = self.zabbix_api.call_api('maintenance.create', {
-                "name": maintenance_name,  # 维护模式名称
-                "active_since": start_time_unix,  # 维护开始的时间戳
-                "active_till": end_time_unix,  # 维护结束的时间戳
-                "hostids": host_ids,  # 维护的主机ID列表
-                "timeperiods": [{
-                    "timeperiod_type": 0,  # 维护类型为指定时间段
-                    "start_date": start_time_unix,  # 开始时间
-                    "period": end_time_unix - start_time_unix  # 维护的持续时间
-                }]
-            })
+            maintenance_id = self.zabbix_api.call_api(
+                'maintenance.create', self.build_maintenance_params(start_time, end_time, host_ids, maintenance_name)
+            )
             print(f"Created maintenance '{maintenance_name}' with ID: {maintenance_id}")  # 打印创建成功的信息
             return maintenance_id  # 返回创建的维护模式ID
         except Exception as e:
             print(f"Error creating maintenance '{maintenance_name}': {e}")  # 捕捉并打印异常信息
             return None  # 如果创建失败，返回None
 
+    def build_maintenance_params(self, start_time, end_time, host_ids, maintenance_name):
+        """
+        构造 maintenance.create 参数
+        :param start_time: 维护开始的本地时间
+        :param end_time: 维护结束的本地时间
+        :param host_ids: 主机 ID 的列表
+        :param maintenance_name: 维护模式的名称
+        :return: maintenance.create 参数字典
+        """
+        # 将开始时间和结束时间转换为 Unix 时间戳
+        start_time_unix = self.to_unix(start_time)
+        end_time_unix = self.to_unix(end_time)
+        return {
+            "name": maintenance_name,  # 维护模式名称
+            "active_since": start_time_unix,  # 维护开始的时间戳
+            "active_till": end_time_unix,  # 维护结束的时间戳
+            "hostids": host_ids,  # 维护的主机ID列表
+            "timeperiods": [{
+                "timeperiod_type": 0,  # 维护类型为指定时间段
+                "start_date": start_time_unix,  # 开始时间
+                "period": end_time_unix - start_time_unix  # 维护的持续时间
+            }]
+        }
+
+    def to_unix(self, local_time):
+        """
+        将上海时区的本地时间转换为 Unix 时间戳
+        :param local_time: 不带时区的 datetime 对象
+        :return: Unix 时间戳
+        """
+        tz = timezone('Asia/Shanghai')  # 设置时区为上海
+        return int(tz.localize(local_time).timestamp())
+
+    def get_host_ids_by_ips(self, ip_addresses):
+        """
+        一次 'host.get' 批量解析多个 IP 地址（主机名称即 IP 地址）
+        :param ip_addresses: IP 地址列表
+        :return: {IP 地址: 主机 ID}，未找到的 IP 不在结果中
+        """
+        ip_addresses = sorted(set(ip_addresses))
+        if not ip_addresses:
+            return {}
+        response = self.zabbix_api.call_api('host.get', {
+            'filter': {'host': ip_addresses},  # 按主机名称批量过滤
+            'output': ['hostid', 'host', 'name']
+        })
+        host_ids = {}
+        for host in response.get('result', []):
+            self.cache.put('host', host['host'], host)  # 顺便写入本地缓存
+            host_ids[host['host']] = host['hostid']
+        return host_ids
+
+    def get_existing_maintenance_names(self, name_prefix=MAINTENANCE_NAME_PREFIX):
+        """
+        一次 'maintenance.get' 获取所有以指定前缀开头的维护名称
+        :param name_prefix: 维护名称前缀
+        :return: 维护名称集合
+        """
+        response = self.zabbix_api.call_api('maintenance.get', {
+            'search': {'name': name_prefix},  # 按名称前缀搜索
+            'startSearch': True,  # 只匹配以前缀开头的名称
+            'output': ['name']
+        })
+        return {maintenance['name'] for maintenance in response.get('result', [])}
+
+    def get_existing_maintenances(self, name_prefix=MAINTENANCE_NAME_PREFIX):
+        """
+        一次 'maintenance.get' 获取以指定前缀开头的维护，包含主机和时间段，供合并规划使用
+        :param name_prefix: 维护名称前缀
+        :return: 维护列表
+        """
+        response = self.zabbix_api.call_api('maintenance.get', {
+            'search': {'name': name_prefix},  # 按名称前缀搜索
+            'startSearch': True,  # 只匹配以前缀开头的名称
+            'output': ['maintenanceid', 'name', 'active_since', 'active_till'],
+            'selectHosts': ['hostid'],  # 维护包含的主机
+            'selectTimeperiods': ['timeperiod_type', 'start_date', 'period']  # 维护的时间段
+        })
+        return response.get('result', [])
+
     def parse_time(self, date_str, time_str):
         """
         解析时间，处理 '24:00' 为次日的 '00:00'
@@ -108,46 +171,57 @@ class Maintenance:
         # 否则，正常解析日期和时间
         return datetime.strptime(f"{date_str} {time_str}", '%Y/%m/%d %H:%M')
 
-    def read_and_process_csv(self, file_path):
+    def parse_csv(self, file_path):
         """
-        读取 CSV 文件，解析数据并创建维护模式
+        读取 CSV 文件，按调整后的时间段对 IP 地址分组
         :param file_path: CSV 文件路径
+        :return: {(开始时间, 结束时间, 维护名称): [IP 地址, ...]}
         """
-        try:
-            # 用于存储同一时间段下对应的主机 ID 列表，避免重复创建维护
-            maintenance_dict = {}
+        # 用于存储同一时间段下对应的 IP 列表，避免重复创建维护
+        maintenance_dict = {}
+
+        with open(file_path, mode='r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)  # 创建 CSV 文件读取器
+            next(reader)  # 跳过 CSV 文件的表头
+            for row in reader:  # 遍历每一行
+                ip_address, time_range_str = row[0], row[1]  # 获取每行中的IP地址和时间范围
 
-            with open(file_path, mode='r', newline='', encoding='utf-8') as file:
-                reader = csv.reader(file)  # 创建 CSV 文件读取器
-                next(reader)  # 跳过 CSV 文件的表头
-                for row in reader:  # 遍历每一行
-                    ip_address, time_range_str = row[0], row[1]  # 获取每行中的IP地址和时间范围
+                # 分离日期和时间范围，时间范围格式为 'YYYY/MM/DD HH:MM-HH:MM'
+                date_str, time_range = time_range_str.split(' ')
+                start_time_str, end_time_str = time_range.split('-')
 
-                    # 分离日期和时间范围，时间范围格式为 'YYYY/MM/DD HH:MM-HH:MM'
-                    date_str, time_range = time_range_str.split(' ')
-                    start_time_str, end_time_str = time_range.split('-')
+                # 解析开始和结束时间
+                start_time = self.parse_time(date_str, start_time_str)
+                end_time = self.parse_time(date_str, end_time_str)
 
-                    # 解析开始和结束时间
-                    start_time = self.parse_time(date_str, start_time_str)
-                    end_time = self.parse_time(date_str, end_time_str)
+                # 如果结束时间小于等于开始时间，说明跨天，需要加一天
+                if end_time <= start_time:
+                    end_time += timedelta(days=1)
 
-                    # 如果结束时间小于等于开始时间，说明跨天，需要加一天
-                    if end_time <= start_time:
-                        end_time += timedelta(days=1)
+                # 在原始时间上提前 30 分钟开始，延后 30 分钟结束
+                start_time_adjusted = start_time - timedelta(minutes=30)
+                end_time_adjusted = end_time + timedelta(minutes=30)
 
-                    # 在原始时间上提前 30 分钟开始，延后 30 分钟结束
-                    start_time_adjusted = start_time - timedelta(minutes=30)
-                    end_time_adjusted = end_time + timedelta(minutes=30)
+                # 生成维护名称（自定义前缀 + 时间范围），便于区分
+                maintenance_name = f"{MAINTENANCE_NAME_PREFIX}-{start_time_adjusted.strftime('%Y-%m-%d %H:%M')}-{end_time_adjusted.strftime('%Y-%m-%d %H:%M')}"
 
-                    # 生成维护名称（自定义前缀 + 时间范围），便于区分
-                    maintenance_name = f"{MAINTENANCE_NAME_PREFIX}-{start_time_adjusted.strftime('%Y-%m-%d %H:%M')}-{end_time_adjusted.strftime('%Y-%m-%d %H:%M')}"
+                # 将相同时间段的主机归为一组
+                maintenance_dict.setdefault((start_time_adjusted, end_time_adjusted, maintenance_name), []).append(ip_address)
 
-                    # 将相同时间段的主机归为一组
-                    maintenance_dict.setdefault((start_time_adjusted, end_time_adjusted, maintenance_name), []).append(self.get_host_id_by_ip(ip_address))
+        return maintenance_dict
+
+    def read_and_process_csv(self, file_path):
+        """
+        读取 CSV 文件，解析数据并创建维护模式
+        :param file_path: CSV 文件路径
+        """
+        try:
+            maintenance_dict = self.parse_csv(file_path)
 
             # 遍历所有时间段，创建维护模式
-            for (start_time, end_time, maintenance_name), host_ids in maintenance_dict.items():
-                # 过滤掉 None 值，确保主机ID列表有效
+            for (start_time, end_time, maintenance_name), ip_addresses in maintenance_dict.items():
+                # 逐个解析主机ID，过滤掉 None 值，确保主机ID列表有效
+                host_ids = [self.get_host_id_by_ip(ip_address) for ip_address in ip_addresses]
                 host_ids = [host_id for host_id in host_ids if host_id is not None]
                 if host_ids:
                     # 调用 create_maintenance 方法创建维护
@@ -156,9 +230,124 @@ class Maintenance:
         except Exception as e:
             print(f"Error processing CSV file: {e}")  # 捕捉并打印异常信息
 
-# CSV 文件路径
-csv_file_path = r'C:\software\maintenance.csv'
+    def submit_maintenances(self, method, maintenances):
+        """
+        用一次 'maintenance.create' / 'maintenance.update' 数组调用提交全部维护；
+        整批失败时（Zabbix 会整批回滚）退回逐个提交，定位具体出错的维护，其余维护照常提交
+        :param method: 'maintenance.create' 或 'maintenance.update'
+        :param maintenances: 维护参数列表
+        :return: 成功提交的维护 ID 列表
+        """
+        try:
+            response = self.zabbix_api.call_api(method, maintenances)
+            return response.get('result', {}).get('maintenanceids', [])
+        except Exception as e:
+            print(f"Bulk {method} of {len(maintenances)} maintenances failed, submitting one by one: {e}")
+        maintenance_ids = []
+        for params in maintenances:
+            try:
+                response = self.zabbix_api.call_api(method, params)
+                maintenance_ids.extend(response.get('result', {}).get('maintenanceids', []))
+            except Exception as e:
+                label = params.get('name') or params.get('maintenanceid')
+                print(f"Error submitting maintenance '{label}' ({method}): {e}")
+        return maintenance_ids
+
+    def read_and_process_csv_bulk(self, file_path):
+        """
+        批量模式处理 CSV：一次 'host.get' 解析全部 IP，一次 'maintenance.get' 获取已存在的维护，
+        再用一次 'maintenance.create' 数组创建所有新的维护（失败时退回逐个创建）
+        :param file_path: CSV 文件路径
+        :return: 新建的维护 ID 列表
+        """
+        try:
+            maintenance_dict = self.parse_csv(file_path)
+
+            # 批量解析所有 IP 对应的主机 ID
+            all_ips = [ip for ip_addresses in maintenance_dict.values() for ip in ip_addresses]
+            host_ids_by_ip = self.get_host_ids_by_ips(all_ips)
+            for ip_address in sorted(set(all_ips) - set(host_ids_by_ip)):
+                print(f"No host found with IP address {ip_address}")  # 没有找到对应的主机
+
+            # 一次性获取已存在的同前缀维护，跳过同名维护
+            existing_names = self.get_existing_maintenance_names()
+
+            maintenances = []
+            for (start_time, end_time, maintenance_name), ip_addresses in maintenance_dict.items():
+                if maintenance_name in existing_names:
+                    print(f"Maintenance '{maintenance_name}' already exists. Skipping creation.")
+                    continue
+                # 去重并过滤掉未找到的主机
+                host_ids = sorted({host_ids_by_ip[ip] for ip in ip_addresses if ip in host_ids_by_ip})
+                if host_ids:
+                    maintenances.append(self.build_maintenance_params(start_time, end_time, host_ids, maintenance_name))
+
+            if not maintenances:
+                print("No new maintenance to create.")
+                return []
+
+            maintenance_ids = self.submit_maintenances('maintenance.create', maintenances)
+            print(f"Created {len(maintenance_ids)} maintenances: {maintenance_ids}")
+            return maintenance_ids
+        except Exception as e:
+            print(f"Error processing CSV file: {e}")  # 捕捉并打印异常信息
+            return []
+
+    def read_and_process_csv_planned(self, file_path, extend_existing=False, gap_minutes=0):
+        """
+        合并规划模式处理 CSV：每个主机的重叠/相邻窗口合并，合并后时段相同的主机共用一个维护（多个时间段），
+        最终用一次 'maintenance.create'（以及一次 'maintenance.update'）提交，整批失败时退回逐个提交
+        :param file_path: CSV 文件路径
+        :param extend_existing: 是否扩展已存在的同前缀维护（会覆盖其主机和时间段，需显式开启；默认跳过同名维护）
+        :param gap_minutes: 间隔不超过该分钟数的窗口也会合并
+        :return: 规划结果（见 maintenance_planner.plan_maintenances）
+        """
+        try:
+            maintenance_dict = self.parse_csv(file_path)
+
+            # 批量解析所有 IP 对应的主机 ID
+            all_ips = [ip for ip_addresses in maintenance_dict.values() for ip in ip_addresses]
+            host_ids_by_ip = self.get_host_ids_by_ips(all_ips)
+            for ip_address in sorted(set(all_ips) - set(host_ids_by_ip)):
+                print(f"No host found with IP address {ip_address}")  # 没有找到对应的主机
+
+            windows = []
+            for (start_time, end_time, _), ip_addresses in maintenance_dict.items():
+                host_ids = {host_ids_by_ip[ip] for ip in ip_addresses if ip in host_ids_by_ip}
+                if host_ids:
+                    windows.append((self.to_unix(start_time), self.to_unix(end_time), host_ids))
+
+            if extend_existing:
+                existing, skip_names = self.get_existing_maintenances(), None
+            else:
+                # 不扩展已有维护时与批量模式一致：跳过同名维护，重复执行不会重复创建
+                existing, skip_names = None, self.get_existing_maintenance_names()
+            plan = plan_maintenances(
+                windows, MAINTENANCE_NAME_PREFIX, existing=existing, gap=gap_minutes * 60, skip_names=skip_names
+            )
+            for name in plan["skipped"]:
+                print(f"Maintenance '{name}' already exists. Skipping creation.")
+
+            if plan["create"]:
+                print(f"Created maintenances: {self.submit_maintenances('maintenance.create', plan['create'])}")
+            if plan["update"]:
+                print(f"Extended maintenances: {self.submit_maintenances('maintenance.update', plan['update'])}")
+
+            # 输出合并效果
+            print(
+                f"{plan['windows']} maintenance windows -> {plan['maintenances']} maintenances "
+                f"({len(plan['create'])} created, {len(plan['update'])} extended)"
+            )
+            return plan
+        except Exception as e:
+            print(f"Error processing CSV file: {e}")  # 捕捉并打印异常信息
+            return None
+
+if __name__ == "__main__":
+    # CSV 文件路径
+    csv_file_path = r'C:\software\maintenance.csv'
 
-# 读取并处理 CSV 文件
-maintenance = Maintenance()  # 创建 Maintenance 类的实例
-maintenance.read_and_process_csv(csv_file_path)  # 调用方法，处理 CSV 文件
+    # 读取并处理 CSV 文件
+    maintenance = Maintenance()  # 创建 Maintenance 类的实例
+    maintenance.read_and_process_csv_planned(csv_file_path)  # 合并规划后批量创建维护
+    print(get_metrics().format_summary())
@@ -0,0 +1,128 @@
+from datetime import datetime
+from pytz import timezone  # 导入pytz模块，用于时区处理
+
+TIMEZONE = timezone('Asia/Shanghai')  # 维护名称中的时间按上海时区显示
+
+def merge_intervals(intervals, gap=0):
+    """
+    区间合并：将重叠或间隔不超过 gap 秒的区间合并为一个
+    :param intervals: [(开始时间戳, 结束时间戳), ...]
+    :param gap: 允许合并的最大间隔（秒），0 表示仅合并重叠或首尾相接的区间
+    :return: 按开始时间排序、互不重叠的区间列表
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], end)  # 与上一个区间重叠或相邻，向后扩展
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def _format_name(name_prefix, start, end):
+    """生成维护名称：前缀 + 总体开始时间 + 总体结束时间"""
+    start_str = datetime.fromtimestamp(start, TIMEZONE).strftime('%Y-%m-%d %H:%M')
+    end_str = datetime.fromtimestamp(end, TIMEZONE).strftime('%Y-%m-%d %H:%M')
+    return f"{name_prefix}-{start_str}-{end_str}"
+
+def _timeperiods(intervals):
+    """将区间转换为 Zabbix 一次性维护时间段（timeperiod_type 0）"""
+    return [
+        {"timeperiod_type": 0, "start_date": start, "period": end - start}
+        for start, end in intervals
+    ]
+
+def _existing_intervals(maintenance):
+    """从 maintenance.get 结果中取出一次性时间段的区间"""
+    return [
+        (int(period["start_date"]), int(period["start_date"]) + int(period["period"]))
+        for period in maintenance.get("timeperiods", [])
+        if str(period.get("timeperiod_type")) == "0"
+    ]
+
+def _touches(intervals_a, intervals_b, gap):
+    """判断两组区间中是否存在重叠或间隔不超过 gap 的区间"""
+    return any(
+        start_a <= end_b + gap and start_b <= end_a + gap
+        for start_a, end_a in intervals_a
+        for start_b, end_b in intervals_b
+    )
+
+def _group_hosts(windows, gap):
+    """
+    按主机合并区间：每个主机只合并它自己所在窗口的区间（重叠或间隔不超过 gap），
+    合并后区间完全相同的主机归为一组。
+    每组返回 (合并后的区间列表, 主机ID列表)，任何主机都不会被放进不属于它的时间段
+    """
+    intervals_by_host = {}
+    for start, end, host_ids in windows:
+        for host_id in host_ids:
+            intervals_by_host.setdefault(host_id, []).append((start, end))
+
+    groups = {}
+    for host_id, intervals in intervals_by_host.items():
+        groups.setdefault(tuple(merge_intervals(intervals, gap)), []).append(host_id)
+    return [(list(intervals), sorted(hosts)) for intervals, hosts in groups.items()]
+
+def plan_maintenances(windows, name_prefix, existing=None, gap=0, skip_names=None):
+    """
+    维护窗口合并规划
+
+    1. 按主机合并其所在窗口的区间（重叠/相邻的补丁时段只保留一个区间），合并后区间完全相同的主机
+       共用一个维护，多个区间作为该维护的多个时间段；每个主机的维护时段不超出它自己的窗口；
+    2. 若已存在主机集合相同且时间重叠/相邻的维护（existing），则扩展该维护（maintenance.update），不再新建；
+    3. 名称在 skip_names 中的新维护直接跳过（不扩展已有维护时用于避免重复创建）。
+
+    :param windows: [(开始时间戳, 结束时间戳, 主机ID列表), ...]
+    :param name_prefix: 维护名称前缀
+    :param existing: maintenance.get 结果（需包含 maintenanceid、name、hosts、timeperiods），为空时不扩展已有维护
+    :param gap: 允许合并的最大间隔（秒）
+    :param skip_names: 已存在的维护名称集合，同名的新维护不再创建
+    :return: {"create": [...], "update": [...], "skipped": [...], "windows": 原窗口数, "maintenances": 规划后的维护数}
+             create/update 中的元素可直接作为 maintenance.create / maintenance.update 的参数，skipped 为跳过的名称
+    """
+    windows = [(start, end, host_ids) for start, end, host_ids in windows if host_ids]
+    existing = existing or []
+    skip_names = set(skip_names or ())
+    used_existing = set()
+    used_names = {maintenance["name"] for maintenance in existing}
+    plan = {"create": [], "update": [], "skipped": [], "windows": len(windows), "maintenances": 0}
+
+    for intervals, host_ids in sorted(_group_hosts(windows, gap)):
+        # 2. 优先扩展主机集合相同、时间重叠或相邻的已有维护
+        match = next((
+            maintenance for maintenance in existing
+            if maintenance["maintenanceid"] not in used_existing
+            and sorted(h["hostid"] for h in maintenance.get("hosts", [])) == host_ids
+            and _touches(_existing_intervals(maintenance), intervals, gap)
+        ), None)
+        if match is not None:
+            used_existing.add(match["maintenanceid"])
+            merged = merge_intervals(list(intervals) + _existing_intervals(match), gap)
+            plan["update"].append({
+                "maintenanceid": match["maintenanceid"],
+                "active_since": min(int(match["active_since"]), merged[0][0]),
+                "active_till": max(int(match["active_till"]), merged[-1][1]),
+                "hostids": host_ids,
+                "timeperiods": _timeperiods(merged)
+            })
+            continue
+
+        # 3. 新建维护：同名维护已存在时跳过，本次规划内名称重复时追加序号
+        name = _format_name(name_prefix, intervals[0][0], intervals[-1][1])
+        if name in skip_names:
+            plan["skipped"].append(name)
+            continue
+        unique_name, suffix = name, 2
+        while unique_name in used_names:
+            unique_name, suffix = f"{name}-{suffix}", suffix + 1
+        used_names.add(unique_name)
+        plan["create"].append({
+            "name": unique_name,
+            "active_since": intervals[0][0],
+            "active_till": intervals[-1][1],
+            "hostids": host_ids,
+            "timeperiods": _timeperiods(intervals)
+        })
+
+    plan["maintenances"] = len(plan["create"]) + len(plan["update"])
+    return plan
@@ -1,49 +1,92 @@
-import json
-from zabbix_api import ZabbixAPI
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+from zabbix_api import ZabbixAPI, ZabbixAPIException
+from config_cache import get_config_cache
 
 class Proxy:
+    """
+    代理目录：首次查询时加载全部代理，按名称和 ID 建立内存索引，之后的查询都不访问 API。
+    本地配置缓存中有未过期的完整代理列表时直接使用（不调用 API），否则一次 proxy.get 全量加载并写回缓存；
+    代理有增删时调用 refresh() 重新加载。加载失败时抛出 ZabbixAPIException，并记住该错误，
+    之后的查询直接抛出同一错误而不再重复请求（refresh() 可重试）。
+    """
     def __init__(self):
-        """初始化 Zabbix API 连接"""
-        self.zabbix_api = ZabbixAPI()
+        """初始化 Zabbix API 连接（首次调用 API 时才登录）"""
+        self.zabbix_api = ZabbixAPI(lazy_login=True)
+        self.cache = get_config_cache()
+        self.by_name: Dict[str, dict] = {}
+        self.by_id: Dict[str, dict] = {}
+        self.loaded = False
+        self.load_error: Optional[ZabbixAPIException] = None
+        self.lock = threading.Lock()
 
-    def get_proxy_info(self, agent_name: str) -> str:
+    def _index(self, proxies: List[dict]) -> None:
+        self.by_name = {proxy["host"]: proxy for proxy in proxies}
+        self.by_id = {proxy["proxyid"]: proxy for proxy in proxies}
+        self.loaded = True
+        self.load_error = None
+
+    def refresh(self) -> None:
+        """通过 API 重新加载全部代理（增量刷新本地配置缓存）并重建索引"""
+        with self.lock:
+            try:
+                self.cache.refresh(self.zabbix_api, "proxy")
+            except ZabbixAPIException as e:
+                logging.error(f"加载代理列表失败: {e}")
+                self.load_error = e
+                raise
+            self._index(self.cache.get_all("proxy") or [])
+
+    def _ensure_loaded(self) -> None:
+        if self.loaded:
+            return
+        if self.load_error is not None:
+            raise self.load_error
+        with self.lock:
+            cached = self.cache.get_all("proxy")
+            if cached is not None:
+                self._index(cached)
+                return
+        self.refresh()
+
+    def get_proxy_info(self, agent_name: str) -> dict:
         """
-        获取指定代理服务器的信息（通过代理名称查询）。
+        获取指定代理服务器的信息（通过代理名称查询），不存在时返回空字典；代理列表加载失败时抛出 ZabbixAPIException。
         """
-        try:
-            params = {
-                "filter": {"host": agent_name},
-                "output": ["proxyid", "host", "proxy_address"]
-            }
-            response = self.zabbix_api.call_api("proxy.get", params)
-            if response.get("result"):
-                proxy_info = {
-                    "agent_name": agent_name,
-                    "proxy_id": response["result"][0]["proxyid"],
-                    "host": response["result"][0]["host"],
-                    "proxy_address": response["result"][0]["proxy_address"]
-                }
-                return json.dumps(proxy_info, indent=4)
-            else:
-                return json.dumps({}, indent=4)
-        except Exception as e:
-            print(f"Error retrieving proxy info: {e}")
-            return json.dumps({}, indent=4)
+        self._ensure_loaded()
+        proxy = self.by_name.get(agent_name)
+        if not proxy:
+            return {}
+        return {
+            "agent_name": agent_name,
+            "proxy_id": proxy["proxyid"],
+            "host": proxy["host"],
+            "proxy_address": proxy.get("proxy_address", "")
+        }
 
     def get_proxy_info_by_id(self, proxy_id: str) -> dict:
         """
-        根据 proxyid 获取代理信息，返回字典格式数据。
+        根据 proxyid 获取代理信息（proxy.get 原始字段），不存在时返回空字典。
         """
-        try:
-            params = {
-                "filter": {"proxyid": proxy_id},
-                "output": ["proxyid", "host", "proxy_address"]
-            }
-            response = self.zabbix_api.call_api("proxy.get", params)
-            if response.get("result"):
-                return response["result"][0]
-            else:
-                return {}
-        except Exception as e:
-            print(f"Error retrieving proxy info by id: {e}")
-            return {}
+        self._ensure_loaded()
+        return self.by_id.get(proxy_id, {})
+
+    def get_proxy_name(self, proxy_id: Optional[str]) -> Optional[str]:
+        """根据 proxyid 返回代理名称，未使用代理（空或 "0"）或代理不存在时返回 None"""
+        if not proxy_id or proxy_id == "0":
+            return None
+        self._ensure_loaded()
+        proxy = self.by_id.get(proxy_id)
+        return proxy["host"] if proxy else None
+
+    def get_proxy_ids(self, agent_names: Iterable[Optional[str]]) -> Dict[str, str]:
+        """
+        解析多个代理名称，返回 {代理名称: proxyid}，不存在的名称不在结果中。
+        """
+        self._ensure_loaded()
+        return {
+            name: self.by_name[name]["proxyid"]
+            for name in {name for name in agent_names if name}
+            if name in self.by_name
+        }
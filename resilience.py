@@ -0,0 +1,132 @@
+import time
+import random
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 可以安全重试的只读方法（除 *.get 之外）
+READ_ONLY_METHODS = {"user.login", "apiinfo.version", "user.checkAuthentication"}
+
+# 表示前端过载或网关故障、可以稍后重试的 HTTP 状态码
+TRANSIENT_STATUS_CODES = {429, 502, 503, 504}
+
+def is_idempotent(method):
+    """判断 API 方法是否为只读（可重试）：*.get 或 READ_ONLY_METHODS 中的方法"""
+    return method.endswith(".get") or method in READ_ONLY_METHODS
+
+class RetryPolicy:
+    """
+    带抖动的指数退避：第 n 次重试前等待 [0, min(max_delay, base_delay * 2^n)] 内的随机时长（full jitter），
+    避免多个并发任务在同一时刻一起重试
+    """
+    def __init__(self, retries=3, base_delay=0.5, max_delay=30.0):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        """第 attempt 次重试（从 0 开始）前的等待时间（秒）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class AdaptiveRateLimiter:
+    """
+    AIMD 自适应限速：请求按当前速率均匀放行；
+    响应正常（耗时不超过 target_latency）时速率加性增长，每个正常响应增加 increase 次/秒，
+    响应变慢或出现过载错误时速率乘以 decrease（每 cooldown 秒最多下调一次，避免并发失败时连续下调）
+    """
+    def __init__(self, initial_rate=100.0, min_rate=1.0, max_rate=1000.0,
+                 target_latency=2.0, increase=1.0, decrease=0.5, cooldown=1.0):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self._next_slot = 0.0
+        self._last_decrease = 0.0
+
+    def acquire(self):
+        """等待下一个放行时刻（在锁外休眠，不阻塞其他线程计算各自的时刻）"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def on_success(self, latency):
+        if latency > self.target_latency:
+            self.on_overload()
+            return
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_overload(self):
+        with self.lock:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            previous = self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+        logger.warning(f"Zabbix 前端响应变慢或过载，请求速率由 {previous:.1f}/s 下调至 {self.rate:.1f}/s")
+
+class CircuitBreaker:
+    """
+    熔断器：连续 failure_threshold 次瞬时故障后打开，reset_timeout 秒内直接拒绝请求；
+    之后进入半开状态，只放行一个试探请求，成功则关闭，失败则重新打开
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """是否允许发送请求"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True  # 放行一个试探请求
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info("Zabbix 前端已恢复，熔断器关闭")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def release(self):
+        """
+        请求没有得到前端的结果（如请求体序列化失败）时调用：不计成功或失败，
+        半开状态下归还试探名额（回到打开状态，下一个请求立即重新试探）
+        """
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(f"Zabbix 前端连续 {self.failures} 次失败，熔断 {self.reset_timeout:.0f}s")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class Resilience:
+    """一个共享会话使用的重试策略、限速器和熔断器（同一会话的所有线程共用）"""
+    def __init__(self, retry=None, limiter=None, breaker=None):
+        self.retry = retry or RetryPolicy()
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.breaker = breaker or CircuitBreaker()
@@ -1,13 +1,15 @@
 import json
 from zabbix_api import ZabbixAPI
+from config_cache import get_config_cache
 
 class Template:
     def __init__(self):
-        self.zabbix_api = ZabbixAPI()
+        self.zabbix_api = ZabbixAPI(lazy_login=True)
+        self.cache = get_config_cache()
 
     def get_template_info(self, template_name):
         """
-        根据模板名称查询模板信息
+        根据模板名称查询模板信息（优先读取本地缓存）
 
         Args:
             template_name (str): 模板名称
@@ -16,17 +18,13 @@ class Template:
             str: 包含模板信息的 JSON 格式字符串
         """
         try:
-            # 获取模板信息
-            params = {
-                "filter": {"host": template_name},  # 过滤模板名称
-                "output": ["templateid", "host"]  # 只返回 templateid 和 host
-            }
-            response = self.zabbix_api.call_api("template.get", params)
+            # 获取模板信息（按 host 即模板名称过滤）
+            template = self.cache.lookup(self.zabbix_api, "template", template_name)
 
-            if response.get("result"):  # 确保返回了有效的结果
+            if template:  # 确保返回了有效的结果
                 template_info = {
-                    "template_id": response["result"][0]["templateid"],
-                    "name": response["result"][0]["host"]  # 这里返回的是 host（即模板名称）
+                    "template_id": template["templateid"],
+                    "name": template["host"]  # 这里返回的是 host（即模板名称）
                 }
                 return json.dumps(template_info, indent=4)  # 格式化输出 JSON
             else:
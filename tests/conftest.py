@@ -0,0 +1,24 @@
+import os
+import sys
+
+# 测试直接导入仓库根目录下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture
+def fake_zabbix(tmp_path, monkeypatch):
+    """启动本地替身 Zabbix（见 fake_zabbix_server.py），ZabbixAPI() 和配置缓存都指向它，返回 (server, backend)"""
+    import zabbix_api
+    import config_cache
+    from fake_zabbix_server import FakeZabbixServer, SimulatedBackend, Inventory
+
+    backend = SimulatedBackend(Inventory.generate(hosts=20))
+    with FakeZabbixServer(backend) as server:
+        zabbix_api.close_shared_sessions()
+        monkeypatch.setattr(zabbix_api, "ZABBIX_URL", server.url)
+        monkeypatch.setattr(config_cache, "_config_cache", config_cache.ConfigCache(
+            path=str(tmp_path / "cache.sqlite"), url=server.url
+        ))
+        yield server, backend
+        zabbix_api.close_shared_sessions()
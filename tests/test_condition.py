@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from condition import compile_condition, ConditionError
+
+@pytest.mark.parametrize("text, matching, other", [
+    ("NOT RUNNING", "state: NOT RUNNING", "RUNNING"),
+    ("(null)", "value=(null)", "null"),
+    ("AND gate", "AND gate 1", "gate"),
+])
+def test_unparsable_text_falls_back_to_contains(text, matching, other):
+    cond = compile_condition(text)
+    assert cond(matching)
+    assert not cond(other)
+    assert cond.evaluate([matching, other]).tolist() == [True, False]
+
+def test_plain_text_is_contains():
+    cond = compile_condition("ERROR")
+    assert cond("disk ERROR") and not cond("ok")
+
+def test_expressions_still_parse():
+    cond = compile_condition("between 10 and 20 or contains ERROR")
+    assert cond("15") and cond("ERROR") and not cond("5")
+    assert compile_condition("not >80")("50")
+    assert compile_condition("(>=1 and <3)").evaluate(np.array(["0", "2", "x"])).tolist() == [False, True, False]
+
+def test_empty_condition_raises():
+    with pytest.raises(ConditionError):
+        compile_condition("   ")
+
+@pytest.mark.parametrize("text", [">80%", "between 10 and", "<>5", "regex [", "contains", "not >80 and", "(>5"])
+def test_malformed_operator_conditions_raise(text):
+    with pytest.raises(ConditionError):
+        compile_condition(text)
@@ -0,0 +1,36 @@
+from host_create import HostManagement, sync_existing_hosts, plan_interface_change
+
+def _params(host_management, ip, host_type="agent"):
+    return host_management.build_host_params(ip, ip, ["2001"], ["3001"], host_type)
+
+def test_interface_drift_updates_only_the_main_interface(fake_zabbix):
+    server, backend = fake_zabbix
+    host = backend.inventory.hosts["10001"]
+    host["_interfaces"] = [
+        {"interfaceid": "70001", "type": "1", "main": "1", "useip": "1", "ip": "10.9.9.9", "dns": "", "port": "10050"},
+        {"interfaceid": "70002", "type": "2", "main": "1", "useip": "1", "ip": "10.8.8.8", "dns": "", "port": "161"},
+    ]
+    host["_groups"], host["_templates"], host["proxy_hostid"] = ["2001"], ["3001"], "0"
+    host_management = HostManagement()
+    results = {}
+    pending = sync_existing_hosts(host_management, [(0, host["host"], _params(host_management, host["host"]))], results)
+
+    assert pending == []
+    assert results[0]["status"] == "success" and "接口" in results[0]["message"]
+    interfaces = {i["interfaceid"]: i for i in host["_interfaces"]}
+    assert set(interfaces) == {"70001", "70002"}  # 接口 ID 不变，监控项关联不受影响
+    assert (interfaces["70001"]["ip"], interfaces["70001"]["type"]) == (host["host"], "1")
+    assert interfaces["70002"]["ip"] == "10.8.8.8"  # 其它接口保持不变
+
+def test_plan_interface_change():
+    host = {"hostid": "1", "interfaces": [
+        {"interfaceid": "7", "type": "1", "main": "1", "ip": "10.0.0.1", "port": "10050"},
+        {"interfaceid": "8", "type": "2", "main": "1", "ip": "10.0.0.2", "port": "161"},
+    ]}
+    agent = {"type": 1, "main": 1, "useip": 1, "ip": "10.0.0.1", "dns": "", "port": "10050"}
+    assert plan_interface_change(host, agent) is None
+    assert plan_interface_change(host, dict(agent, ip="10.0.0.9")) == (
+        "hostinterface.update", {"interfaceid": "7", "ip": "10.0.0.9", "port": "10050"}
+    )
+    method, params = plan_interface_change({"hostid": "1", "interfaces": []}, agent)
+    assert method == "hostinterface.create" and params["hostid"] == "1"
@@ -0,0 +1,26 @@
+from fake_zabbix_server import RpcError
+from host_management import ExportHostManagement
+
+def _fail_proxy_get(backend):
+    def fail(params):
+        raise RpcError(-32500, "Application error.", "proxy.get failed")
+    backend.m_proxy_get = fail
+
+def test_proxy_load_failure_degrades_to_no_proxy_name(fake_zabbix):
+    server, backend = fake_zabbix
+    _fail_proxy_get(backend)
+    records = list(ExportHostManagement(page_size=7).iter_host_info())
+    assert len(records) == len(backend.inventory.hosts)
+    assert all(record.proxy_name is None for record in records)
+
+def test_proxy_load_failure_with_proxy_filter_returns_no_hosts(fake_zabbix):
+    server, backend = fake_zabbix
+    _fail_proxy_get(backend)
+    manager = ExportHostManagement()
+    assert list(manager.iter_host_info(proxy_name="Proxy_JY_RD001")) == []
+    assert manager.get_host_info(proxy_name="Proxy_JY_RD001") == []
+
+def test_proxy_names_resolved(fake_zabbix):
+    server, backend = fake_zabbix
+    records = list(ExportHostManagement().iter_host_info(proxy_name="Proxy_JY_RD001"))
+    assert records and {record.proxy_name for record in records} == {"Proxy_JY_RD001"}
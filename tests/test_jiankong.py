@@ -0,0 +1,22 @@
+import pandas as pd
+from jiankong import INPUT_COLUMNS, MATRIX_COLUMNS, build_monitoring_matrix
+
+def test_header_only_sheet_gives_empty_matrix(tmp_path):
+    path = tmp_path / "header_only.xlsx"
+    pd.DataFrame(columns=INPUT_COLUMNS).to_excel(path, index=False)
+    matrix = build_monitoring_matrix(pd.read_excel(path))
+    assert matrix.empty
+    assert list(matrix.columns) == MATRIX_COLUMNS
+
+def test_matrix_groups_triggers_by_host():
+    df = pd.DataFrame([
+        ["10.0.0.1", "APP1", "proxy-a", "Ping 不可达"],
+        ["10.0.0.1", "APP1", "proxy-a", "进程 nginx 停止"],
+        ["10.0.0.1", "APP1", "proxy-a", "进程 redis 停止"],
+        ["10.0.0.2", "APP2", "proxy-b", "端口 8080 不通"],
+    ], columns=INPUT_COLUMNS)
+    matrix = build_monitoring_matrix(df)
+    assert matrix["IP地址"].tolist() == ["10.0.0.1", "10.0.0.1", "10.0.0.2"]
+    assert matrix["主机不可达监控"].tolist() == ["10.0.0.1", "", ""]
+    assert matrix["关键进程状态监控"].tolist() == ["10.0.0.1 | 进程 nginx 停止", "10.0.0.1 | 进程 redis 停止", ""]
+    assert matrix["关键端口状态监控"].tolist() == ["", "", "proxy-b | 10.0.0.2 | 端口 8080 不通"]
@@ -0,0 +1,32 @@
+import json
+import numpy as np
+import pytest
+from json_codec import CODECS, encode_body, decode_body
+
+# JSON 原生类型：所有编解码器输出相同的字节
+PAYLOAD = {
+    "method": "host.get",
+    "params": {"search": {"name": "数据库/db-01"}, "limit": 10, "hostids": ["10001", "10002"], "x": [0, -1, None, True]},
+}
+
+def test_codecs_produce_identical_bytes_for_json_native_values():
+    encoded = {name: codec.dumps(PAYLOAD) for name, codec in CODECS.items()}
+    assert len(set(encoded.values())) == 1, encoded
+    assert json.loads(encoded["json"]) == PAYLOAD
+
+@pytest.mark.parametrize("value", [0.5, 1e16, 1.5e-7, 123456.789])
+def test_codecs_agree_on_float_values(value):
+    # 文本形式可能不同（1e16 / 1e+16），解析后的值相同
+    assert {json.loads(codec.dumps({"v": value}))["v"] for codec in CODECS.values()} == {value}
+
+def test_stdlib_codec_serializes_numpy_values():
+    payload = {"itemids": np.array([1, 2], dtype=np.int64), "value": np.float64(0.25), "n": np.int64(7)}
+    assert json.loads(CODECS["json"].dumps(payload)) == {"itemids": [1, 2], "value": 0.25, "n": 7}
+    if "orjson" in CODECS:
+        assert json.loads(CODECS["orjson"].dumps(payload)) == json.loads(CODECS["json"].dumps(payload))
+
+def test_compressed_body_round_trips():
+    codec = CODECS["json"]
+    body, headers = encode_body(PAYLOAD, codec, compress_min_bytes=1)
+    assert headers == {"Content-Encoding": "gzip"}
+    assert codec.loads(decode_body(body, "gzip")) == PAYLOAD
@@ -0,0 +1,59 @@
+from datetime import datetime
+from maintenance import Maintenance
+from zabbix_api import ZabbixAPIException
+
+class FakeAPI:
+    """记录调用；数组调用整体失败，名称/ID 在 bad 中的单个维护失败"""
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.calls = []
+
+    def call_api(self, method, params):
+        self.calls.append((method, params))
+        if method == "maintenance.get":
+            return {"result": []}
+        if isinstance(params, list):
+            if any(p.get("name") in self.bad for p in params):
+                raise ZabbixAPIException("invalid params")
+            return {"result": {"maintenanceids": [str(i) for i in range(len(params))]}}
+        if params.get("name") in self.bad:
+            raise ZabbixAPIException("invalid params")
+        return {"result": {"maintenanceids": ["9"]}}
+
+def _maintenance(api, windows):
+    maintenance = Maintenance.__new__(Maintenance)
+    maintenance.zabbix_api = api
+    maintenance.parse_csv = lambda file_path: windows
+    maintenance.get_host_ids_by_ips = lambda ips: {ip: ip.split(".")[-1] for ip in ips}
+    return maintenance
+
+def test_submit_falls_back_to_one_by_one():
+    api = FakeAPI(bad={"b"})
+    ids = _maintenance(api, {}).submit_maintenances("maintenance.create", [{"name": "a"}, {"name": "b"}, {"name": "c"}])
+    assert ids == ["9", "9"]
+    assert [p["name"] for method, p in api.calls[1:]] == ["a", "b", "c"]
+
+def test_planned_does_not_extend_existing_by_default():
+    windows = {(datetime(2026, 1, 1, 0), datetime(2026, 1, 1, 1), "m"): ["10.0.0.1"]}
+    api = FakeAPI()
+    plan = _maintenance(api, windows).read_and_process_csv_planned("x.csv")
+    assert plan["update"] == [] and len(plan["create"]) == 1
+    assert [method for method, _ in api.calls] == ["maintenance.get", "maintenance.create"]
+    # 只查询名称（output 只含 name），不取主机和时间段
+    assert api.calls[0][1].get("selectHosts") is None
+
+def test_planned_create_failure_falls_back_per_window():
+    windows = {
+        (datetime(2026, 1, 1, 0), datetime(2026, 1, 1, 1), "m1"): ["10.0.0.1"],
+        (datetime(2026, 1, 2, 0), datetime(2026, 1, 2, 1), "m2"): ["10.0.0.2"],
+    }
+    api = FakeAPI()
+    maintenance = _maintenance(api, windows)
+    first_name = sorted(
+        p["name"] for p in maintenance.read_and_process_csv_planned("x.csv")["create"]
+    )[0]
+    api = FakeAPI(bad={first_name})
+    maintenance.zabbix_api = api
+    maintenance.read_and_process_csv_planned("x.csv")
+    single_creates = [p for method, p in api.calls if method == "maintenance.create" and isinstance(p, dict)]
+    assert len(single_creates) == 2
@@ -0,0 +1,46 @@
+from maintenance_planner import plan_maintenances, merge_intervals
+
+def _periods(maintenance):
+    return [(p["start_date"], p["start_date"] + p["period"]) for p in maintenance["timeperiods"]]
+
+def _periods_by_host(plan):
+    periods = {}
+    for maintenance in plan["create"] + plan["update"]:
+        for host_id in maintenance["hostids"]:
+            periods.setdefault(host_id, []).extend(_periods(maintenance))
+    return periods
+
+def test_overlapping_host_sets_keep_their_own_windows():
+    windows = [(0, 100, {"1", "2"}), (200, 300, {"2", "3"})]
+    plan = plan_maintenances(windows, "patch")
+    assert _periods_by_host(plan) == {"1": [(0, 100)], "2": [(0, 100), (200, 300)], "3": [(200, 300)]}
+    assert plan["maintenances"] == 3
+
+def test_hosts_with_identical_windows_share_one_maintenance():
+    windows = [(0, 100, {"1", "2"}), (200, 300, {"1", "2"}), (50, 150, {"3"})]
+    plan = plan_maintenances(windows, "patch")
+    assert sorted((c["hostids"], _periods(c)) for c in plan["create"]) == [
+        (["1", "2"], [(0, 100), (200, 300)]),
+        (["3"], [(50, 150)]),
+    ]
+
+def test_overlapping_windows_of_one_host_are_merged():
+    windows = [(0, 100, {"1"}), (50, 150, {"1"}), (0, 100, {"2"})]
+    plan = plan_maintenances(windows, "patch")
+    assert plan["maintenances"] == 2
+    assert _periods_by_host(plan) == {"1": [(0, 150)], "2": [(0, 100)]}
+
+def test_no_host_is_in_maintenance_outside_its_windows():
+    windows = [(i * 100, i * 100 + 50, {str(i), str(i + 1)}) for i in range(10)]
+    plan = plan_maintenances(windows, "patch")
+    for host_id, periods in _periods_by_host(plan).items():
+        own = merge_intervals([(start, end) for start, end, hosts in windows if host_id in hosts])
+        assert merge_intervals(periods) == own
+
+def test_skip_names_prevents_duplicates():
+    windows = [(0, 3600, {"1"})]
+    first = plan_maintenances(windows, "patch")
+    name = first["create"][0]["name"]
+    rerun = plan_maintenances(windows, "patch", skip_names={name})
+    assert rerun["create"] == []
+    assert rerun["skipped"] == [name]
@@ -0,0 +1,93 @@
+import time
+import pytest
+import json_codec
+import zabbix_api
+from resilience import AdaptiveRateLimiter, CircuitBreaker, RetryPolicy, is_idempotent
+
+def _open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout  # 跳过等待，下一次 allow 进入半开状态
+
+def test_breaker_release_returns_the_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    _open_breaker(breaker)
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # 半开状态只放行一个试探请求
+    breaker.release()
+    assert breaker.allow()  # 归还后立即可以重新试探
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_unexpected_error_in_half_open_probe_does_not_wedge_breaker(fake_zabbix):
+    api = zabbix_api.ZabbixAPI()
+    shared = api.shared
+    shared.codec = json_codec.CODECS["json"]
+    breaker = shared.resilience.breaker
+    _open_breaker(breaker)
+
+    with pytest.raises(TypeError):
+        api.call_api("host.get", {"hostids": [object()]})  # 无法序列化的参数
+    assert breaker.state != CircuitBreaker.HALF_OPEN
+
+    assert api.call_api("host.get", {"hostids": ["10001"], "output": ["hostid"]})["result"] == [{"hostid": "10001"}]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_breaker_opens_after_threshold_and_closes_after_probe():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()  # reset_timeout 内拒绝请求
+    breaker.opened_at -= breaker.reset_timeout
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    _open_breaker(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_limiter_increases_additively_and_decreases_multiplicatively():
+    limiter = AdaptiveRateLimiter(initial_rate=10, min_rate=2, max_rate=12, target_latency=1.0,
+                                  increase=1, decrease=0.5, cooldown=0)
+    limiter.on_success(0.1)
+    limiter.on_success(0.1)
+    limiter.on_success(0.1)
+    assert limiter.rate == 12  # 不超过 max_rate
+    limiter.on_success(5.0)  # 响应变慢按过载处理
+    assert limiter.rate == 6
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.rate == 2  # 不低于 min_rate
+
+def test_limiter_decreases_once_per_cooldown():
+    limiter = AdaptiveRateLimiter(initial_rate=100, decrease=0.5, cooldown=60)
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.rate == 50
+
+def test_limiter_paces_requests():
+    limiter = AdaptiveRateLimiter(initial_rate=50)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+
+def test_retry_policy_and_idempotent_methods():
+    policy = RetryPolicy(base_delay=0.5, max_delay=2.0)
+    assert all(0 <= policy.backoff(attempt) <= min(2.0, 0.5 * 2 ** attempt) for attempt in range(6) for _ in range(20))
+    assert is_idempotent("host.get") and is_idempotent("user.login")
+    assert not is_idempotent("host.create") and not is_idempotent("maintenance.update")
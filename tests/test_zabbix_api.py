@@ -0,0 +1,79 @@
+import pytest
+import zabbix_api
+from zabbix_api import ZabbixAPI, ZabbixAPIException
+
+@pytest.fixture
+def api(fake_zabbix):
+    api = ZabbixAPI()
+    api.shared.resilience.retry.base_delay = 0  # 测试中重试不等待
+    return api
+
+def _fail_times(backend, method, times):
+    """前 times 次调用 method 时后端异常（替身服务器返回 HTTP 502，属于瞬时故障），返回调用计数"""
+    name = "m_" + method.replace(".", "_")
+    original = getattr(backend, name)
+    calls = {"count": 0}
+
+    def handler(params):
+        calls["count"] += 1
+        if calls["count"] <= times:
+            raise RuntimeError("backend down")
+        return original(params)
+
+    setattr(backend, name, handler)
+    return calls
+
+def test_call_batch_maps_responses_by_id(fake_zabbix, api):
+    server, backend = fake_zabbix
+    dispatch = server.dispatch
+    server.dispatch = lambda body: list(reversed(dispatch(body))) if isinstance(body, list) else dispatch(body)
+    calls = [("host.get", {"hostids": [hostid], "output": ["hostid"]}) for hostid in ("10003", "10001", "10002")]
+    responses = api.call_batch(calls)
+    assert [r["result"][0]["hostid"] for r in responses] == ["10003", "10001", "10002"]
+
+def test_call_batch_keeps_per_call_errors(fake_zabbix, api):
+    server, backend = fake_zabbix
+    calls = [
+        ("host.get", {"hostids": ["10001"], "output": ["hostid"]}),
+        ("no.such", {}),
+        ("proxy.get", {"output": ["proxyid"]}),
+    ] * 2
+    before = server.request_count
+    responses = api.call_batch(calls, chunk_size=4)
+    assert server.request_count - before == 2
+    assert ["error" in r for r in responses] == [False, True, False] * 2
+    assert responses[1]["error"]["code"] == -32601
+
+def test_relogin_after_session_expiry(fake_zabbix, api):
+    server, backend = fake_zabbix
+    backend.expire_sessions()
+    assert api.call_api("host.get", {"hostids": ["10001"], "output": ["hostid"]})["result"] == [{"hostid": "10001"}]
+    backend.expire_sessions()
+    responses = api.call_batch([("host.get", {"hostids": ["10002"], "output": ["hostid"]})])
+    assert responses[0]["result"] == [{"hostid": "10002"}]
+    assert len(backend.tokens) == 1
+
+def test_read_calls_are_retried_on_transient_errors(fake_zabbix, api):
+    server, backend = fake_zabbix
+    calls = _fail_times(backend, "host.get", 2)
+    assert api.call_api("host.get", {"hostids": ["10001"], "output": ["hostid"]})["result"] == [{"hostid": "10001"}]
+    assert calls["count"] == 3
+
+def test_write_calls_are_not_retried(fake_zabbix, api):
+    server, backend = fake_zabbix
+    calls = _fail_times(backend, "host.massupdate", 1)
+    with pytest.raises(ZabbixAPIException) as error:
+        api.call_api("host.massupdate", {"hosts": [{"hostid": "10001"}], "status": 1})
+    assert error.value.transient
+    assert calls["count"] == 1
+
+def test_iter_history_splits_truncated_slices(fake_zabbix, api):
+    server, backend = fake_zabbix
+    itemids = [i for i, item in backend.inventory.items.items() if item["value_type"] == "0"][:3]
+    time_till = 1_700_000_000
+    time_from = time_till - 6 * 3600
+    full = list(api.iter_history(itemids, time_from, time_till, slice_seconds=6 * 3600))
+    paged = list(api.iter_history(itemids, time_from, time_till, slice_seconds=6 * 3600, page_limit=50))
+    assert len(full) > 50
+    assert sorted((r["itemid"], r["clock"]) for r in paged) == sorted((r["itemid"], r["clock"]) for r in full)
+    assert [int(r["clock"]) for r in paged] == sorted(int(r["clock"]) for r in paged)
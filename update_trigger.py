@@ -1,8 +1,13 @@
 import logging
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional, Any
 from zabbix_api import ZabbixAPI, ZabbixAPIException
 from host_management import ExportHostManagement
+from host_index import HostIndex
+from host_record import HostRecord
+from condition import compile_condition, ConditionError
+from api_metrics import get_metrics
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -17,6 +22,7 @@ class UpdateTrigger:
             logging.error(f"❌ Zabbix API 登录失败: {str(e)}")
             raise
         self.host_mgmt = ExportHostManagement()
+        self.host_index: Optional[HostIndex] = None
 
     def read_excel(self) -> List[Dict[str, str]]:
         try:
@@ -30,23 +36,24 @@ class UpdateTrigger:
             logging.error(f"❌ 读取 Excel 失败: {str(e)}")
             return []
 
-    def get_matching_hosts(self, app_id: Optional[str], ip_address: Optional[str]) -> List[Dict[str, str]]:
-        all_hosts = self.host_mgmt.get_host_info()
-        return [
-            host for host in all_hosts
-            if (not app_id or host.get("APP_ID") == app_id) and (not ip_address or host.get("IP地址") == ip_address)
-        ]
-
-    def get_triggers_by_name(self, host_id: str, trigger_name: str) -> List[Dict[str, str]]:
+    def get_matching_hosts(self, app_id: Optional[str], ip_address: Optional[str]) -> List[HostRecord]:
+        # 主机清单只加载一次，之后每行 Excel 都在内存索引中查询
+        if self.host_index is None:
+            self.host_index = HostIndex(self.host_mgmt)
+        return self.host_index.find(app_id=app_id, ip_address=ip_address)
+
+    def get_triggers_by_name_batch(self, host_ids: List[str], trigger_name: str) -> List[List[Dict[str, str]]]:
+        """按主机批量查询触发器（一次批量请求），返回与 host_ids 顺序一致的触发器列表"""
+        calls = [("trigger.get", {
+            "hostids": host_id,
+            "output": ["triggerid", "description"],
+            "search": {"description": trigger_name}
+        }) for host_id in host_ids]
         try:
-            triggers = self.zabbix_api.call_api("trigger.get", {
-                "hostids": host_id,
-                "output": ["triggerid", "description"],
-                "search": {"description": trigger_name}
-            }).get("result", [])
-            return triggers
+            responses = self.zabbix_api.call_batch(calls)
         except ZabbixAPIException:
-            return []
+            return [[] for _ in host_ids]
+        return [response.get("result", []) for response in responses]
 
     def get_trigger_item_value(self, trigger_id: str) -> Optional[Any]:
         try:
@@ -75,11 +82,11 @@ class UpdateTrigger:
             return None
 
     def should_update_trigger(self, trigger_value: Any, condition: str) -> bool:
+        # 条件只在首次使用时解析，之后复用编译结果（见 condition.compile_condition）
         try:
-            if condition.startswith((">", "<", "=")):
-                return eval(f"{float(trigger_value)} {condition}")
-            return condition in str(trigger_value)
-        except (ValueError, TypeError):
+            return compile_condition(condition)(trigger_value)
+        except ConditionError as e:
+            logging.error(f"❌ 条件表达式无效: {str(e)}")
             return False
 
     def update_trigger_status(self, trigger_id: str, enable: bool) -> bool:
@@ -111,11 +118,12 @@ class UpdateTrigger:
                 continue
 
             total_hosts += len(matching_hosts)
+            triggers_by_host = self.get_triggers_by_name_batch(
+                [host.hostid for host in matching_hosts], trigger_name
+            )
 
-            for host in matching_hosts:
-                host_id = host.get("主机ID")
-                host_name = host.get("主机名称", "未知主机")
-                triggers = self.get_triggers_by_name(host_id, trigger_name)
+            for host, triggers in zip(matching_hosts, triggers_by_host):
+                host_name = host.host or "未知主机"
 
                 if not triggers:
                     continue
@@ -140,10 +148,91 @@ class UpdateTrigger:
         logging.info(f"📌 匹配触发器数: {total_triggers}")
         logging.info(f"🔄 更新触发器数: {updated_triggers}")
 
+    def get_triggers_for_hosts(self, host_ids: List[str], trigger_name: str) -> List[Dict[str, Any]]:
+        """
+        一次 trigger.get 获取所有目标主机上匹配名称的触发器，
+        同时带出关联监控项的最新值（lastvalue/lastclock），无需再查询 item.get/history.get
+        """
+        if not host_ids:
+            return []
+        try:
+            return self.zabbix_api.call_api("trigger.get", {
+                "hostids": host_ids,
+                "output": ["triggerid", "description", "status"],
+                "search": {"description": trigger_name},
+                "selectItems": ["itemid", "value_type", "lastvalue", "lastclock"],
+                "selectHosts": ["hostid", "host"]
+            }).get("result", [])
+        except ZabbixAPIException as e:
+            logging.error(f"❌ 批量获取触发器失败: {str(e)}")
+            return []
+
+    def update_triggers_status(self, trigger_ids: List[str], enable: bool, chunk_size: int = 500) -> List[str]:
+        """通过 trigger.update 数组批量更新触发器状态，返回更新成功的触发器 ID"""
+        status = "0" if enable else "1"
+        updated = []
+        for start in range(0, len(trigger_ids), chunk_size):
+            chunk = trigger_ids[start:start + chunk_size]
+            try:
+                response = self.zabbix_api.call_api("trigger.update", [
+                    {"triggerid": trigger_id, "status": status} for trigger_id in chunk
+                ])
+                updated.extend(response.get("result", {}).get("triggerids", []))
+            except ZabbixAPIException as e:
+                logging.error(f"❌ 批量更新第 {start + 1}-{start + len(chunk)} 个触发器失败: {str(e)}")
+        return updated
+
+    def process_excel_triggers_bulk(self, trigger_name: str, condition: str, enable: bool, chunk_size: int = 500):
+        """
+        批量模式：汇总 Excel 所有行匹配的主机，一次 trigger.get 取回触发器及监控项最新值，
+        在本地判断条件，再用 trigger.update 数组批量更新。API 调用次数与触发器数量无关。
+        已处于目标状态的触发器不再重复更新。
+        """
+        try:
+            compiled = compile_condition(condition)
+        except ConditionError as e:
+            logging.error(f"❌ 条件表达式无效: {str(e)}")
+            return
+
+        data = self.read_excel()
+        if not data:
+            logging.error("❌ Excel 数据为空，无法执行更新")
+            return
+
+        hosts = {}
+        for row in data:
+            app_id, ip_address = row.get("APP_ID", "").strip(), row.get("IP地址", "").strip()
+            for host in self.get_matching_hosts(app_id, ip_address):
+                hosts[host.hostid] = host
+
+        triggers = self.get_triggers_for_hosts(list(hosts), trigger_name)
+        target_status = "0" if enable else "1"
+        # lastclock 为 0 表示监控项还没有任何数据，与旧流程中历史数据为空时的处理一致
+        candidates = [
+            trig for trig in triggers
+            if trig.get("items") and str(trig["items"][0].get("lastclock", "0")) != "0"
+            and trig.get("status") != target_status
+        ]
+        # 所有触发器的条件判断为一次数组运算
+        matched = compiled.evaluate(np.array([trig["items"][0].get("lastvalue") for trig in candidates], dtype=object))
+        to_update = {trig["triggerid"]: trig for trig, hit in zip(candidates, matched) if hit}
+
+        updated_ids = self.update_triggers_status(list(to_update), enable, chunk_size)
+        for trigger_id in updated_ids:
+            trig = to_update.get(trigger_id, {})
+            host_name = next((h.get("host") for h in trig.get("hosts", [])), "未知主机")
+            logging.info(f"🔄 主机 [{host_name}] 触发器 [{trig.get('description')}] 状态已更新")
+
+        logging.info("✅ 批量触发器更新完成")
+        logging.info(f"📊 处理主机数: {len(hosts)}")
+        logging.info(f"📌 匹配触发器数: {len(triggers)}")
+        logging.info(f"🔄 更新触发器数: {len(updated_ids)}")
+
 if __name__ == "__main__":
     updater = UpdateTrigger()
     TRIGGER_NAME = "UNDO"
     CONDITION = ">0"  # 监控项值 > 80 才执行
     ENABLE_TRIGGER = False  # True: 启用, False: 禁用
 
-    updater.process_excel_triggers(TRIGGER_NAME, CONDITION, ENABLE_TRIGGER)
+    updater.process_excel_triggers_bulk(TRIGGER_NAME, CONDITION, ENABLE_TRIGGER)
+    print(get_metrics().format_summary())
@@ -1,27 +1,128 @@
 import requests
-import json
 import logging
+import threading
+import time
+from requests.adapters import HTTPAdapter
 from config import ZABBIX_URL, ZABBIX_USER, ZABBIX_PASSWORD
+from resilience import Resilience, TRANSIENT_STATUS_CODES, is_idempotent
+from api_metrics import get_metrics
+from json_codec import ACCEPT_ENCODING, COMPRESS_MIN_BYTES, get_codec, encode_body, history_rows_to_arrays
 
 # 设置日志记录
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 会话失效时 Zabbix 返回的错误信息片段
+SESSION_EXPIRED_MARKERS = ("Session terminated", "Not authorised", "Not authorized")
+
 class ZabbixAPIException(Exception):
     """自定义异常类，用于处理Zabbix API相关的错误"""
-    def __init__(self, message, response=None):
+    def __init__(self, message, response=None, transient=False):
+        """
+        Args:
+            transient: 是否为瞬时故障（超时、连接失败、网关错误等），只读调用遇到瞬时故障可重试
+        """
         self.message = message
         self.response = response
+        self.transient = transient
         super().__init__(self.message)
 
-class ZabbixAPI:
-    def __init__(self):
-        self.url = ZABBIX_URL + "/api_jsonrpc.php"
-        self.headers = {"Content-Type": "application/json"}
+    @property
+    def is_session_expired(self):
+        """判断错误是否由会话失效（token 过期或被注销）引起"""
+        return is_session_expired_response(self.response)
+
+def is_session_expired_response(response):
+    """判断 JSON-RPC 响应是否为会话失效错误"""
+    if not isinstance(response, dict):
+        return False
+    error = response.get("error") or {}
+    text = f"{error.get('message', '')} {error.get('data', '')}"
+    return any(marker in text for marker in SESSION_EXPIRED_MARKERS)
+
+class ZabbixSession:
+    """
+    进程内共享的 Zabbix 会话：同一 (URL, 用户) 只持有一个连接池和一个认证 token，
+    所有 ZabbixAPI 实例复用该会话，避免重复登录和 TCP/TLS 握手；
+    重试策略、自适应限速和熔断器（resilience）也在会话级共享。
+    codec 为 JSON 编解码器（见 json_codec.get_codec），compress_min_bytes 大于 0 时压缩不小于该字节数的请求体。
+    """
+    def __init__(self, url, user, password, timeout=30, pool_size=10, resilience=None,
+                 codec=None, compress_min_bytes=COMPRESS_MIN_BYTES):
+        self.url = url.rstrip("/") + "/api_jsonrpc.php"
+        self.user = user
+        self.password = password
+        self.timeout = timeout
         self.auth_token = None
-        self.session = requests.Session()
-        self.session.timeout = 30  # 设置请求超时为30秒
-        self.login()
+        self.lock = threading.RLock()
+        self.pool_size = 0
+        self.http = requests.Session()
+        self.ensure_pool_size(pool_size)
+        self.resilience = resilience or Resilience()
+        self.codec = codec or get_codec()
+        self.compress_min_bytes = compress_min_bytes
+
+    def ensure_pool_size(self, pool_size):
+        """保证连接池至少能容纳 pool_size 个并发连接（并发调用时使用）"""
+        with self.lock:
+            if pool_size <= self.pool_size:
+                return
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.http.mount("http://", adapter)
+            self.http.mount("https://", adapter)
+            self.pool_size = pool_size
+
+    def close(self):
+        """关闭连接池并丢弃 token"""
+        self.auth_token = None
+        self.http.close()
+
+_session_registry = {}
+_session_registry_lock = threading.Lock()
+
+def get_shared_session(url=None, user=None, password=None):
+    """按 (URL, 用户) 返回共享会话，不存在时创建"""
+    url = url or ZABBIX_URL
+    user = user or ZABBIX_USER
+    password = password or ZABBIX_PASSWORD
+    key = (url.rstrip("/"), user)
+    with _session_registry_lock:
+        shared = _session_registry.get(key)
+        if shared is None:
+            shared = ZabbixSession(url, user, password)
+            _session_registry[key] = shared
+        return shared
+
+def close_shared_sessions():
+    """关闭并清空所有共享会话（脚本结束或切换账号时使用）"""
+    with _session_registry_lock:
+        for shared in _session_registry.values():
+            shared.close()
+        _session_registry.clear()
+
+class ZabbixAPI:
+    def __init__(self, url=None, user=None, password=None, lazy_login=False, timeout=None):
+        """
+        Args:
+            lazy_login: 为 True 时推迟到第一次调用 API 时再登录（全部命中本地缓存时不产生任何请求）
+            timeout: 本实例的 HTTP 请求超时（秒），默认使用共享会话的超时
+        """
+        self.shared = get_shared_session(url, user, password)
+        self.url = self.shared.url
+        self.headers = {"Content-Type": "application/json", "Accept-Encoding": ACCEPT_ENCODING}
+        self.session = self.shared.http
+        self.session.timeout = self.shared.timeout  # 设置请求超时为30秒
+        self.timeout = timeout or self.shared.timeout
+        if not lazy_login:
+            self.ensure_login()
+
+    @property
+    def auth_token(self):
+        return self.shared.auth_token
+
+    @auth_token.setter
+    def auth_token(self, value):
+        self.shared.auth_token = value
 
     def login(self):
         """自动登录并获取认证token"""
@@ -30,42 +131,140 @@ class ZabbixAPI:
             "jsonrpc": "2.0",
             "method": "user.login",
             "params": {
-                "user": ZABBIX_USER,
-                "password": ZABBIX_PASSWORD
+                "user": self.shared.user,
+                "password": self.shared.password
             },
             "id": 1
         }
-        try:
-            response = self._send_request(payload)
-            if "result" in response:
-                self.auth_token = response["result"]
-                logger.info("Login successful")
-            else:
-                raise ZabbixAPIException("Login failed", response)
-        except requests.exceptions.RequestException as e:
-            raise ZabbixAPIException(f"Request error during login: {e}")
+        with self.shared.lock:
+            try:
+                response = self._send_request(payload)
+                if "result" in response:
+                    self.auth_token = response["result"]
+                    logger.info("Login successful")
+                else:
+                    raise ZabbixAPIException("Login failed", response)
+            except requests.exceptions.RequestException as e:
+                raise ZabbixAPIException(f"Request error during login: {e}")
 
-    def _send_request(self, payload):
-        """发送请求并返回响应"""
-        try:
-            logger.debug(f"Sending request with payload: {payload}")
-            response = self.session.post(self.url, data=json.dumps(payload), headers=self.headers, timeout=self.session.timeout)
-            response.raise_for_status()  # 检查请求是否成功
-            response_data = response.json()
+    def ensure_login(self):
+        """共享会话尚未登录时登录，已登录时直接复用 token"""
+        with self.shared.lock:
+            if self.shared.auth_token is None:
+                self.login()
+
+    def relogin(self, stale_token):
+        """会话失效后重新登录；若其他线程已刷新 token 则直接复用"""
+        with self.shared.lock:
+            if self.auth_token == stale_token:
+                logger.info("Zabbix session expired, logging in again")
+                self.auth_token = None
+                self.login()
 
-            if "error" in response_data:
-                raise ZabbixAPIException(f"Zabbix API error: {response_data['error']}", response_data)
+    def _post(self, payload):
+        """
+        发送 HTTP 请求并返回解析后的 JSON（单个请求为 dict，批量请求为 list）。
+        只读调用（*.get，批量请求需全部为只读）遇到瞬时故障时按 RetryPolicy 退避重试，
+        写操作不重试，避免重复创建或更新。
+        """
+        calls = payload if isinstance(payload, list) else [payload]
+        retryable = all(is_idempotent(call.get("method", "")) for call in calls)
+        retry = self.shared.resilience.retry
+        attempt = 0
+        while True:
+            try:
+                return self._post_once(payload)
+            except ZabbixAPIException as e:
+                if not (retryable and e.transient and attempt < retry.retries):
+                    raise
+                delay = retry.backoff(attempt)
+                attempt += 1
+                logger.warning(f"Transient error, retry {attempt}/{retry.retries} in {delay:.1f}s: {e}")
+                time.sleep(delay)
 
-            return response_data
+    def _post_once(self, payload):
+        """
+        经过熔断器和限速器发送一次 HTTP 请求，把结果反馈给二者并记录调用统计（api_metrics）。
+        前端拒绝压缩的请求体时在同一次调用内改为不压缩重发，熔断器、限速器和调用统计只计一次
+        """
+        resilience = self.shared.resilience
+        if not resilience.breaker.allow():
+            raise ZabbixAPIException(
+                f"Circuit open: Zabbix frontend failing, requests paused for up to {resilience.breaker.reset_timeout:.0f}s"
+            )
+        resilience.limiter.acquire()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Sending request with payload: {payload}")
+        shared = self.shared
+        data = None
+        request_bytes = 0
+        response_bytes = 0
+        error = None
+        wall_started = time.time()
+        started = time.monotonic()
+        try:
+            while True:
+                body, extra_headers = encode_body(payload, shared.codec, shared.compress_min_bytes)
+                headers = dict(self.headers, **extra_headers) if extra_headers else self.headers
+                request_bytes = len(body)
+                response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+                # 压缩响应按传输字节数计（Content-Length），否则为响应体长度
+                response_bytes = int(response.headers.get("Content-Length") or len(response.content))
+                response.raise_for_status()  # 检查请求是否成功
+                data = shared.codec.loads(response.content)
+                if not (extra_headers and isinstance(data, dict) and (data.get("error") or {}).get("code") == -32700):
+                    break
+                # 前端无法解析压缩后的请求体（Web 服务器未配置请求解压）：关闭请求压缩后重发
+                logger.warning("Zabbix frontend rejected a compressed request body, disabling request compression")
+                shared.compress_min_bytes = 0
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            error = type(e).__name__
+            resilience.breaker.record_failure()
+            resilience.limiter.on_overload()
+            raise ZabbixAPIException(f"Request error: {e}", transient=True)
+        except requests.exceptions.HTTPError as e:
+            error = f"HTTP {e.response.status_code}" if e.response is not None else type(e).__name__
+            if e.response is not None and e.response.status_code in TRANSIENT_STATUS_CODES:
+                resilience.breaker.record_failure()
+                resilience.limiter.on_overload()
+                raise ZabbixAPIException(f"Request error: {e}", transient=True)
+            resilience.breaker.record_success()  # 前端有响应，只是请求本身有误
+            raise ZabbixAPIException(f"Request error: {e}")
         except requests.exceptions.RequestException as e:
+            error = type(e).__name__
+            resilience.breaker.record_failure()
             raise ZabbixAPIException(f"Request error: {e}")
         except ValueError as e:
+            # 前端返回了非 JSON 内容（如 PHP 错误页），按故障计入熔断器
+            error = "InvalidJSON"
+            resilience.breaker.record_failure()
             raise ZabbixAPIException(f"Invalid JSON response: {e}")
+        except Exception as e:
+            # 其它异常（如请求体序列化失败）：未得到前端的结果，归还熔断器的试探名额后原样抛出
+            error = type(e).__name__
+            resilience.breaker.release()
+            raise
+        finally:
+            duration = time.monotonic() - started
+            if error is None and isinstance(data, dict) and "error" in data:
+                error = "APIError"
+            get_metrics().record(payload, wall_started, duration, request_bytes, response_bytes, error)
+        resilience.breaker.record_success()
+        resilience.limiter.on_success(duration)
+        return data
+
+    def _send_request(self, payload):
+        """发送请求并返回响应"""
+        response_data = self._post(payload)
+        if "error" in response_data:
+            raise ZabbixAPIException(f"Zabbix API error: {response_data['error']}", response_data)
+        return response_data
 
     def call_api(self, method, params=None):
-        """调用Zabbix API方法"""
+        """调用Zabbix API方法，会话失效时自动重新登录并重试一次"""
         if params is None:
             params = {}
+        self.ensure_login()
         payload = {
             "jsonrpc": "2.0",
             "method": method,
@@ -73,7 +272,131 @@ class ZabbixAPI:
             "auth": self.auth_token,
             "id": 1
         }
-        return self._send_request(payload)
+        try:
+            return self._send_request(payload)
+        except ZabbixAPIException as e:
+            if not e.is_session_expired:
+                raise
+            self.relogin(payload["auth"])
+            payload["auth"] = self.auth_token
+            return self._send_request(payload)
+
+    def call_batch(self, calls, chunk_size=100):
+        """
+        以 JSON-RPC 批量请求的方式调用多个 API 方法
+
+        Args:
+            calls: [(method, params), ...] 列表
+            chunk_size: 每个 HTTP 请求最多包含的调用数
+
+        Returns:
+            list: 与 calls 顺序一致的响应列表，每项为 {"result": ...} 或 {"error": ...}，
+                  单个调用失败不影响其他调用
+        """
+        calls = list(calls)
+        responses = [None] * len(calls)
+        if calls:
+            self.ensure_login()
+        for start in range(0, len(calls), chunk_size):
+            indexes = list(range(start, min(start + chunk_size, len(calls))))
+            stale_token = self.auth_token
+            responses_by_index = self._send_batch(calls, indexes)
+            expired = [i for i in indexes if is_session_expired_response(responses_by_index[i])]
+            if expired:
+                self.relogin(stale_token)
+                responses_by_index.update(self._send_batch(calls, expired))
+            for i in indexes:
+                responses[i] = responses_by_index[i]
+        return responses
+
+    def _send_batch(self, calls, indexes):
+        """发送一个批量请求，按 id 将响应匹配回调用下标"""
+        payload = []
+        for i in indexes:
+            method, params = calls[i]
+            payload.append({
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params if params is not None else {},
+                "auth": self.auth_token,
+                "id": i + 1
+            })
+        response_data = self._post(payload)
+        if isinstance(response_data, dict):
+            # 整个批量请求被拒绝（如请求格式错误），服务端只返回一个错误对象
+            raise ZabbixAPIException(f"Zabbix API batch error: {response_data.get('error')}", response_data)
+
+        responses_by_index = {}
+        for item in response_data:
+            if isinstance(item.get("id"), int):
+                responses_by_index[item["id"] - 1] = item
+        for i in indexes:
+            responses_by_index.setdefault(i, {
+                "jsonrpc": "2.0",
+                "error": {"code": -32603, "message": "Missing response", "data": "No response for this call in batch"},
+                "id": i + 1
+            })
+        return responses_by_index
+
+    def iter_history(self, itemids, time_from, time_till, history=0, slice_seconds=3600,
+                     itemids_per_call=100, page_limit=None, as_arrays=False):
+        """
+        分片获取历史数据的生成器：按时间窗口和监控项分组多次调用 history.get，
+        逐行（或逐片）产出数据，调用方可以在常量内存中完成聚合。
+
+        Args:
+            itemids: 监控项 ID 列表（须为同一值类型）
+            time_from, time_till: 时间范围（Unix 时间戳，含两端）
+            history: 历史数据类型（0 浮点, 1 字符, 2 日志, 3 整数, 4 文本）
+            slice_seconds: 每个时间分片的长度（秒）
+            itemids_per_call: 每次请求包含的监控项数量
+            page_limit: 单次请求返回的最大行数；结果达到该值时视为被截断，自动将分片减半重新请求；
+                1 秒的分片仍达到该值时无法再拆分，记录警告（可能丢失数据）
+            as_arrays: 为 True 时每个分片产出 (itemids, clocks, values) 三个 NumPy 数组，否则逐行产出 dict
+
+        Yields:
+            dict: {"itemid", "clock", "value"}，或 as_arrays=True 时的数组三元组
+        """
+        itemids = [str(itemid) for itemid in itemids]
+        for start in range(0, len(itemids), itemids_per_call):
+            group = itemids[start:start + itemids_per_call]
+            window_start = time_from
+            while window_start <= time_till:
+                window_end = min(window_start + slice_seconds - 1, time_till)
+                pending = [(window_start, window_end)]
+                while pending:
+                    slice_from, slice_till = pending.pop()
+                    params = {
+                        "itemids": group,
+                        "history": history,
+                        "time_from": slice_from,
+                        "time_till": slice_till,
+                        "output": ["itemid", "clock", "value"],
+                        "sortfield": "clock",
+                        "sortorder": "ASC"
+                    }
+                    if page_limit:
+                        params["limit"] = page_limit
+                    rows = self.call_api("history.get", params).get("result", [])
+                    if page_limit and len(rows) >= page_limit and slice_till > slice_from:
+                        # 结果可能被截断：拆成两半重新请求，先处理前半段以保持时间顺序
+                        middle = (slice_from + slice_till) // 2
+                        pending.append((middle + 1, slice_till))
+                        pending.append((slice_from, middle))
+                        continue
+                    if page_limit and len(rows) >= page_limit:
+                        # 1 秒的分片无法再拆分，超出 page_limit 的行会丢失
+                        logger.warning(
+                            f"history.get returned {len(rows)} rows (page_limit={page_limit}) for clock {slice_from}, "
+                            f"results may be truncated; use fewer itemids_per_call or a larger page_limit"
+                        )
+                    if not rows:
+                        continue
+                    if as_arrays:
+                        yield history_rows_to_arrays(rows, history)
+                    else:
+                        yield from rows
+                window_start = window_end + 1
 
     def __getattr__(self, name):
         """动态生成API方法（如调用host.get()）"""